@@ -227,6 +227,21 @@ TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "")
 TWITCH_CLIENT_ID = os.environ.get("TWITCH_CLIENT_ID", "")
 TWITCH_CLIENT_SECRET = os.environ.get("TWITCH_CLIENT_SECRET", "")
 
+# SQLite file holding state shared by all workers (rate-limit buckets, API tokens)
+PROVIDER_STATE_PATH = Path(
+    os.environ.get("PROVIDER_STATE_PATH", DATABASES["default"]["NAME"].with_name("provider_state.sqlite3"))
+)
+
+# SQLite file with the local copy of provider data dumps (see `manage.py load_metadata_dump`)
+METADATA_MIRROR_PATH = Path(
+    os.environ.get("METADATA_MIRROR_PATH", DATABASES["default"]["NAME"].with_name("metadata_mirror.sqlite3"))
+)
+
+# Temporary directory for covers prefetched while the import preview is displayed
+COVER_PREFETCH_DIR = Path(
+    os.environ.get("COVER_PREFETCH_DIR", DATABASES["default"]["NAME"].with_name("cover_prefetch"))
+)
+
 # =============================================================================
 # Security Settings for Production (behind reverse proxy like Cloudflare Tunnel)
 # =============================================================================
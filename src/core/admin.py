@@ -1,8 +1,9 @@
 from django.contrib import admin
 
-from core.models import Agent, Media, SavedView, Tag
+from core.models import Agent, Media, MediaExternalId, SavedView, Tag
 
 admin.site.register(Agent)
 admin.site.register(Media)
+admin.site.register(MediaExternalId)
 admin.site.register(SavedView)
 admin.site.register(Tag)
@@ -0,0 +1,126 @@
+"""
+Bulk edition of media: one action applied to a selection or to a whole filtered list.
+
+Every action is a fixed number of statements whatever the number of media:
+field changes are a single UPDATE, tags are added with one insert into the
+through table and removed with one DELETE, and a deletion cleans up the
+contributors it leaves orphaned with one set-based query. UPDATE bypasses
+`auto_now`, so `updated_at` is set explicitly.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk_import import MAX_NAME_LENGTH
+from .models import Media, Tag
+from .utils import delete_orphan_agents_by_ids, delete_with_tombstones, get_or_create_by_names
+
+logger = logging.getLogger(__name__)
+
+SET_STATUS = "set_status"
+SET_SCORE = "set_score"
+ADD_TAG = "add_tag"
+REMOVE_TAG = "remove_tag"
+DELETE = "delete"
+ACTIONS = (SET_STATUS, SET_SCORE, ADD_TAG, REMOVE_TAG, DELETE)
+# Form field holding the value of each action
+VALUE_FIELDS = {SET_STATUS: "status", SET_SCORE: "score", ADD_TAG: "tag", REMOVE_TAG: "tag"}
+
+# Rows per INSERT into the through table
+INSERT_BATCH_SIZE = 500
+
+_STATUSES = {value for value, _label in Media._meta.get_field("status").choices}  # noqa: SLF001
+_SCORES = {value for value, _label in Media._meta.get_field("score").choices}  # noqa: SLF001
+
+
+class BulkEditError(ValueError):
+    """Raised when an action or its value is not valid. Nothing is changed."""
+
+
+@dataclass
+class BulkEditResult:
+    """Outcome of a bulk action."""
+
+    action: str
+    # Media updated or deleted
+    count: int = 0
+    # Contributors deleted because the deleted media were their last ones
+    orphan_agents_deleted: int = 0
+
+
+def _clean_value(action: str, value: str) -> str | int | None:
+    """Validate the value of an action. Returns what the action applies."""
+    value = (value or "").strip()
+    if action == SET_STATUS:
+        if value not in _STATUSES:
+            msg = f"Unknown status: {value}"
+            raise BulkEditError(msg)
+        return value
+    if action == SET_SCORE:
+        # An empty score clears it
+        if not value:
+            return None
+        try:
+            score = int(value)
+        except ValueError:
+            score = None
+        if score not in _SCORES:
+            msg = f"Invalid score: {value}"
+            raise BulkEditError(msg)
+        return score
+    if action in {ADD_TAG, REMOVE_TAG}:
+        if not value:
+            msg = "A tag name is required"
+            raise BulkEditError(msg)
+        return value[:MAX_NAME_LENGTH]
+    return None
+
+
+def apply_bulk_action(media, action: str, value: str = "") -> BulkEditResult:
+    """
+    Apply an action to a queryset of media, in one transaction.
+
+    The queryset may come from a search or filters (joins, `distinct()`,
+    prefetches): it is only used as a subquery of primary keys.
+
+    Raises:
+        BulkEditError: If the action is unknown or its value is invalid
+    """
+    if action not in ACTIONS:
+        msg = f"Unknown action: {action}"
+        raise BulkEditError(msg)
+    value = _clean_value(action, value)
+    result = BulkEditResult(action)
+    targets = Media.objects.filter(pk__in=media.order_by().values("pk"))
+    now = timezone.now()
+
+    with transaction.atomic():
+        if action == SET_STATUS:
+            result.count = targets.update(status=value, updated_at=now)
+        elif action == SET_SCORE:
+            result.count = targets.update(score=value, updated_at=now)
+        elif action == ADD_TAG:
+            tag = get_or_create_by_names(Tag, [value])[value]
+            tag_links = Media.tags.through
+            tag_links.objects.bulk_create(
+                [tag_links(media_id=media_id, tag_id=tag.pk) for media_id in targets.values_list("pk", flat=True)],
+                batch_size=INSERT_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            result.count = targets.update(updated_at=now)
+        elif action == REMOVE_TAG:
+            tag_links = Media.tags.through.objects.filter(tag__name=value, media__in=targets)
+            tagged = Media.objects.filter(pk__in=tag_links.values("media_id"))
+            result.count = tagged.update(updated_at=now)
+            tag_links.delete()
+        else:
+            contributor_links = Media.contributors.through.objects.filter(media__in=targets)
+            contributor_ids = set(contributor_links.values_list("agent_id", flat=True))
+            result.count = delete_with_tombstones(targets)
+            result.orphan_agents_deleted = delete_orphan_agents_by_ids(contributor_ids)
+
+    logger.info("Bulk %s applied to %d media", action, result.count)
+    return result
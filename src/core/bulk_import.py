@@ -0,0 +1,138 @@
+"""
+Bulk creation of media from provider metadata.
+
+Used when adding many items at once (e.g. a shelf of books from a list of
+ISBNs), where the per-item import form would mean one round of provider calls
+and one form submission per item.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from .models import Agent, Media, MediaExternalId
+from .services import registry
+from .services.cover_prefetch import prepare_cover
+from .services.executor import provider_executor
+from .services.isbn import normalize_isbn
+from .utils import get_or_create_by_names
+
+logger = logging.getLogger(__name__)
+
+MAX_NAME_LENGTH = 100
+MAX_TITLE_LENGTH = 255
+
+get_openlibrary_client = registry.client_factory("openlibrary")
+
+# ISBNs are separated by new lines, commas or semicolons (spaces may be part of an ISBN)
+_ISBN_SEPARATORS = re.compile(r"[\n\r,;]+")
+
+
+@dataclass
+class IsbnImportResult:
+    """Outcome of a bulk ISBN import."""
+
+    created: list[Media] = field(default_factory=list)
+    already_in_library: list[str] = field(default_factory=list)
+    not_found: list[str] = field(default_factory=list)
+    invalid: list[str] = field(default_factory=list)
+
+
+def parse_isbns(text: str) -> tuple[list[str], list[str]]:
+    """
+    Extract ISBNs from pasted or uploaded text.
+
+    Returns (normalized ISBNs without duplicates, entries that are not ISBNs).
+    """
+    isbns = []
+    invalid = []
+    for raw_entry in _ISBN_SEPARATORS.split(text):
+        entry = raw_entry.strip()
+        if not entry:
+            continue
+        if isbn := normalize_isbn(entry):
+            isbns.append(isbn)
+            continue
+        # Several ISBNs on one line, separated by spaces
+        candidates = [normalize_isbn(part) for part in entry.split()]
+        if all(candidates):
+            isbns.extend(candidates)
+        else:
+            invalid.append(entry)
+    return list(dict.fromkeys(isbns)), invalid
+
+
+def import_isbns(isbns: list[str]) -> IsbnImportResult:
+    """
+    Create a book for every ISBN found on OpenLibrary and not already in the library.
+
+    Metadata is fetched in batches and covers are downloaded concurrently
+    before anything is written; all rows are then created in one transaction.
+    """
+    result = IsbnImportResult()
+    client = get_openlibrary_client()
+    books = client.get_books_by_isbns(isbns)
+    result.not_found = [isbn for isbn in isbns if isbn not in books]
+
+    # Skip books already in the library, and ISBNs of a work listed twice
+    work_ids = {isbn: book["openlibrary_url"].rsplit("/", 1)[-1] for isbn, book in books.items()}
+    existing_ids = set(
+        MediaExternalId.objects.filter(provider="openlibrary", external_id__in=work_ids.values()).values_list(
+            "external_id", flat=True
+        )
+    )
+    new_books = {}
+    for isbn, book in books.items():
+        if work_ids[isbn] in existing_ids:
+            result.already_in_library.append(isbn)
+        else:
+            existing_ids.add(work_ids[isbn])
+            new_books[isbn] = book
+
+    covers = provider_executor.run_all(
+        "isbn-import-covers",
+        lambda book: prepare_cover(book["cover_url"], client.download_cover) if book["cover_url"] else None,
+        new_books.values(),
+    )
+
+    media_list = []
+    for book, cover in zip(new_books.values(), covers, strict=True):
+        media = Media(
+            title=book["title"][:MAX_TITLE_LENGTH] or book["openlibrary_url"],
+            media_type="BOOK",
+            pub_year=book["year"],
+            external_uri=book["openlibrary_url"],
+        )
+        if cover:
+            # Covers are already compressed; store the file before opening the transaction
+            media.cover.save(f"{media.title[:50].replace('/', '_')}.jpg", cover, save=False)
+        media_list.append(media)
+
+    contributor_names = [
+        list(dict.fromkeys(name.strip()[:MAX_NAME_LENGTH] for name in book["contributors"] if name.strip()))
+        for book in new_books.values()
+    ]
+
+    with transaction.atomic():
+        agents = get_or_create_by_names(Agent, {name for names in contributor_names for name in names})
+        Media.objects.bulk_create(media_list)
+        contributor_links = Media.contributors.through
+        contributor_links.objects.bulk_create(
+            [
+                contributor_links(media_id=media.pk, agent_id=agents[name].pk)
+                for media, names in zip(media_list, contributor_names, strict=True)
+                for name in names
+            ]
+        )
+        MediaExternalId.objects.bulk_create(
+            [
+                MediaExternalId(media_id=media.pk, provider="openlibrary", external_id=work_ids[isbn])
+                for media, isbn in zip(media_list, new_books, strict=True)
+            ]
+        )
+
+    result.created = media_list
+    logger.info("Imported %d books from %d ISBNs", len(media_list), len(isbns))
+    return result
@@ -0,0 +1,304 @@
+"""
+Streaming import of library exports: Goodreads, Letterboxd or a generic CSV.
+
+Rows are read one at a time and written a chunk at a time, so an export of
+tens of thousands of rows never sits in memory: each chunk resolves its
+contributor and tag names in one query per table (names already seen are
+cached for the rest of the file), creates its media with one `bulk_create`
+and links them with one insert per through table, in its own transaction.
+
+Rows whose external URI is already in the library (a Goodreads book page,
+a Letterboxd film page) are skipped, so importing a newer export again only
+adds what is new.
+"""
+
+import csv
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import batched
+from typing import TYPE_CHECKING
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from partial_date import PartialDate
+
+from .bulk_import import MAX_NAME_LENGTH, MAX_TITLE_LENGTH
+from .models import Agent, Media, Tag
+from .utils import get_or_create_by_names
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+GOODREADS = "goodreads"
+LETTERBOXD = "letterboxd"
+GENERIC = "csv"
+FORMATS = (GOODREADS, LETTERBOXD, GENERIC)
+
+# Rows written per transaction
+DEFAULT_CHUNK_SIZE = 1000
+
+# Goodreads' exclusive shelves; other shelves become tags
+GOODREADS_STATUSES = {"read": "COMPLETED", "currently-reading": "IN_PROGRESS", "to-read": "PLANNED"}
+# Separator of the contributors and tags columns of the generic format
+GENERIC_LIST_SEPARATOR = ";"
+
+_MEDIA_TYPES = {value for value, _label in Media._meta.get_field("media_type").choices}  # noqa: SLF001
+_STATUSES = {value for value, _label in Media._meta.get_field("status").choices}  # noqa: SLF001
+_HTML_BREAK = re.compile(r"<br\s*/?>", re.IGNORECASE)
+
+
+@dataclass
+class CsvImportResult:
+    """Running totals of an import."""
+
+    export_format: str = ""
+    rows: int = 0
+    created: int = 0
+    already_in_library: int = 0
+    # Numbers of the rows that could not be imported (no title, unknown media type…), the header being row 1
+    invalid: list[int] = field(default_factory=list)
+
+
+class CsvImportError(ValueError):
+    """Raised when an export cannot be read. Chunks written before the error are kept, and counted in `result`."""
+
+    def __init__(self, message: str, result: CsvImportResult):
+        super().__init__(message)
+        self.result = result
+
+
+@dataclass
+class _Row:
+    media: Media
+    contributors: list[str]
+    tags: list[str]
+
+
+def detect_format(fieldnames: Iterable[str] | None) -> str | None:
+    """Recognize an export from its header row. None if it is not a known format."""
+    columns = set(fieldnames or [])
+    if {"Exclusive Shelf", "Title", "Author"} <= columns:
+        return GOODREADS
+    if {"Letterboxd URI", "Name"} <= columns:
+        return LETTERBOXD
+    if {"title", "media_type"} <= columns:
+        return GENERIC
+    return None
+
+
+def _names(value: str, separator: str) -> list[str]:
+    names = (name.strip()[:MAX_NAME_LENGTH] for name in (value or "").split(separator))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _integer(value: str, low: int, high: int) -> int | None:
+    """Parse an integer within [low, high]; None if the value is empty, not a number or out of range."""
+    value = (value or "").strip()
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if low <= number <= high else None
+
+
+def _year(value: str) -> int | None:
+    return _integer(value, -4000, 2200)
+
+
+def _partial_date(value: str) -> PartialDate | None:
+    value = (value or "").strip().replace("/", "-")
+    if not value:
+        return None
+    try:
+        return PartialDate(value)
+    except ValidationError:
+        return None
+
+
+def _datetime(value: str, date_format: str) -> datetime | None:
+    try:
+        return timezone.make_aware(datetime.strptime((value or "").strip(), date_format))  # noqa: DTZ007
+    except ValueError:
+        return None
+
+
+def _parse_goodreads(row: dict) -> _Row | None:
+    title = (row.get("Title") or "").strip()
+    if not title:
+        return None
+    # Ratings are out of 5 stars, 0 when unrated
+    stars = _integer(row.get("My Rating"), 1, 5)
+    exclusive_shelf = (row.get("Exclusive Shelf") or "").strip()
+    media = Media(
+        title=title[:MAX_TITLE_LENGTH],
+        media_type="BOOK",
+        status=GOODREADS_STATUSES.get(exclusive_shelf, "PLANNED"),
+        pub_year=_year(row.get("Original Publication Year")) or _year(row.get("Year Published")),
+        score=stars * 2 if stars else None,
+        review=_HTML_BREAK.sub("\n", row.get("My Review") or "").strip(),
+        review_date=_partial_date(row.get("Date Read")),
+        external_uri=f"https://www.goodreads.com/book/show/{row['Book Id']}" if row.get("Book Id") else "",
+    )
+    if created_at := _datetime(row.get("Date Added"), "%Y/%m/%d"):
+        media.created_at = created_at
+    contributors = _names(row.get("Author"), ",") + _names(row.get("Additional Authors"), ",")
+    shelves = [shelf for shelf in _names(row.get("Bookshelves"), ",") if shelf not in GOODREADS_STATUSES]
+    return _Row(media, list(dict.fromkeys(contributors)), shelves)
+
+
+def _parse_letterboxd(row: dict) -> _Row | None:
+    title = (row.get("Name") or "").strip()
+    if not title:
+        return None
+    try:
+        # Half-star ratings out of 5
+        score = round(float(row.get("Rating") or 0) * 2) or None
+    except ValueError:
+        score = None
+    media = Media(
+        title=title[:MAX_TITLE_LENGTH],
+        media_type="FILM",
+        # Every export but the watchlist lists watched films
+        status="COMPLETED",
+        pub_year=_year(row.get("Year")),
+        score=score,
+        review=(row.get("Review") or "").strip(),
+        review_date=_partial_date(row.get("Watched Date") or ""),
+        external_uri=(row.get("Letterboxd URI") or "").strip(),
+    )
+    if created_at := _datetime(row.get("Date"), "%Y-%m-%d"):
+        media.created_at = created_at
+    return _Row(media, [], _names(row.get("Tags"), ","))
+
+
+def _parse_generic(row: dict) -> _Row | None:
+    title = (row.get("title") or "").strip()
+    media_type = (row.get("media_type") or "").strip().upper()
+    if not title or media_type not in _MEDIA_TYPES:
+        return None
+    status = (row.get("status") or "").strip().upper()
+    media = Media(
+        title=title[:MAX_TITLE_LENGTH],
+        media_type=media_type,
+        status=status if status in _STATUSES else "PLANNED",
+        pub_year=_year(row.get("pub_year")),
+        score=_integer(row.get("score"), 1, 10),
+        review=(row.get("review") or "").strip(),
+        review_date=_partial_date(row.get("review_date")),
+        external_uri=(row.get("external_uri") or "").strip()[:500],
+    )
+    return _Row(
+        media,
+        _names(row.get("contributors"), GENERIC_LIST_SEPARATOR),
+        _names(row.get("tags"), GENERIC_LIST_SEPARATOR),
+    )
+
+
+_PARSERS = {GOODREADS: _parse_goodreads, LETTERBOXD: _parse_letterboxd, GENERIC: _parse_generic}
+
+
+class NameCache:
+    """Primary keys of agents or tags by name, created as needed and remembered across chunks."""
+
+    def __init__(self, model: type[Agent | Tag]):
+        self.model = model
+        self.ids: dict[str, int] = {}
+
+    def resolve(self, names: Iterable[str]) -> dict[str, int]:
+        """Make sure every name exists, with one lookup (and one insert) for the names not seen yet."""
+        missing = set(names) - self.ids.keys()
+        self.ids.update((name, obj.pk) for name, obj in get_or_create_by_names(self.model, missing).items())
+        return self.ids
+
+
+def _write_chunk(rows: list[_Row], agents: NameCache, tags: NameCache, seen_uris: set[str]) -> tuple[int, int]:
+    """Create the media of a chunk. Returns (created, already in library)."""
+    uris = {row.media.external_uri for row in rows if row.media.external_uri} - seen_uris
+    seen_uris.update(Media.objects.filter(external_uri__in=uris).values_list("external_uri", flat=True))
+
+    new_rows = []
+    for row in rows:
+        uri = row.media.external_uri
+        if uri and uri in seen_uris:
+            continue
+        if uri:
+            # The same item listed twice in the file is imported once
+            seen_uris.add(uri)
+        new_rows.append(row)
+
+    agent_ids = agents.resolve(name for row in new_rows for name in row.contributors)
+    tag_ids = tags.resolve(name for row in new_rows for name in row.tags)
+    Media.objects.bulk_create([row.media for row in new_rows])
+    contributor_links = Media.contributors.through
+    contributor_links.objects.bulk_create(
+        [
+            contributor_links(media_id=row.media.pk, agent_id=agent_ids[name])
+            for row in new_rows
+            for name in row.contributors
+        ]
+    )
+    tag_links = Media.tags.through
+    tag_links.objects.bulk_create(
+        [tag_links(media_id=row.media.pk, tag_id=tag_ids[name]) for row in new_rows for name in row.tags]
+    )
+    return len(new_rows), len(rows) - len(new_rows)
+
+
+def import_csv(
+    lines: Iterable[str],
+    export_format: str | None = None,
+    *,
+    status: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Callable[[CsvImportResult], None] | None = None,
+) -> CsvImportResult:
+    """
+    Import an export read line by line (an open text file, or a wrapper around an upload).
+
+    The format is detected from the header unless given. `status` overrides
+    the status of every row, e.g. PLANNED for a Letterboxd watchlist, whose
+    columns are those of the watched films export. `on_progress` is called
+    with the running totals after each chunk is written.
+
+    Raises:
+        CsvImportError: If the format is unknown or the file cannot be decoded or parsed
+    """
+    reader = csv.DictReader(lines)
+    result = CsvImportResult()
+    try:
+        result.export_format = export_format or detect_format(reader.fieldnames)
+        if result.export_format not in _PARSERS:
+            msg = "Unrecognized export format"
+            raise CsvImportError(msg, result)
+        parse = _PARSERS[result.export_format]
+
+        agents = NameCache(Agent)
+        tags = NameCache(Tag)
+        seen_uris = set()
+        for chunk in batched(reader, chunk_size, strict=False):
+            rows = []
+            for row_number, row in enumerate(chunk, start=result.rows + 2):
+                if parsed := parse(row):
+                    if status:
+                        parsed.media.status = status
+                    rows.append(parsed)
+                else:
+                    result.invalid.append(row_number)
+            with transaction.atomic():
+                created, skipped = _write_chunk(rows, agents, tags, seen_uris)
+            result.rows += len(chunk)
+            result.created += created
+            result.already_in_library += skipped
+            if on_progress:
+                on_progress(result)
+    except (UnicodeDecodeError, csv.Error) as error:
+        msg = f"Could not read the file after row {result.rows}: {error}"
+        raise CsvImportError(msg, result) from error
+
+    logger.info("Imported %d of %d %s rows", result.created, result.rows, result.export_format)
+    return result
@@ -0,0 +1,343 @@
+"""
+Enrichment of media missing metadata, from the provider of their type.
+
+Media added by hand often have no cover, release year, tags or contributors.
+Each one is looked up at the provider matching its type: by its stored
+provider identifier when it has one, else by searching its title. Only the
+missing fields are filled; nothing already set is replaced.
+
+Lookups run concurrently on the provider executor, paced per provider, and
+their results are written a batch at a time. The details of a batch's games
+with a stored IGDB identifier are fetched together, in one multiquery call.
+After each batch the last primary key done is checkpointed in the shared
+state, so an interrupted run picks up where it stopped. Media whose lookup
+failed are checkpointed too, and looked up once more at the end of the run.
+"""
+
+import logging
+import re
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import TYPE_CHECKING
+
+import requests
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .bulk_import import MAX_NAME_LENGTH
+from .models import Agent, Media, MediaExternalId, Tag
+from .services import registry, shared_state
+from .services.cover_prefetch import prepare_cover
+from .services.executor import provider_executor
+from .services.ratelimit import RateLimiter
+from .utils import get_or_create_by_names
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "enrich-media:checkpoint"
+DEFAULT_BATCH_SIZE = 25
+# Search results compared with a media's title
+SEARCH_LIMIT = 5
+TMDB_LANGUAGE = "en-US"
+# How long a lookup queues for its provider's next slot before giving up (seconds)
+RATE_LIMIT_MAX_WAIT = 60.0
+
+# Pace of the lookups sent to each provider. A background job stays well under
+# the providers' limits (IGDB allows 4 requests/s), leaving room for the site's
+# own searches. MusicBrainz calls are already paced by its client.
+_rate_limiters = {
+    "tmdb": RateLimiter("enrich-tmdb", rate=20.0, burst=5),
+    "igdb": RateLimiter("enrich-igdb", rate=2.0, burst=2),
+    "openlibrary": RateLimiter("enrich-openlibrary", rate=1.0, burst=2),
+    "googlebooks": RateLimiter("enrich-googlebooks", rate=1.0, burst=2),
+}
+
+_NON_WORD = re.compile(r"\W+")
+
+
+@dataclass
+class EnrichmentStats:
+    """Counts of a run, kept across resumes."""
+
+    checked: int = 0
+    enriched: int = 0
+    not_found: int = 0
+    failed: int = 0
+
+
+@dataclass
+class Enrichment:
+    """Provider metadata found for a media."""
+
+    media: Media
+    provider: str
+    external_id: str
+    details: dict
+    cover: ContentFile | None = None
+    # Found by searching the title, not from a stored identifier
+    new_external_id: bool = False
+
+
+def media_to_enrich(after_pk: int = 0):
+    """Media missing a cover, release year, tags or contributors that a provider can fill, in pk order."""
+    has_tags = Exists(Media.tags.through.objects.filter(media_id=OuterRef("pk")))
+    has_contributors = Exists(Media.contributors.through.objects.filter(media_id=OuterRef("pk")))
+    media_types = {media_type for plugin in registry.PROVIDERS.values() for media_type in plugin.media_types}
+    return (
+        Media.objects.filter(pk__gt=after_pk, media_type__in=media_types)
+        .annotate(has_tags=has_tags, has_contributors=has_contributors)
+        .filter(
+            Q(cover="")
+            | Q(cover__isnull=True)
+            | Q(pub_year__isnull=True)
+            | Q(has_tags=False)
+            | Q(has_contributors=False)
+        )
+        .prefetch_related("external_ids")
+        .order_by("pk")
+    )
+
+
+def _same_title(title: str, other: str) -> bool:
+    return _NON_WORD.sub(" ", title).strip().casefold() == _NON_WORD.sub(" ", other).strip().casefold()
+
+
+def _call(provider: str, fn: Callable, *args, **kwargs):
+    """Call a client method once the provider's pace allows it."""
+    if limiter := _rate_limiters.get(provider):
+        limiter.acquire(max_wait=RATE_LIMIT_MAX_WAIT)
+    return fn(*args, **kwargs)
+
+
+def _search(plugin: registry.ProviderPlugin, client, media: Media):
+    """Return the search result matching a media's title (and year, when both have one), or None."""
+    if plugin.name == "tmdb":
+        wanted_type = "movie" if media.media_type == "FILM" else "tv"
+        results = _call("tmdb", client.search_multi, media.title, language=TMDB_LANGUAGE)
+        results = [result for result in results if result.media_type == wanted_type]
+    else:
+        results = _call(plugin.name, getattr(client, plugin.search), media.title, limit=SEARCH_LIMIT)
+
+    for result in results:
+        title = getattr(result, "title", None) or getattr(result, "name", "")
+        years_agree = media.pub_year is None or result.year is None or abs(result.year - media.pub_year) <= 1
+        if _same_title(title, media.title) and years_agree:
+            return result
+    return None
+
+
+def _fetch_details(
+    plugin: registry.ProviderPlugin, client, external_id: str, year: int | None, igdb_details: dict[str, dict]
+) -> dict:
+    if plugin.name == "igdb" and external_id in igdb_details:
+        return igdb_details[external_id]
+    if plugin.name == "tmdb":
+        media_type, _, tmdb_id = external_id.partition("/")
+        return _call("tmdb", client.get_full_details, int(tmdb_id), media_type, language=TMDB_LANGUAGE)
+    if plugin.name == "igdb":
+        return _call("igdb", client.get_game_details, int(external_id))
+    if plugin.name == "openlibrary":
+        return _call("openlibrary", client.get_work_details, external_id, first_publish_year=year)
+    return _call(plugin.name, getattr(client, plugin.details), external_id)
+
+
+def _prefetch_igdb_details(batch: list[Media]) -> dict[str, dict]:
+    """
+    Fetch the details of a batch's games with a stored IGDB identifier, in one call.
+
+    Returns a mapping of IGDB identifier -> details, empty for unknown games.
+    Returns an empty mapping if IGDB is not configured or the call fails, so
+    that each game is looked up on its own.
+    """
+    game_ids = [
+        external_id.external_id
+        for media in batch
+        for external_id in media.external_ids.all()
+        if external_id.provider == "igdb" and external_id.external_id.isdigit()
+    ]
+    client = registry.get_client("igdb") if game_ids else None
+    if client is None:
+        return {}
+    try:
+        details = _call("igdb", client.get_games_details, [int(game_id) for game_id in game_ids])
+    except requests.RequestException as error:
+        logger.warning("Enrichment batch lookup failed on IGDB: %s", error)
+        return {}
+    return {game_id: details.get(int(game_id), {}) for game_id in game_ids}
+
+
+def _lookup(media: Media, igdb_details: dict[str, dict]) -> Enrichment | None:
+    """
+    Find a media at its provider and download the cover it lacks.
+
+    Runs on the executor's threads: uses only the media's prefetched data and
+    the batch's prefetched IGDB details, no queries.
+    Raises requests.RequestException when a provider call fails.
+    """
+    plugins = [plugin for plugin in registry.PROVIDERS.values() if media.media_type in plugin.media_types]
+    known_ids = {external_id.provider: external_id.external_id for external_id in media.external_ids.all()}
+
+    # A stored identifier wins; otherwise search the first provider of the type
+    plugin = next((plugin for plugin in plugins if plugin.name in known_ids), plugins[0])
+    client = registry.get_client(plugin.name)
+    if client is None:
+        return None
+
+    year = media.pub_year
+    if plugin.name in known_ids:
+        external_id = known_ids[plugin.name]
+    else:
+        result = _search(plugin, client, media)
+        if result is None:
+            return None
+        external_id = result.external_id
+        year = year or result.year
+
+    details = _fetch_details(plugin, client, external_id, year, igdb_details)
+    if not details:
+        return None
+    enrichment = Enrichment(media, plugin.name, external_id, details, new_external_id=plugin.name not in known_ids)
+    if not media.cover and details.get("cover_url"):
+        enrichment.cover = prepare_cover(details["cover_url"], client.download_cover)
+    return enrichment
+
+
+def _safe_lookup(media: Media, igdb_details: dict[str, dict]) -> Enrichment | Exception | None:
+    """Look a media up, returning the provider error instead of raising it so one failure spares the batch."""
+    try:
+        return _lookup(media, igdb_details)
+    except requests.RequestException as error:
+        logger.warning("Enrichment lookup failed for media %s: %s", media.pk, error)
+        return error
+
+
+def _clean_names(names: list[str]) -> list[str]:
+    return list(dict.fromkeys(name.strip()[:MAX_NAME_LENGTH] for name in names if name and name.strip()))
+
+
+def apply_enrichments(enrichments: list[Enrichment]) -> int:
+    """
+    Fill the missing fields of a batch of media: one bulk update and one insert per relation.
+
+    Returns the number of media changed.
+    """
+    now = timezone.now()
+    updated_media = []
+    contributor_names = {}
+    tag_names = {}
+    for enrichment in enrichments:
+        media = enrichment.media
+        details = enrichment.details
+        changed = False
+        if media.pub_year is None and details.get("year"):
+            media.pub_year = details["year"]
+            changed = True
+        if enrichment.cover is not None:
+            # Covers are already compressed; store the file before opening the transaction
+            media.cover.save(f"{media.title[:50].replace('/', '_')}.jpg", enrichment.cover, save=False)
+            changed = True
+        if not media.has_contributors and (names := _clean_names(details.get("contributors", []))):
+            contributor_names[media.pk] = names
+            changed = True
+        if not media.has_tags and (names := _clean_names(details.get("genres", []))):
+            tag_names[media.pk] = names
+            changed = True
+        if changed:
+            # bulk_update() bypasses save() and its auto_now
+            media.updated_at = now
+            updated_media.append(media)
+
+    with transaction.atomic():
+        Media.objects.bulk_update(updated_media, ["pub_year", "cover", "updated_at"])
+        agents = get_or_create_by_names(Agent, {name for names in contributor_names.values() for name in names})
+        contributor_links = Media.contributors.through
+        contributor_links.objects.bulk_create(
+            [
+                contributor_links(media_id=media_id, agent_id=agents[name].pk)
+                for media_id, names in contributor_names.items()
+                for name in names
+            ],
+            ignore_conflicts=True,
+        )
+        tags = get_or_create_by_names(Tag, {name for names in tag_names.values() for name in names})
+        tag_links = Media.tags.through
+        tag_links.objects.bulk_create(
+            [
+                tag_links(media_id=media_id, tag_id=tags[name].pk)
+                for media_id, names in tag_names.items()
+                for name in names
+            ],
+            ignore_conflicts=True,
+        )
+        # An item already linked to another media (a duplicate) keeps its first link
+        MediaExternalId.objects.bulk_create(
+            [
+                MediaExternalId(
+                    media=enrichment.media, provider=enrichment.provider, external_id=enrichment.external_id
+                )
+                for enrichment in enrichments
+                if enrichment.new_external_id
+            ],
+            ignore_conflicts=True,
+        )
+    return len(updated_media)
+
+
+def _enrich_batch(batch: list[Media], stats: EnrichmentStats) -> list[int]:
+    """Look a batch up and save what was found. Returns the pks of the media whose lookup failed."""
+    lookup = partial(_safe_lookup, igdb_details=_prefetch_igdb_details(batch))
+    results = provider_executor.run_all("media-enrichment", lookup, batch)
+    stats.enriched += apply_enrichments([result for result in results if isinstance(result, Enrichment)])
+    stats.not_found += sum(result is None for result in results)
+    return [media.pk for media, result in zip(batch, results, strict=True) if isinstance(result, Exception)]
+
+
+def _save_checkpoint(last_pk: int, failed_pks: list[int], stats: EnrichmentStats) -> None:
+    checkpoint = {"last_pk": last_pk, "failed_pks": failed_pks, "stats": asdict(stats)}
+    with shared_state.transaction() as connection:
+        shared_state.set_value(CHECKPOINT_KEY, checkpoint, connection)
+
+
+def enrich_library(
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    *,
+    restart: bool = False,
+    on_batch: Callable[[EnrichmentStats], None] | None = None,
+) -> EnrichmentStats:
+    """
+    Enrich every media missing metadata, resuming from the last checkpoint unless `restart`.
+
+    Media whose lookup fails are passed over, then looked up once more after the
+    others; they count as failed only if that fails too. `on_batch` is called
+    with the running totals after each batch is saved.
+    """
+    checkpoint = None if restart else shared_state.get_value(CHECKPOINT_KEY)
+    last_pk = checkpoint["last_pk"] if checkpoint else 0
+    failed_pks = checkpoint.get("failed_pks", []) if checkpoint else []
+    stats = EnrichmentStats(**checkpoint["stats"]) if checkpoint else EnrichmentStats()
+
+    while batch := list(media_to_enrich(last_pk)[:batch_size]):
+        stats.checked += len(batch)
+        failed_pks += _enrich_batch(batch, stats)
+        last_pk = batch[-1].pk
+        _save_checkpoint(last_pk, failed_pks, stats)
+        if on_batch:
+            on_batch(stats)
+
+    while failed_pks:
+        retry, failed_pks = failed_pks[:batch_size], failed_pks[batch_size:]
+        # Media completed in the meantime drop out of the query
+        stats.failed += len(_enrich_batch(list(media_to_enrich().filter(pk__in=retry)), stats))
+        _save_checkpoint(last_pk, failed_pks, stats)
+        if on_batch:
+            on_batch(stats)
+
+    with shared_state.transaction() as connection:
+        shared_state.set_value(CHECKPOINT_KEY, None, connection)
+    return stats
@@ -0,0 +1,47 @@
+"""Fill in missing media metadata from the providers."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.enrichment import DEFAULT_BATCH_SIZE, enrich_library
+
+
+class Command(BaseCommand):
+    """Look up media missing a cover, release year, tags or contributors, and fill them in."""
+
+    help = (
+        "Fill in the cover, release year, tags and contributors of media that lack them, from the provider "
+        "of their type. Only missing fields are set. An interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Media looked up concurrently and saved together (default: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Start over from the first media instead of resuming the last run",
+        )
+
+    def handle(self, **options):
+        """Enrich the library batch by batch, reporting progress."""
+        if options["batch_size"] < 1:
+            msg = "--batch-size must be at least 1"
+            raise CommandError(msg)
+
+        stats = enrich_library(
+            options["batch_size"],
+            restart=options["restart"],
+            on_batch=lambda stats: self.stdout.write(f"  {stats.checked} checked, {stats.enriched} enriched"),
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats.enriched} of {stats.checked} media enriched "
+                f"({stats.not_found} not found, {stats.failed} failed)"
+            )
+        )
@@ -4,13 +4,27 @@ from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 
-from core.utils import create_backup
+from core.utils import (
+    BACKUP_SUFFIXES,
+    FULL_BACKUP,
+    GZIP,
+    JSON_DATABASE,
+    SQLITE_SNAPSHOT,
+    create_backup,
+    default_backup_dir,
+    find_base_backup,
+    list_backups,
+    prune_tombstones,
+)
 
 
 class Command(BaseCommand):
     """Export a complete backup of the Datakult application."""
 
-    help = "Export a complete backup (database + media files) as a .tar.gz archive"
+    help = (
+        "Export a complete backup (database + media files) as a .tar.gz or .tar.zst archive, or an incremental "
+        "backup of what changed since the previous one"
+    )
 
     def add_arguments(self, parser):
         """Add command arguments."""
@@ -24,23 +38,68 @@ class Command(BaseCommand):
             type=str,
             help="Custom filename for the backup (default: datakult_backup_YYYYMMDD_HHMMSS.tar.gz)",
         )
+        parser.add_argument(
+            "--compression",
+            choices=list(BACKUP_SUFFIXES),
+            default=GZIP,
+            help=(
+                "Compression of the archive: gzip, compressed on all cores, or zstd with worker threads, "
+                "faster still but only restorable by a Python built with zstd support (default: gzip)"
+            ),
+        )
+        kind = parser.add_mutually_exclusive_group()
+        kind.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only back up what changed since the most recent backup in the output directory",
+        )
+        kind.add_argument(
+            "--differential",
+            action="store_true",
+            help="Only back up what changed since the most recent full backup in the output directory",
+        )
+        kind.add_argument(
+            "--snapshot",
+            action="store_true",
+            help=(
+                "Back up the database as a snapshot of the SQLite file instead of a JSON dump: much faster to "
+                "create and restore, but it can only be restored into SQLite"
+            ),
+        )
         parser.add_argument(
             "--keep",
             type=int,
             default=None,
-            help="Number (>=1) of backups to keep (optional). If specified, old backups will be automatically deleted.",
+            help=(
+                "Number (>=1) of full backups to keep (optional). If specified, old backups will be automatically "
+                "deleted, along with the incremental backups built on them."
+            ),
         )
 
     def handle(self, **options):
         """Execute the backup export."""
-        output_dir = Path(options["output"]) if options["output"] else None
+        output_dir = Path(options["output"]) if options["output"] else default_backup_dir()
         filename = options["filename"]
         keep_count = options["keep"]
 
-        self.stdout.write("Creating backup…")
+        base = None
+        if options["incremental"] or options["differential"]:
+            base = find_base_backup(output_dir, full_only=options["differential"]) if output_dir.exists() else None
+            if base is None:
+                self.stdout.write(self.style.WARNING("No previous backup to build on: creating a full backup"))
+            else:
+                self.stdout.write(f"Creating incremental backup on top of {base.path.name}…")
+        if base is None:
+            self.stdout.write("Creating database snapshot backup…" if options["snapshot"] else "Creating backup…")
 
         try:
-            backup_path = create_backup(output_dir=output_dir, filename=filename)
+            backup_path = create_backup(
+                output_dir=output_dir,
+                filename=filename,
+                base=base,
+                database_format=SQLITE_SNAPSHOT if options["snapshot"] else JSON_DATABASE,
+                codec=options["compression"],
+            )
             file_size_mb = backup_path.stat().st_size / (1024 * 1024)
 
             self.stdout.write(
@@ -54,6 +113,7 @@ class Command(BaseCommand):
                     raise CommandError(msg)  # noqa: TRY301
                 self._rotate_backups(backup_path.parent, keep_count)
 
+            prune_tombstones(backup_path.parent)
             return str(backup_path)
 
         except Exception as e:
@@ -61,19 +121,16 @@ class Command(BaseCommand):
             raise
 
     def _rotate_backups(self, backup_dir: Path, keep_count: int):
-        """Delete old backups, keeping only the N most recent ones."""
-        # Find all backup files in the directory
-        # Sort by modification time for robustness
-        backup_files = sorted(
-            backup_dir.glob("datakult_backup_*.tar.gz"),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True,  # Most recent first
-        )
+        """Delete old backups, keeping only the N most recent full ones and the incremental ones built on them."""
+        # Sorted by modification time for robustness, most recent first
+        backups = list_backups(backup_dir)
+        full_backups = [backup for backup in backups if backup.kind == FULL_BACKUP]
 
         # Delete old backups if we have more than keep_count
-        if len(backup_files) > keep_count:
-            files_to_delete = backup_files[keep_count:]
-            self.stdout.write(f"Found {len(backup_files)} backups, keeping {keep_count} most recent…")
+        if len(full_backups) > keep_count:
+            oldest_kept = full_backups[keep_count - 1]
+            files_to_delete = [backup.path for backup in backups[backups.index(oldest_kept) + 1 :]]
+            self.stdout.write(f"Found {len(full_backups)} full backups, keeping {keep_count} most recent…")
 
             for old_backup in files_to_delete:
                 self.stdout.write(f"Deleting old backup: {old_backup.name}")
@@ -81,4 +138,4 @@ class Command(BaseCommand):
 
             self.stdout.write(self.style.SUCCESS(f"✓ Deleted {len(files_to_delete)} old backup(s)"))
         else:
-            self.stdout.write(f"Found {len(backup_files)} backup(s), no rotation needed (keeping {keep_count})")
+            self.stdout.write(f"Found {len(full_backups)} full backup(s), no rotation needed (keeping {keep_count})")
@@ -1,20 +1,41 @@
 """Import backup command."""
 
 import json
+import os
 import shutil
+import sqlite3
 import tarfile
+from collections import Counter, defaultdict
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
+from django.apps import apps
 from django.conf import settings
+from django.core import serializers
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.utils import (
+    BACKUP_SUFFIXES,
+    DATABASE_MEMBERS,
+    FULL_BACKUP,
+    INCREMENTAL_BACKUP,
+    JSON_DATABASE,
+    SQLITE_SNAPSHOT,
+    BackupInfo,
+    file_sha256,
+    read_backup_info,
+)
 
 
 class Command(BaseCommand):
     """Import a complete backup of the Datakult application."""
 
-    help = "Import a complete backup (database + media files) from a .tar.gz archive"
+    help = (
+        "Import a complete backup (database + media files) from a .tar.gz or .tar.zst archive, "
+        "or a full backup followed by the incremental backups built on it"
+    )
 
     def _validate_backup_file(self, backup_file: Path) -> None:
         """Validate the backup file exists and has correct format."""
@@ -22,63 +43,142 @@ class Command(BaseCommand):
             msg = f"Backup file not found: {backup_file}"
             raise CommandError(msg)
 
-        if not str(backup_file).endswith(".tar.gz"):
-            msg = f"Invalid backup file format. Expected .tar.gz, got: {backup_file}"
+        if not str(backup_file).endswith(tuple(BACKUP_SUFFIXES.values())):
+            msg = f"Invalid backup file format. Expected .tar.gz or .tar.zst, got: {backup_file}"
             raise CommandError(msg)
 
-    def _extract_backup(self, backup_file: Path, temp_path: Path) -> None:
-        """Extract the backup archive with security checks."""
-        self.stdout.write("Extracting backup archive…")
-        with tarfile.open(backup_file, "r:gz") as tar:
-            # Security check: ensure all paths are safe
-            for member in tar.getmembers():
+    def _check_members(self, backup_file: Path) -> None:
+        """Security check, before anything is changed: refuse absolute paths and paths leaving the destination."""
+        with tarfile.open(backup_file, "r:*") as tar:
+            for member in tar:
                 member_path = Path(member.name)
                 if member_path.is_absolute() or ".." in member_path.parts:
                     msg = f"Unsafe path in archive: {member.name}"
                     raise CommandError(msg)
-            # Use filter for safe extraction (Python 3.12+) or manual extraction
-            tar.extractall(temp_path, filter="data")
 
-    def _import_database(self, temp_path: Path, *, flush: bool) -> None:
-        """Import the database from the backup."""
+    def _restore_snapshot(self, tar: tarfile.TarFile, member: tarfile.TarInfo) -> None:
+        """Replace the whole database with a snapshot of an SQLite database file."""
+        if connection.vendor != "sqlite":
+            msg = f"A database snapshot can only be restored into SQLite, not {connection.vendor}"
+            raise CommandError(msg)
+        if connection.in_atomic_block:
+            msg = "A database snapshot cannot be restored inside a transaction"
+            raise CommandError(msg)
+
+        self.stdout.write("Restoring database snapshot (replaces all existing data)…")
+        connection.ensure_connection()
+        # SQLite only opens files: the snapshot is the one member written to a temporary directory
+        with TemporaryDirectory() as temp_dir:
+            snapshot_file = Path(temp_dir) / DATABASE_MEMBERS[SQLITE_SNAPSHOT]
+            with tar.extractfile(member) as source, snapshot_file.open("wb") as f:
+                shutil.copyfileobj(source, f)
+            snapshot = sqlite3.connect(snapshot_file)
+            try:
+                # Copied page by page into the open database rather than replacing its file,
+                # so that other connections see the restored data
+                snapshot.backup(connection.connection)
+            finally:
+                snapshot.close()
+        # A snapshot made by an older version has an older schema
+        call_command("migrate", interactive=False, verbosity=0)
+
+    def _load_database(self, tar: tarfile.TarFile, member: tarfile.TarInfo, *, flush: bool) -> None:
+        """Load the JSON dump of the database from the archive, as loaddata does, without writing it to disk.
+
+        The JSON deserializer reads the whole dump into memory before parsing it.
+        """
         if flush:
             self.stdout.write("Flushing existing database…")
             call_command("flush", interactive=False, verbosity=0)
 
-        database_file = temp_path / "database.json"
-        if not database_file.exists():
-            msg = "database.json not found in backup archive"
+        self.stdout.write("Importing database…")
+        count = 0
+        models = set()
+        with transaction.atomic():
+            with connection.constraint_checks_disabled():
+                deferred = []
+                with tar.extractfile(member) as dump:
+                    for obj in serializers.deserialize("json", dump, handle_forward_references=True):
+                        obj.save()
+                        if obj.deferred_fields:
+                            deferred.append(obj)
+                        models.add(type(obj.object))
+                        count += 1
+                for obj in deferred:
+                    obj.save_deferred_fields()
+            # Checked once everything is loaded, as rows may refer to rows loaded after them
+            connection.check_constraints(table_names=[model._meta.db_table for model in models])  # noqa: SLF001
+        self.stdout.write(f"Installed {count} object(s)")
+
+    def _apply_deletions(self, deletions: list) -> None:
+        """Delete the rows an incremental backup recorded as deleted since its base."""
+        pks_by_model = defaultdict(list)
+        for model_label, object_pk in deletions:
+            pks_by_model[model_label].append(object_pk)
+        for model_label, pks in pks_by_model.items():
+            try:
+                model = apps.get_model(model_label)
+            except LookupError:
+                self.stdout.write(self.style.WARNING(f"Unknown model in deletions: {model_label}"))
+                continue
+            model.objects.filter(pk__in=pks).delete()
+        self.stdout.write(f"Replayed {len(deletions)} deletions")
+
+    def _remove_deleted_media(self, previous_files: dict, files: dict) -> None:
+        """Remove the media files present in the previous backup of a chain and gone from this one."""
+        media_root = Path(settings.MEDIA_ROOT)
+        removed = previous_files.keys() - files.keys()
+        for name in removed:
+            (media_root / name).unlink(missing_ok=True)
+        if removed:
+            self.stdout.write(f"Removed {len(removed)} media files deleted since the previous backup")
+
+    def _is_up_to_date(self, path: Path, size: int, entry: dict | None) -> bool:
+        """Whether a file on disk already has the size and hash the manifest records for the archived one."""
+        if entry is None or entry.get("size") != size:
+            return False
+        try:
+            return path.stat().st_size == size and file_sha256(path) == entry["sha256"]
+        except OSError:
+            return False
+
+    def _import_media_file(self, tar: tarfile.TarFile, member: tarfile.TarInfo, files: dict, stats: Counter) -> None:
+        """Write a media file from the archive to its place in MEDIA_ROOT, unless it is already there."""
+        media_root = Path(settings.MEDIA_ROOT)
+        name = member.name.removeprefix("media").lstrip("/")
+        dest_path = media_root / name
+        # Through a symlinked directory, a safe name can still lead elsewhere
+        if not dest_path.resolve().is_relative_to(media_root.resolve()):
+            msg = f"Unsafe path in archive: {member.name}"
             raise CommandError(msg)
 
-        self.stdout.write("Importing database…")
-        call_command("loaddata", str(database_file), verbosity=1)
-
-    def _import_media(self, temp_path: Path) -> None:
-        """Import media files from the backup."""
-        media_backup = temp_path / "media"
-        if media_backup.exists():
-            self.stdout.write("Importing media files…")
-            media_root = Path(settings.MEDIA_ROOT)
-            media_root.mkdir(parents=True, exist_ok=True)
-
-            # Copy all files from backup to media root
-            for item in media_backup.rglob("*"):
-                if item.is_file():
-                    relative_path = item.relative_to(media_backup)
-                    dest_path = media_root / relative_path
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(item, dest_path)
-
-            self.stdout.write(f"Media files copied to {media_root}")
-        else:
-            self.stdout.write(self.style.WARNING("No media files found in backup"))
+        if member.isdir():
+            dest_path.mkdir(parents=True, exist_ok=True)
+            stats["directories"] += 1
+            return
+        if not member.isfile():
+            self.stdout.write(self.style.WARNING(f"Skipping {member.name}: not a regular file"))
+            return
+        if self._is_up_to_date(dest_path, member.size, files.get(name)):
+            stats["unchanged"] += 1
+            return
+
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        with tar.extractfile(member) as source, dest_path.open("wb") as f:
+            shutil.copyfileobj(source, f)
+        os.utime(dest_path, (member.mtime, member.mtime))
+        stats["written"] += 1
 
     def add_arguments(self, parser):
         """Add command arguments."""
         parser.add_argument(
-            "backup_file",
+            "backup_files",
+            nargs="+",
             type=str,
-            help="Path to the backup file (.tar.gz) to import",
+            help=(
+                "Path to the backup file (.tar.gz or .tar.zst) to import. To restore incremental backups, give the "
+                "chain in order: the full backup, then each incremental backup"
+            ),
         )
         parser.add_argument(
             "--flush",
@@ -91,14 +191,73 @@ class Command(BaseCommand):
             help="Skip importing media files (only import database)",
         )
 
+    def _check_chain(self, backup_file: Path, metadata: dict, previous: dict | None) -> None:
+        """Make sure a full backup comes first and every incremental one builds on the backup before it."""
+        kind = metadata.get("kind", FULL_BACKUP)
+        if previous is None:
+            if kind != FULL_BACKUP:
+                msg = f"{backup_file} is an incremental backup: start with the full backup it builds on"
+                raise CommandError(msg)
+        elif kind != INCREMENTAL_BACKUP or metadata.get("base_id") != previous.get("backup_id"):
+            msg = f"{backup_file} does not build on the backup before it in the chain"
+            raise CommandError(msg)
+
+    def _import_archive(
+        self, backup_file: Path, previous: BackupInfo | None, *, flush: bool, no_media: bool
+    ) -> BackupInfo:
+        """Import an archive in one pass, each member going straight to its destination as it is decompressed.
+
+        Archives hold, in this order: metadata, manifest, deletions (incremental
+        backups), database, media files. Nothing is extracted to a temporary
+        directory first, and media files already up to date are not written.
+        """
+        # Metadata and manifest come first: reading them stops there
+        info = read_backup_info(backup_file)
+        self._check_chain(backup_file, info.metadata, previous.metadata if previous else None)
+        self.stdout.write(f"Backup created at: {info.metadata.get('created_at', 'unknown')}")
+
+        database_imported = False
+        stats = Counter()
+        # The compression (gzip or zstd) is detected from the content. Members are taken in order,
+        # so the archive is only read forward, as a stream, and decompressed once
+        with tarfile.open(backup_file, "r:*") as tar:
+            for member in tar:
+                if member.name == "deletions.json":
+                    # Before the database, so that recreated names do not clash
+                    self._apply_deletions(json.load(tar.extractfile(member)))
+                elif member.name == DATABASE_MEMBERS[SQLITE_SNAPSHOT]:
+                    self._restore_snapshot(tar, member)
+                    database_imported = True
+                elif member.name == DATABASE_MEMBERS[JSON_DATABASE]:
+                    self._load_database(tar, member, flush=flush)
+                    database_imported = True
+                elif Path(member.name).parts[0] == "media" and database_imported and not no_media:
+                    if not stats:
+                        self.stdout.write("Importing media files…")
+                    self._import_media_file(tar, member, info.files, stats)
+
+        if not database_imported:
+            msg = "database.json not found in backup archive"
+            raise CommandError(msg)
+        if no_media:
+            self.stdout.write("Skipping media files import (--no-media)")
+        elif stats:
+            self.stdout.write(
+                f"Media files restored to {settings.MEDIA_ROOT}: {stats['written']} written, "
+                f"{stats['unchanged']} already up to date"
+            )
+        else:
+            self.stdout.write(self.style.WARNING("No media files found in backup"))
+        return info
+
     def handle(self, **options):
         """Execute the backup import."""
-        backup_file = Path(options["backup_file"])
-
-        # Validate backup file
-        self._validate_backup_file(backup_file)
+        backup_files = [Path(backup_file) for backup_file in options["backup_files"]]
 
-        self.stdout.write(f"Importing backup from: {backup_file}")
+        # Validate backup files, all of them before the database is touched
+        for backup_file in backup_files:
+            self._validate_backup_file(backup_file)
+            self._check_members(backup_file)
 
         # Warning about data replacement
         if options["flush"]:
@@ -110,32 +269,18 @@ class Command(BaseCommand):
                 self.style.WARNING("⚠ WARNING: This will merge/update data. Use --flush to completely replace.")
             )
 
-        # Create a temporary directory for extraction
-        with TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
+        previous = None
+        for index, backup_file in enumerate(backup_files):
+            self.stdout.write(f"Importing backup from: {backup_file}")
             try:
-                # Step 1: Extract the archive
-                self._extract_backup(backup_file, temp_path)
-
-                # Step 2: Read and display metadata
-                metadata_file = temp_path / "metadata.json"
-                if metadata_file.exists():
-                    with metadata_file.open() as f:
-                        metadata = json.load(f)
-                    self.stdout.write(f"Backup created at: {metadata.get('created_at', 'unknown')}")
-
-                # Step 3: Import database
-                self._import_database(temp_path, flush=options["flush"])
-
-                # Step 4: Import media files
-                if not options["no_media"]:
-                    self._import_media(temp_path)
-                else:
-                    self.stdout.write("Skipping media files import (--no-media)")
-
-                self.stdout.write(self.style.SUCCESS("✓ Backup imported successfully!"))
-
+                backup = self._import_archive(
+                    backup_file, previous, flush=options["flush"] and index == 0, no_media=options["no_media"]
+                )
+                if backup.kind == INCREMENTAL_BACKUP and not options["no_media"]:
+                    self._remove_deleted_media(previous.files, backup.files)
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"✗ Import failed: {e!s}"))
                 raise
+            previous = backup
+
+        self.stdout.write(self.style.SUCCESS("✓ Backup imported successfully!"))
@@ -0,0 +1,70 @@
+"""Import a library export (Goodreads, Letterboxd or generic CSV)."""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.csv_import import DEFAULT_CHUNK_SIZE, FORMATS, CsvImportError, import_csv
+from core.models import Media
+
+MAX_INVALID_ROWS_SHOWN = 50
+
+
+class Command(BaseCommand):
+    """Stream a Goodreads, Letterboxd or generic CSV export into the library."""
+
+    help = (
+        "Import a Goodreads (goodreads_library_export.csv), Letterboxd (diary.csv, watched.csv…) or generic CSV "
+        "export. Generic files have the columns title, media_type, contributors and tags (separated by ';'), "
+        "status, pub_year, score, review, review_date and external_uri. Rows already imported are skipped."
+    )
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument("file", type=Path, help="CSV export to import")
+        parser.add_argument("--format", choices=FORMATS, help="Export format (default: detected from the header)")
+        parser.add_argument(
+            "--status",
+            choices=[value for value, _label in Media._meta.get_field("status").choices],  # noqa: SLF001
+            help="Status of every imported item, e.g. PLANNED for a Letterboxd watchlist",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Rows written per transaction (default: {DEFAULT_CHUNK_SIZE})",
+        )
+
+    def handle(self, **options):
+        """Import the file chunk by chunk, reporting progress."""
+        path = options["file"]
+        if not path.is_file():
+            msg = f"File not found: {path}"
+            raise CommandError(msg)
+        if options["chunk_size"] < 1:
+            msg = "--chunk-size must be at least 1"
+            raise CommandError(msg)
+
+        with path.open(encoding="utf-8-sig", newline="") as lines:
+            try:
+                result = import_csv(
+                    lines,
+                    options["format"],
+                    status=options["status"],
+                    chunk_size=options["chunk_size"],
+                    on_progress=lambda result: self.stdout.write(f"  {result.rows} rows read, {result.created} added"),
+                )
+            except CsvImportError as e:
+                msg = f"{e} ({e.result.created} items added before the error)"
+                raise CommandError(msg) from e
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {result.created} of {result.rows} {result.export_format} rows imported "
+                f"({result.already_in_library} already in the library, {len(result.invalid)} invalid)"
+            )
+        )
+        if result.invalid:
+            rows = ", ".join(map(str, result.invalid[:MAX_INVALID_ROWS_SHOWN]))
+            more = "…" if len(result.invalid) > MAX_INVALID_ROWS_SHOWN else ""
+            self.stdout.write(f"Invalid rows: {rows}{more}")
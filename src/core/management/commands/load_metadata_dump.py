@@ -0,0 +1,175 @@
+"""Load provider data dumps into the local metadata mirror."""
+
+import bz2
+import gzip
+import json
+import lzma
+import re
+import tarfile
+from contextlib import contextmanager
+from itertools import batched
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services import metadata_mirror
+from core.services.openlibrary import extract_author_keys
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Records written per transaction
+DEFAULT_BATCH_SIZE = 5000
+# Report progress every this many lines read
+PROGRESS_EVERY = 100_000
+
+# Name of the releases file inside MusicBrainz's JSON dump archive (release.tar.xz)
+MUSICBRAINZ_RELEASE_MEMBER = "mbdump/release"
+
+_COMPRESSED_OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+_YEAR_PATTERN = re.compile(r"\b(\d{4})\b")
+
+
+@contextmanager
+def _open_lines(path: Path, member: str) -> Iterator[Iterator[str]]:
+    """
+    Open a dump as a stream of text lines, without unpacking it to disk.
+
+    Handles plain and gzip/xz/bz2-compressed files, and tar archives, in
+    which only `member` is read.
+    """
+    if ".tar" in path.suffixes:
+        with tarfile.open(path, "r|*") as archive:
+            for entry in archive:
+                if entry.name == member:
+                    # Tar streams are not seekable, which TextIOWrapper requires: decode line by line
+                    yield (line.decode() for line in archive.extractfile(entry))
+                    return
+        msg = f"{path} has no {member} file"
+        raise CommandError(msg)
+
+    opener = _COMPRESSED_OPENERS.get(path.suffix, open)
+    with opener(path, "rt", encoding="utf-8") as lines:
+        yield lines
+
+
+def _openlibrary_work(data: dict) -> tuple | None:
+    """Shape a work record of the OpenLibrary dump as a mirror row. None if it has no title."""
+    if not data.get("title"):
+        return None
+    description = data.get("description", "")
+    if isinstance(description, dict):
+        description = description.get("value", "")
+    year_match = _YEAR_PATTERN.search(data.get("first_publish_date", ""))
+    # Removed covers are kept in the list as -1
+    cover_id = next((cover for cover in data.get("covers", []) if cover and cover > 0), None)
+    return (
+        data["key"],
+        data["title"],
+        extract_author_keys(data),
+        int(year_match.group(1)) if year_match else None,
+        cover_id,
+        description,
+    )
+
+
+def _musicbrainz_release(data: dict) -> dict:
+    """Keep the fields of a dumped release that the import flow reads, in the web service's shape."""
+    release = {
+        "id": data["id"],
+        "title": data.get("title") or "",
+        "date": data.get("date") or "",
+        "country": data.get("country"),
+        "artist-credit": [{"name": credit["name"]} for credit in data.get("artist-credit", []) if credit.get("name")],
+        "genres": [{"name": genre["name"]} for genre in data.get("genres", [])],
+        "tags": [{"name": tag["name"]} for tag in data.get("tags", [])],
+    }
+    if label := next((info.get("label") for info in data.get("label-info", []) if info.get("label")), None):
+        release["label-info"] = [{"label": {"name": label.get("name")}}]
+    if primary_type := (data.get("release-group") or {}).get("primary-type"):
+        release["release-group"] = {"primary-type": primary_type}
+    return release
+
+
+class Command(BaseCommand):
+    """Stream OpenLibrary or MusicBrainz dumps into the local metadata mirror."""
+
+    help = (
+        "Load provider data dumps into the local metadata mirror, which then answers searches and "
+        "details before the live API. OpenLibrary: the authors and works dumps (ol_dump_*.txt.gz). "
+        "MusicBrainz: the JSON release dump (release.tar.xz)."
+    )
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument("source", choices=[metadata_mirror.OPENLIBRARY, metadata_mirror.MUSICBRAINZ])
+        parser.add_argument("files", nargs="+", type=Path, help="Dump files, compressed or not")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Records written per transaction (default: {DEFAULT_BATCH_SIZE})",
+        )
+
+    def handle(self, **options):
+        """Load every file, then rebuild the source's search index."""
+        source = options["source"]
+        for path in options["files"]:
+            if not path.is_file():
+                msg = f"File not found: {path}"
+                raise CommandError(msg)
+
+        with metadata_mirror.MirrorLoader() as loader:
+            for path in options["files"]:
+                self.stdout.write(f"Loading {path}…")
+                with _open_lines(path, MUSICBRAINZ_RELEASE_MEMBER) as lines:
+                    lines_with_progress = self._report_progress(lines)
+                    if source == metadata_mirror.OPENLIBRARY:
+                        self._load_openlibrary(loader, lines_with_progress, options["batch_size"])
+                    else:
+                        self._load_musicbrainz(loader, lines_with_progress, options["batch_size"])
+
+            self.stdout.write("Rebuilding the search index…")
+            loader.finish(source)
+            rows = loader.rows
+
+        self.stdout.write(self.style.SUCCESS(f"✓ {rows} records loaded into {loader.path}"))
+
+    def _report_progress(self, lines: Iterator[str]) -> Iterator[str]:
+        count = 0
+        for count, line in enumerate(lines, start=1):
+            yield line
+            if count % PROGRESS_EVERY == 0:
+                self.stdout.write(f"  {count} lines read")
+
+    def _load_openlibrary(self, loader, lines: Iterator[str], batch_size: int) -> None:
+        """Load the author and work records of an OpenLibrary dump; editions and others are skipped."""
+        authors = []
+        works = []
+        # Dump lines are: type, key, revision, last modified, JSON record
+        for line in lines:
+            record_type, _, record = line.partition("\t")
+            if record_type not in {"/type/author", "/type/work"}:
+                continue
+            data = json.loads(record.rsplit("\t", 1)[-1])
+            if record_type == "/type/author":
+                if data.get("name"):
+                    authors.append((data["key"], data["name"]))
+            elif work := _openlibrary_work(data):
+                works.append(work)
+
+            if len(authors) >= batch_size:
+                loader.add_authors(authors)
+                authors = []
+            if len(works) >= batch_size:
+                loader.add_works(works)
+                works = []
+        loader.add_authors(authors)
+        loader.add_works(works)
+
+    def _load_musicbrainz(self, loader, lines: Iterator[str], batch_size: int) -> None:
+        """Load a MusicBrainz JSON dump: one release per line."""
+        releases = (_musicbrainz_release(json.loads(line)) for line in lines if line.strip())
+        for batch in batched(releases, batch_size, strict=False):
+            loader.add_releases(batch)
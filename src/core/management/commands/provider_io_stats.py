@@ -0,0 +1,25 @@
+"""Provider I/O executor statistics command."""
+
+from django.core.management.base import BaseCommand
+
+from core.services.executor import get_stats
+
+
+class Command(BaseCommand):
+    """Report queue wait and run times of provider I/O tasks."""
+
+    help = "Show how long provider I/O tasks waited for a thread versus how long they ran"
+
+    def handle(self, **options):  # noqa: ARG002
+        """Print one line of metrics per task label."""
+        stats = get_stats()
+        if not stats:
+            self.stdout.write("No provider I/O tasks recorded yet.")
+            return
+
+        for label, counts in sorted(stats.items()):
+            if counts["tasks"]:
+                timings = f"avg wait {counts['avg_wait_ms']:.0f} ms, avg run {counts['avg_run_ms']:.0f} ms"
+            else:
+                timings = "no completed tasks"
+            self.stdout.write(f"{label}: {counts['tasks']} tasks, {counts['rejected']} rejected, {timings}")
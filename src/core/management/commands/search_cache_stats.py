@@ -0,0 +1,24 @@
+"""Search cache statistics command."""
+
+from django.core.management.base import BaseCommand
+
+from core.services.search_cache import get_hit_rates
+
+
+class Command(BaseCommand):
+    """Report the search cache hit rate per provider."""
+
+    help = "Show how many provider searches were answered from the search cache"
+
+    def handle(self, **options):  # noqa: ARG002
+        """Print one line of counts per provider."""
+        stats = get_hit_rates()
+        if not stats:
+            self.stdout.write("No searches recorded yet.")
+            return
+
+        for provider, counts in sorted(stats.items()):
+            self.stdout.write(
+                f"{provider}: {counts['hit_rate']:.0%} answered from cache "
+                f"({counts['hit']} hits, {counts['prefix_hit']} prefix hits, {counts['miss']} misses)"
+            )
@@ -0,0 +1,51 @@
+"""Remove orphan agents, orphan tags and unreferenced cover files."""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import filesizeformat
+
+from core.sweeper import sweep
+
+
+class Command(BaseCommand):
+    """Delete agents and tags used by no media, and cover files no media refers to."""
+
+    help = (
+        "Delete agents and tags that no media uses, and files under MEDIA_ROOT/covers that no media refers to "
+        "(left behind by deleted media or replaced covers). Reports the disk space reclaimed."
+    )
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be removed without removing anything",
+        )
+        parser.add_argument(
+            "--every",
+            type=int,
+            metavar="SECONDS",
+            help="Keep running and sweep again every SECONDS seconds",
+        )
+
+    def handle(self, **options):
+        """Sweep once, or periodically with --every."""
+        interval = options["every"]
+        if interval is not None and interval < 1:
+            msg = "--every must be at least 1 second"
+            raise CommandError(msg)
+
+        while True:
+            result = sweep(dry_run=options["dry_run"])
+            verb = "Would remove" if options["dry_run"] else "Removed"
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✓ {verb} {result.agents} agents, {result.tags} tags and {result.cover_files} cover files "
+                    f"({filesizeformat(result.bytes_reclaimed)} reclaimed)"
+                )
+            )
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,77 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:03
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# External URIs set by the import flow, and the identifier they hold. IGDB pages
+# are addressed by slug, not by id: imported games cannot be matched from their URI.
+EXTERNAL_URI_PATTERNS = {
+    "tmdb": re.compile(r"^https://www\.themoviedb\.org/((?:movie|tv)/\d+)"),
+    "openlibrary": re.compile(r"^https://openlibrary\.org/works/(OL\d+W)"),
+    "googlebooks": re.compile(r"^https?://books\.google\.[a-z.]+/books.*[?&]id=([\w-]+)"),
+    "musicbrainz": re.compile(r"^https://musicbrainz\.org/release/([0-9a-f-]{36})"),
+}
+
+
+def backfill_external_ids(apps, schema_editor):
+    """Record the provider identifiers of media imported before they were stored."""
+    Media = apps.get_model("core", "Media")
+    MediaExternalId = apps.get_model("core", "MediaExternalId")
+    db_alias = schema_editor.connection.alias
+
+    external_ids = []
+    for media_id, external_uri in (
+        Media.objects.using(db_alias).exclude(external_uri="").order_by("pk").values_list("pk", "external_uri")
+    ):
+        for provider, pattern in EXTERNAL_URI_PATTERNS.items():
+            if match := pattern.match(external_uri):
+                external_ids.append(MediaExternalId(media_id=media_id, provider=provider, external_id=match.group(1)))
+                break
+    # The same item imported twice keeps its identifier on the first media only
+    MediaExternalId.objects.using(db_alias).bulk_create(external_ids, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0011_tag_alter_agent_options_alter_agent_name_media_tags"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaExternalId",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "provider",
+                    models.CharField(
+                        choices=[
+                            ("tmdb", "TMDB"),
+                            ("igdb", "IGDB"),
+                            ("openlibrary", "OpenLibrary"),
+                            ("googlebooks", "Google Books"),
+                            ("musicbrainz", "MusicBrainz"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("external_id", models.CharField(max_length=100)),
+                (
+                    "media",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="external_ids", to="core.media"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "External identifier",
+                "verbose_name_plural": "External identifiers",
+                "constraints": [
+                    models.UniqueConstraint(fields=("provider", "external_id"), name="unique_provider_external_id"),
+                    models.UniqueConstraint(fields=("media", "provider"), name="unique_media_provider"),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_external_ids, reverse_code=migrations.RunPython.noop),
+    ]
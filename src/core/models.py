@@ -13,6 +13,8 @@ from markdownfield.validators import VALIDATOR_STANDARD
 from partial_date import PartialDateField
 from PIL import Image, ImageOps
 
+from .services import registry
+
 # Security limits for image processing
 MAX_IMAGE_PIXELS = 89_478_485  # ~8000x11000 pixels, default PIL limit
 MAX_FILE_SIZE_MB = 10  # Maximum file size in megabytes
@@ -262,6 +264,34 @@ class Media(models.Model):
         super().save(*args, **kwargs)
 
 
+class MediaExternalId(models.Model):
+    """
+    Identifier of a media at a metadata provider (TMDB, IGDB, OpenLibrary, etc.).
+
+    Recorded when a media is imported, so provider search results can be
+    matched against the library by identifier rather than by title.
+    """
+
+    media = models.ForeignKey(Media, on_delete=models.CASCADE, related_name="external_ids")
+    provider = models.CharField(
+        max_length=20,
+        choices={name: plugin.label for name, plugin in registry.PROVIDERS.items()},
+    )
+    # TMDB ids are prefixed with the media type ("movie/603"): films and series are numbered separately
+    external_id = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["provider", "external_id"], name="unique_provider_external_id"),
+            models.UniqueConstraint(fields=["media", "provider"], name="unique_media_provider"),
+        ]
+        verbose_name = _("External identifier")
+        verbose_name_plural = _("External identifiers")
+
+    def __str__(self):
+        return f"{self.provider}:{self.external_id}"
+
+
 class SavedView(models.Model):
     """Model for saving filtered views with custom names."""
 
@@ -315,3 +345,29 @@ class SavedView(models.Model):
         params.extend((key, value) for key, value in optional_filters if value)
         params.extend([("sort", self.sort), ("view_mode", self.view_mode)])
         return f"/?{urlencode(params)}"
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted row, so that an incremental backup can replay the deletion.
+
+    Rows changed since the previous backup are found by their `updated_at`;
+    deleted rows leave nothing behind but this record.
+    """
+
+    # Model label, e.g. "core.media"
+    model = models.CharField(max_length=100)
+    object_pk = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = _("Deleted object")
+        verbose_name_plural = _("Deleted objects")
+
+    def __str__(self):
+        return f"{self.model}:{self.object_pk}"
+
+    @classmethod
+    def record(cls, model, pks):
+        """Record the deletion of the rows of a model with the given primary keys, in one insert."""
+        cls.objects.bulk_create([cls(model=model._meta.label_lower, object_pk=str(pk)) for pk in pks])  # noqa: SLF001
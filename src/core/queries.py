@@ -1,10 +1,17 @@
 """Media queryset and pagination utilities."""
 
+from functools import reduce
+from operator import or_
+from typing import TYPE_CHECKING
+
 from django.core.paginator import Paginator
 from django.db.models import Q
 
 from .filters import apply_filters, extract_filters, get_field_choices, resolve_sorting
-from .models import Media
+from .models import Media, MediaExternalId
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
 
 def build_search_queryset(query):
@@ -27,15 +34,31 @@ def build_search_queryset(query):
     return Media.objects.filter(q_objects).prefetch_related("tags", "contributors").distinct()
 
 
-def build_media_context(request):
+def find_library_media(external_ids: dict[str, Iterable[str]]) -> dict[str, dict[str, int]]:
     """
-    Build and filter media queryset from request parameters.
+    Find which provider items are already in the library, in one query.
 
-    Returns a context_dict ready for rendering.
-    This consolidates the common logic used by index and load_more_media views.
+    Takes {provider: external ids} (e.g. the ids of a page of search results)
+    and returns {provider: {external id: media pk}} for the ones found.
+    """
+    found = {provider: {} for provider in external_ids}
+    wanted = {provider: set(ids) for provider, ids in external_ids.items()}
+    conditions = [Q(provider=provider, external_id__in=ids) for provider, ids in wanted.items() if ids]
+    if not conditions:
+        return found
+    for provider, external_id, media_id in MediaExternalId.objects.filter(reduce(or_, conditions)).values_list(
+        "provider", "external_id", "media_id"
+    ):
+        found[provider][external_id] = media_id
+    return found
+
+
+def build_filtered_queryset(request):
+    """
+    Build the media queryset of the current search and filters, unsorted.
+
+    Returns (queryset, filters, contributor, tag).
     """
-    view_mode = request.GET.get("view_mode", "grid")
-    sort_field, sort = resolve_sorting(request)
     filters = extract_filters(request)
     search_query = request.GET.get("search", "").strip()
 
@@ -46,8 +69,20 @@ def build_media_context(request):
         else Media.objects.all().prefetch_related("tags", "contributors")
     )
 
-    # Apply filters and sorting
     queryset, contributor, tag = apply_filters(queryset, filters)
+    return queryset, filters, contributor, tag
+
+
+def build_media_context(request):
+    """
+    Build and filter media queryset from request parameters.
+
+    Returns a context_dict ready for rendering.
+    This consolidates the common logic used by index and load_more_media views.
+    """
+    view_mode = request.GET.get("view_mode", "grid")
+    sort_field, sort = resolve_sorting(request)
+    queryset, filters, contributor, tag = build_filtered_queryset(request)
     queryset = queryset.order_by(sort)
 
     # Pagination: 20 items per page
@@ -0,0 +1,150 @@
+"""
+Per-provider circuit breakers.
+
+When a provider is down, every request to it waits for the full timeout,
+which holds up pages that could be served by the other providers (e.g. the
+book search waiting on OpenLibrary before showing Google Books results).
+
+A breaker counts consecutive failures (connection errors, timeouts, 5xx and
+429 responses). After `failure_threshold` of them it opens: calls fail
+immediately with `CircuitOpenError` for `reset_timeout` seconds. Then a single
+probe call is let through; its success closes the breaker, its failure opens
+it again for another cool-down.
+
+State is kept in the shared state file so all workers agree on it.
+"""
+
+import logging
+import math
+import time
+
+import requests
+
+from . import shared_state
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_CLEAN_STATE = {"failures": 0, "opened_at": None, "probe_at": None}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+def _is_failure(exc: BaseException) -> bool:
+    """Tell whether an exception means the provider is unhealthy."""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status >= 500 or status == 429  # noqa: PLR2004
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by all workers, used as a context manager around provider calls.
+
+    Usage:
+        with tmdb_circuit:
+            response = requests.get(...)
+            response.raise_for_status()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        label: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.label = label
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._key = f"circuit:{name}"
+
+    def _state(self, connection=None) -> dict:
+        return shared_state.get_value(self._key, dict(_CLEAN_STATE), connection=connection)
+
+    def __enter__(self):
+        # Fast path: a closed circuit only needs a read
+        if self._state()["opened_at"] is None:
+            return self
+
+        with shared_state.transaction() as connection:
+            state = self._state(connection)
+            now = time.time()
+            if state["opened_at"] is not None:
+                if now < state["opened_at"] + self.reset_timeout:
+                    msg = f"{self.label} is unavailable, skipping the request"
+                    raise CircuitOpenError(msg)
+                # Cool-down over: let one probe through (a stuck probe is replaced after a cool-down)
+                if state["probe_at"] is not None and now < state["probe_at"] + self.reset_timeout:
+                    msg = f"{self.label} is being probed, skipping the request"
+                    raise CircuitOpenError(msg)
+                state["probe_at"] = now
+                shared_state.set_value(self._key, state, connection=connection)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc is None or (isinstance(exc, requests.HTTPError) and not _is_failure(exc)):
+            # The provider answered: clear any failure record
+            if self._state() != _CLEAN_STATE:
+                shared_state.set_value(self._key, _CLEAN_STATE)
+        elif _is_failure(exc):
+            self.record_failure()
+        return False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit if needed."""
+        with shared_state.transaction() as connection:
+            state = self._state(connection)
+            state["failures"] += 1
+            if state["opened_at"] is not None or state["failures"] >= self.failure_threshold:
+                if state["opened_at"] is None:
+                    logger.warning("%s failed %d times in a row, pausing requests", self.label, state["failures"])
+                state["opened_at"] = time.time()
+                state["probe_at"] = None
+            shared_state.set_value(self._key, state, connection=connection)
+
+    def health(self) -> dict:
+        """
+        Return the breaker's current state for display.
+
+        Keys: name, label, state (closed/open/half_open), failures and
+        retry_in (seconds until the next probe, 0 unless open).
+        """
+        state = self._state()
+        retry_in = 0
+        if state["opened_at"] is None:
+            status = CLOSED
+        else:
+            retry_in = max(0, math.ceil(state["opened_at"] + self.reset_timeout - time.time()))
+            status = OPEN if retry_in else HALF_OPEN
+        return {
+            "name": self.name,
+            "label": self.label,
+            "state": status,
+            "failures": state["failures"],
+            "retry_in": retry_in,
+        }
+
+
+tmdb_circuit = CircuitBreaker("tmdb", "TMDB")
+igdb_circuit = CircuitBreaker("igdb", "IGDB")
+openlibrary_circuit = CircuitBreaker("openlibrary", "OpenLibrary")
+googlebooks_circuit = CircuitBreaker("googlebooks", "Google Books")
+musicbrainz_circuit = CircuitBreaker("musicbrainz", "MusicBrainz")
+
+BREAKERS = (tmdb_circuit, igdb_circuit, openlibrary_circuit, googlebooks_circuit, musicbrainz_circuit)
+
+
+def get_provider_health() -> dict[str, dict]:
+    """Return the health of every provider, keyed by provider name."""
+    return {breaker.name: breaker.health() for breaker in BREAKERS}
@@ -0,0 +1,63 @@
+"""
+Single-flight coalescing of identical provider calls.
+
+HTMX search boxes fire on keyup, so the same query often reaches the server
+several times within milliseconds (key repeat, several tabs, retries). With
+threaded workers, or within the book search fan-out, those requests run
+concurrently in one process: the first caller for a key performs the
+upstream request and every concurrent caller with the same key waits for,
+and shares, its result (or exception).
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+
+class SingleFlight:
+    """Group of in-flight calls, de-duplicated by key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """
+        Call `fn(*args, **kwargs)`, unless an identical call is already in flight.
+
+        Returns the result of the call, shared with every caller using the same
+        key while it was running. Exceptions are shared the same way.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        with self._lock:
+            return len(self._calls)
+
+
+# Shared by all provider searches in this process
+provider_calls = SingleFlight()
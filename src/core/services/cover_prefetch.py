@@ -0,0 +1,153 @@
+"""
+Speculative cover prefetch for the import preview.
+
+When the import preview is rendered we already know which cover the user is
+most likely to keep, so it is downloaded and compressed in the background
+while they review the form. The processed file is stashed in a temporary
+directory under a random token; the form posts the token back and the save
+attaches the ready file instead of downloading it then.
+
+Files live on disk (not in memory) so that the POST can be served by another
+worker than the preview. Unclaimed files are swept after `PREFETCH_MAX_AGE`.
+"""
+
+import logging
+import re
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+
+from core.models import compress_image
+
+from .executor import ExecutorSaturatedError, provider_executor
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Unclaimed prefetched covers are deleted after this long (seconds)
+PREFETCH_MAX_AGE = 60 * 60
+# How long a save waits for a prefetch still running in this process (seconds)
+PREFETCH_WAIT = 10
+
+_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+_pending_lock = threading.Lock()
+_pending: dict[str, Future] = {}
+
+
+def _prefetch_dir() -> Path:
+    return Path(settings.COVER_PREFETCH_DIR)
+
+
+def _paths(token: str) -> tuple[Path, Path]:
+    """Return the (image, source URL) paths for a token."""
+    directory = _prefetch_dir()
+    return directory / f"{token}.jpg", directory / f"{token}.url"
+
+
+def prepare_cover(cover_url: str, download: Callable[[str], bytes | None]) -> ContentFile | None:
+    """Download and compress a cover. Returns None if it is unavailable or not a valid image."""
+    cover_bytes = download(cover_url)
+    if not cover_bytes:
+        return None
+    try:
+        return compress_image(ContentFile(cover_bytes))
+    except ValidationError:
+        logger.warning("Discarding invalid cover image from %s", cover_url)
+        return None
+
+
+def _prefetch(token: str, cover_url: str, download: Callable[[str], bytes | None]) -> None:
+    image_path, url_path = _paths(token)
+    try:
+        cover = prepare_cover(cover_url, download)
+    except Exception:
+        logger.exception("Cover prefetch failed for %s", cover_url)
+        return
+    if cover is None:
+        return
+
+    url_path.write_text(cover_url)
+    # Write under a temporary name so a concurrent claim never reads a partial file
+    partial_path = image_path.with_suffix(".part")
+    partial_path.write_bytes(cover.read())
+    partial_path.replace(image_path)
+
+
+def _run(token: str, cover_url: str, download: Callable[[str], bytes | None]) -> None:
+    try:
+        _prefetch(token, cover_url, download)
+    finally:
+        with _pending_lock:
+            _pending.pop(token, None)
+
+
+def _sweep_stale() -> None:
+    """Delete prefetched files nobody claimed."""
+    cutoff = time.time() - PREFETCH_MAX_AGE
+    for path in _prefetch_dir().iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def start(cover_url: str, download: Callable[[str], bytes | None]) -> str | None:
+    """
+    Start downloading and compressing a cover in the background.
+
+    Returns the token to hand to `claim()` when the form is saved, or None if
+    the provider executor is saturated (the cover is then fetched on save).
+    """
+    _prefetch_dir().mkdir(parents=True, exist_ok=True)
+    _sweep_stale()
+
+    token = secrets.token_urlsafe(16)
+    with _pending_lock:
+        try:
+            _pending[token] = provider_executor.submit("cover-prefetch", _run, token, cover_url, download)
+        except ExecutorSaturatedError:
+            logger.info("Skipping cover prefetch, provider executor is saturated")
+            return None
+    return token
+
+
+def claim(token: str | None, cover_url: str) -> ContentFile | None:
+    """
+    Take the prefetched cover for `token`, if it is ready and matches `cover_url`.
+
+    Waits for a prefetch still running in this process. Returns None when
+    there is nothing usable, in which case the caller downloads the cover itself.
+    """
+    if not token or not _TOKEN_PATTERN.match(token):
+        return None
+
+    with _pending_lock:
+        future = _pending.get(token)
+    if future is not None:
+        try:
+            future.result(timeout=PREFETCH_WAIT)
+        except TimeoutError:
+            return None
+
+    image_path, url_path = _paths(token)
+    try:
+        if url_path.read_text() != cover_url:
+            return None
+        cover = ContentFile(image_path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+    image_path.unlink(missing_ok=True)
+    url_path.unlink(missing_ok=True)
+    return cover
@@ -0,0 +1,143 @@
+"""
+Process-wide bounded executor for outbound provider I/O.
+
+All provider fan-outs (book search sources, OpenLibrary author lookups,
+cover prefetches…) run on one thread pool per process, so the number of
+concurrent outbound calls is capped no matter how many requests fan out at
+once. Work beyond the pool's threads waits in a bounded queue; when that is
+full too, `submit()` raises `ExecutorSaturatedError` and callers degrade
+(skip the source, run inline…) instead of piling up.
+
+For every task, the time spent waiting in the queue and the time spent
+running are added to counters in the shared state file, per task label.
+`get_stats()` (and `manage.py provider_io_stats`) reports them, which tells
+a saturated pool (long waits) from slow providers (long runs).
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from . import shared_state
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Threads doing provider I/O in each process
+MAX_WORKERS = 8
+# Tasks allowed to wait for a thread before new ones are rejected
+MAX_QUEUE = 32
+
+STATS_PREFIX = "io-executor:"
+_COUNTERS = ("tasks", "rejected", "wait_ms", "run_ms")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the executor's threads and queue are all taken."""
+
+
+def _record(label: str, **amounts: int) -> None:
+    """Add to the shared counters of a task label. Metrics must never break the task itself."""
+    try:
+        with shared_state.transaction():
+            for name, amount in amounts.items():
+                shared_state.increment(f"{STATS_PREFIX}{label}:{name}", amount)
+    except sqlite3.Error:
+        logger.warning("Could not record executor metrics for %s", label)
+
+
+class BoundedExecutor:
+    """Thread pool with a bounded queue and per-label wait/run time metrics."""
+
+    def __init__(self, max_workers: int, max_queue: int, thread_name_prefix: str = ""):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._local = threading.local()
+
+    def submit(self, label: str, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Schedule `fn(*args, **kwargs)` and return its future.
+
+        Raises ExecutorSaturatedError if every thread is busy and the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            _record(label, rejected=1)
+            msg = f"Provider I/O executor saturated, rejecting {label} task"
+            raise ExecutorSaturatedError(msg)
+
+        try:
+            return self._executor.submit(self._run, label, time.monotonic(), fn, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _run(self, label: str, submitted_at: float, fn: Callable, args: tuple, kwargs: dict):
+        started_at = time.monotonic()
+        self._local.in_worker = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            finished_at = time.monotonic()
+            self._local.in_worker = False
+            self._slots.release()
+            _record(
+                label,
+                tasks=1,
+                wait_ms=round((started_at - submitted_at) * 1000),
+                run_ms=round((finished_at - started_at) * 1000),
+            )
+
+    def run_all(self, label: str, fn: Callable, items: Iterable) -> list:
+        """
+        Call `fn(item)` for every item concurrently and return the results in order.
+
+        Items that cannot be queued run in the calling thread instead. So do all
+        items when called from one of the executor's own threads: waiting there
+        on queued work could deadlock a full pool. Exceptions are re-raised.
+        """
+        items = list(items)
+        if len(items) <= 1 or getattr(self._local, "in_worker", False):
+            return [fn(item) for item in items]
+
+        futures = []
+        for item in items:
+            try:
+                futures.append(self.submit(label, fn, item))
+            except ExecutorSaturatedError:
+                futures.append(None)
+        return [future.result() if future else fn(item) for future, item in zip(futures, items, strict=True)]
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop accepting work, optionally waiting for running and queued tasks."""
+        self._executor.shutdown(wait=wait)
+
+
+def get_stats() -> dict[str, dict]:
+    """
+    Return executor metrics per task label, summed over all processes.
+
+    Each entry has the raw counters (tasks, rejected, wait_ms, run_ms) plus
+    the average queue wait and run time per task in milliseconds (None
+    before any task completed).
+    """
+    stats = {}
+    for key, value in shared_state.get_counters(STATS_PREFIX).items():
+        label, name = key.removeprefix(STATS_PREFIX).rsplit(":", 1)
+        stats.setdefault(label, dict.fromkeys(_COUNTERS, 0))[name] = value
+
+    for counts in stats.values():
+        tasks = counts["tasks"]
+        counts["avg_wait_ms"] = counts["wait_ms"] / tasks if tasks else None
+        counts["avg_run_ms"] = counts["run_ms"] / tasks if tasks else None
+    return stats
+
+
+# Shared by all provider fan-outs in this process
+provider_executor = BoundedExecutor(MAX_WORKERS, MAX_QUEUE, thread_name_prefix="provider-io")
@@ -14,6 +14,8 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .circuit_breaker import googlebooks_circuit
+
 logger = logging.getLogger(__name__)
 
 GOOGLEBOOKS_BASE_URL = "https://www.googleapis.com/books/v1/"
@@ -79,6 +81,11 @@ class GoogleBooksResult:
 
     source: str = "googlebooks"
 
+    @property
+    def external_id(self) -> str:
+        """Identifier stored on imported media."""
+        return self.volume_id
+
     @property
     def cover_url(self) -> str | None:
         """Returns the cover URL sized for the import flow (~800x1200)."""
@@ -101,10 +108,14 @@ class GoogleBooksClient:
     def __init__(self):
         # Google Books frequently returns transient 5xx errors (especially 503
         # "backendFailed") even on valid queries. Retry a couple of times with
-        # small backoff before giving up.
+        # small backoff before giving up. Connection errors and timeouts are not
+        # retried: each attempt would wait for the full timeout again, and the
+        # circuit breaker takes over when the service is really down.
         self.session = requests.Session()
         retry = Retry(
             total=3,
+            connect=0,
+            read=0,
             backoff_factor=0.4,
             status_forcelist=(500, 502, 503, 504),
             allowed_methods=("GET",),
@@ -119,12 +130,13 @@ class GoogleBooksClient:
         if params:
             url = f"{url}?{urlencode(params)}"
 
-        try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException:
-            logger.exception("Google Books API request failed")
-            raise
+        with googlebooks_circuit:
+            try:
+                response = self.session.get(url, timeout=10)
+                response.raise_for_status()
+            except requests.RequestException:
+                logger.exception("Google Books API request failed")
+                raise
 
         return response.json()
 
@@ -11,12 +11,16 @@ To use this API, you need to:
 
 import datetime
 import logging
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import requests
 from django.conf import settings
 
+from . import shared_state
+from .circuit_breaker import igdb_circuit
+
 logger = logging.getLogger(__name__)
 
 IGDB_BASE_URL = "https://api.igdb.com/v4/"
@@ -26,12 +30,37 @@ IGDB_IMAGE_BASE_URL = "https://images.igdb.com/igdb/image/upload/"
 # Minimum query length for search
 MIN_QUERY_LENGTH = 2
 
-# Cache for access token (simple in-memory cache)
-_token_cache: dict = {"access_token": None, "expires_at": 0}
+# Shared-state keys for the Twitch access token (shared by all worker processes)
+TOKEN_STATE_KEY = "igdb:access_token"  # noqa: S105
+TOKEN_LEASE_KEY = "igdb:access_token_refresh"  # noqa: S105
+
+# Refresh tokens this long before they actually expire
+TOKEN_EXPIRY_MARGIN = 60
+# How long a process may hold the refresh lease before others take over (> auth timeout)
+TOKEN_LEASE_SECONDS = 15
+# Polling interval while waiting for another process to finish refreshing
+TOKEN_POLL_INTERVAL = 0.2
+
+# IGDB accepts at most 10 sub-queries per multiquery call, 500 results each
+MULTIQUERY_MAX_QUERIES = 10
+MULTIQUERY_MAX_LIMIT = 500
 
+# Apicalypse field list shared by every game details query
+GAME_DETAILS_FIELDS = """name, first_release_date, summary, url,
+                   cover.image_id,
+                   involved_companies.company.name, involved_companies.developer, involved_companies.publisher,
+                   genres.name"""
 
-class IGDBError(Exception):
-    """Exception raised when IGDB API credentials are missing or invalid."""
+# Serializes refreshes inside this process; the shared lease does the same across processes
+_token_lock = threading.Lock()
+
+
+class IGDBError(requests.RequestException):
+    """
+    Exception raised when IGDB API credentials are missing or invalid.
+
+    A request error, so that callers handle a failed Twitch authentication like any failed IGDB request.
+    """
 
 
 @dataclass
@@ -44,6 +73,12 @@ class IGDBResult:
     summary: str
     cover_url: str | None
     cover_url_small: str | None
+    developers: list[str] = field(default_factory=list)
+
+    @property
+    def external_id(self) -> str:
+        """Identifier stored on imported media."""
+        return str(self.igdb_id)
 
 
 def _get_image_url(image_id: str | None, size: str = "cover_big") -> str | None:
@@ -63,6 +98,71 @@ def _escape_apicalypse_query(query: str) -> str:
     return query.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ").strip()
 
 
+def _cached_token() -> str | None:
+    """Return the shared access token if it is still comfortably valid."""
+    token = shared_state.get_value(TOKEN_STATE_KEY)
+    if token and token["expires_at"] > time.time() + TOKEN_EXPIRY_MARGIN:
+        return token["access_token"]
+    return None
+
+
+def _claim_refresh_lease() -> bool:
+    """Try to become the process that refreshes the token. Returns False if another one already is."""
+    with shared_state.transaction() as connection:
+        now = time.time()
+        if shared_state.get_value(TOKEN_LEASE_KEY, 0, connection=connection) > now:
+            return False
+        shared_state.set_value(TOKEN_LEASE_KEY, now + TOKEN_LEASE_SECONDS, connection=connection)
+    return True
+
+
+def _parse_year(release_date: int | None) -> int | None:
+    """Extract the year from an IGDB Unix timestamp."""
+    if not release_date:
+        return None
+    return datetime.datetime.fromtimestamp(release_date, tz=datetime.UTC).year
+
+
+def _extract_companies(game: dict) -> tuple[list[str], list[str]]:
+    """Extract (developers, publishers) names from expanded involved_companies."""
+    developers = []
+    publishers = []
+    for company_info in game.get("involved_companies", []):
+        company = company_info.get("company", {})
+        company_name = company.get("name") if isinstance(company, dict) else None
+        if company_name:
+            if company_info.get("developer"):
+                developers.append(company_name)
+            if company_info.get("publisher"):
+                publishers.append(company_name)
+    return developers, publishers
+
+
+def _parse_game_details(game: dict) -> dict:
+    """Shape a raw IGDB game (with expanded companies, genres, cover) for the import flow."""
+    developers, publishers = _extract_companies(game)
+
+    # Extract genres
+    genres = [g.get("name") for g in game.get("genres", []) if g.get("name")]
+
+    # Extract cover
+    cover = game.get("cover", {})
+    cover_image_id = cover.get("image_id") if isinstance(cover, dict) else None
+
+    return {
+        "title": game.get("name", ""),
+        "year": _parse_year(game.get("first_release_date")),
+        "overview": game.get("summary", ""),
+        "developers": developers,
+        "publishers": publishers,
+        "contributors": developers,  # Use developers as primary contributors
+        "genres": genres,
+        "cover_url": _get_image_url(cover_image_id, "cover_big"),
+        "igdb_url": game.get("url", f"https://www.igdb.com/games/{game.get('id')}"),
+        "media_type": "game",
+    }
+
+
 class IGDBClient:
     """Client for interacting with the IGDB API."""
 
@@ -78,13 +178,28 @@ class IGDBClient:
         """
         Get a valid access token, refreshing if necessary.
 
-        Uses Twitch's client credentials flow.
+        Uses Twitch's client credentials flow. The token is shared by all
+        worker processes, and only one of them refreshes it at a time: the
+        others wait for the new token instead of stampeding Twitch.
         """
-        # Check if cached token is still valid (with 60s buffer)
-        if _token_cache["access_token"] and _token_cache["expires_at"] > time.time() + 60:
-            return _token_cache["access_token"]
-
-        # Request new token
+        if token := _cached_token():
+            return token
+
+        with _token_lock:
+            deadline = time.time() + TOKEN_LEASE_SECONDS
+            while True:
+                # Another thread or process may have refreshed while we waited
+                if token := _cached_token():
+                    return token
+                if _claim_refresh_lease():
+                    return self._refresh_access_token()
+                if time.time() > deadline:
+                    msg = "Timed out waiting for Twitch token refresh"
+                    raise IGDBError(msg)
+                time.sleep(TOKEN_POLL_INTERVAL)
+
+    def _refresh_access_token(self) -> str:
+        """Request a new token from Twitch and publish it to the other processes."""
         try:
             response = requests.post(
                 TWITCH_AUTH_URL,
@@ -97,16 +212,20 @@ class IGDBClient:
             )
             response.raise_for_status()
             data = response.json()
-
-            _token_cache["access_token"] = data["access_token"]
-            _token_cache["expires_at"] = time.time() + data.get("expires_in", 3600)
-
         except requests.RequestException as e:
             logger.exception("Failed to get Twitch access token")
+            # Release the lease so another process can retry straight away
+            with shared_state.transaction() as connection:
+                shared_state.set_value(TOKEN_LEASE_KEY, 0, connection=connection)
             msg = "Failed to authenticate with Twitch"
             raise IGDBError(msg) from e
 
-        return _token_cache["access_token"]
+        # Publish the token and release the lease atomically, so waiters never find the lease free but no token
+        token = {"access_token": data["access_token"], "expires_at": time.time() + data.get("expires_in", 3600)}
+        with shared_state.transaction() as connection:
+            shared_state.set_value(TOKEN_STATE_KEY, token, connection=connection)
+            shared_state.set_value(TOKEN_LEASE_KEY, 0, connection=connection)
+        return data["access_token"]
 
     def _request(self, endpoint: str, body: str) -> list[dict]:
         """
@@ -124,15 +243,36 @@ class IGDBClient:
 
         url = f"{IGDB_BASE_URL}{endpoint}"
 
-        try:
-            response = requests.post(url, headers=headers, data=body, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException:
-            logger.exception("IGDB API request failed")
-            raise
+        with igdb_circuit:
+            try:
+                response = requests.post(url, headers=headers, data=body, timeout=10)
+                response.raise_for_status()
+            except requests.RequestException:
+                logger.exception("IGDB API request failed")
+                raise
 
         return response.json()
 
+    def _multiquery(self, queries: dict[str, tuple[str, str]]) -> dict[str, list[dict]]:
+        """
+        Run several Apicalypse queries in a single HTTP call.
+
+        Args:
+            queries: Mapping of query name -> (endpoint, body), at most 10 entries
+
+        Returns:
+            Mapping of query name -> result rows
+        """
+        if len(queries) > MULTIQUERY_MAX_QUERIES:
+            msg = f"IGDB multiquery accepts at most {MULTIQUERY_MAX_QUERIES} queries"
+            raise ValueError(msg)
+
+        body = "\n".join(
+            f'query {endpoint} "{name}" {{ {query_body.strip()} }};' for name, (endpoint, query_body) in queries.items()
+        )
+        data = self._request("multiquery", body)
+        return {item["name"]: item.get("result", []) for item in data}
+
     def search_games(self, query: str, limit: int = 10) -> list[IGDBResult]:
         """
         Search for video games.
@@ -149,10 +289,12 @@ class IGDBClient:
 
         # Apicalypse query language
         # See: https://api-docs.igdb.com/#apicalypse
+        # Cover and company expansions ride along so the whole search is one HTTP call
         safe_query = _escape_apicalypse_query(query)
         body = f"""
             search "{safe_query}";
-            fields name, first_release_date, summary, cover.image_id;
+            fields name, first_release_date, summary, cover.image_id,
+                   involved_companies.company.name, involved_companies.developer;
             limit {limit};
         """
 
@@ -160,12 +302,6 @@ class IGDBClient:
 
         results = []
         for item in data:
-            # Extract year from Unix timestamp
-            release_date = item.get("first_release_date")
-            year = None
-            if release_date:
-                year = datetime.datetime.fromtimestamp(release_date, tz=datetime.UTC).year
-
             # Extract cover image ID
             cover = item.get("cover", {})
             cover_image_id = cover.get("image_id") if isinstance(cover, dict) else None
@@ -174,10 +310,11 @@ class IGDBClient:
                 IGDBResult(
                     igdb_id=item.get("id"),
                     name=item.get("name", ""),
-                    year=year,
+                    year=_parse_year(item.get("first_release_date")),
                     summary=item.get("summary", ""),
                     cover_url=_get_image_url(cover_image_id, "cover_big"),
                     cover_url_small=_get_image_url(cover_image_id, "cover_small"),
+                    developers=_extract_companies(item)[0],
                 )
             )
 
@@ -196,10 +333,7 @@ class IGDBClient:
             - igdb_url: URL to IGDB page
         """
         body = f"""
-            fields name, first_release_date, summary, url,
-                   cover.image_id,
-                   involved_companies.company.name, involved_companies.developer, involved_companies.publisher,
-                   genres.name;
+            fields {GAME_DETAILS_FIELDS};
             where id = {game_id};
         """
 
@@ -208,45 +342,35 @@ class IGDBClient:
         if not data:
             return {}
 
-        game = data[0]
-
-        # Extract year
-        release_date = game.get("first_release_date")
-        year = None
-        if release_date:
-            year = datetime.datetime.fromtimestamp(release_date, tz=datetime.UTC).year
-
-        # Extract developers and publishers
-        developers = []
-        publishers = []
-        for company_info in game.get("involved_companies", []):
-            company = company_info.get("company", {})
-            company_name = company.get("name") if isinstance(company, dict) else None
-            if company_name:
-                if company_info.get("developer"):
-                    developers.append(company_name)
-                if company_info.get("publisher"):
-                    publishers.append(company_name)
-
-        # Extract genres
-        genres = [g.get("name") for g in game.get("genres", []) if g.get("name")]
-
-        # Extract cover
-        cover = game.get("cover", {})
-        cover_image_id = cover.get("image_id") if isinstance(cover, dict) else None
-
-        return {
-            "title": game.get("name", ""),
-            "year": year,
-            "overview": game.get("summary", ""),
-            "developers": developers,
-            "publishers": publishers,
-            "contributors": developers,  # Use developers as primary contributors
-            "genres": genres,
-            "cover_url": _get_image_url(cover_image_id, "cover_big"),
-            "igdb_url": game.get("url", f"https://www.igdb.com/games/{game_id}"),
-            "media_type": "game",
-        }
+        return _parse_game_details(data[0])
+
+    def get_games_details(self, game_ids: list[int]) -> dict[int, dict]:
+        """
+        Get details for several games in one HTTP call.
+
+        Ids are split into chunks of 500 sent as sub-queries of a single
+        multiquery request, so up to 5000 games cost one round trip.
+
+        Returns a mapping of game id -> details dict (same shape as
+        `get_game_details`). Unknown ids are left out.
+        """
+        ids = list(dict.fromkeys(int(game_id) for game_id in game_ids))
+        if not ids:
+            return {}
+
+        chunks = [ids[i : i + MULTIQUERY_MAX_LIMIT] for i in range(0, len(ids), MULTIQUERY_MAX_LIMIT)]
+        details = {}
+        for batch_start in range(0, len(chunks), MULTIQUERY_MAX_QUERIES):
+            queries = {
+                f"details-{index}": (
+                    "games",
+                    f"fields {GAME_DETAILS_FIELDS}; where id = ({','.join(map(str, chunk))}); limit {len(chunk)};",
+                )
+                for index, chunk in enumerate(chunks[batch_start : batch_start + MULTIQUERY_MAX_QUERIES])
+            }
+            for games in self._multiquery(queries).values():
+                details.update({game["id"]: _parse_game_details(game) for game in games})
+        return details
 
     def download_cover(self, cover_url: str) -> bytes | None:
         """Download cover image and return bytes."""
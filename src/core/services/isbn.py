@@ -0,0 +1,17 @@
+"""
+ISBN helpers.
+
+Kept apart from the OpenLibrary client so that parsing a list of ISBNs does
+not load a provider.
+"""
+
+import re
+
+# Well-formed ISBN-10 or ISBN-13, once dashes and spaces are removed
+ISBN_PATTERN = re.compile(r"^(?:\d{9}[\dX]|\d{13})$")
+
+
+def normalize_isbn(isbn: str) -> str | None:
+    """Strip dashes and spaces from an ISBN. Returns None if it is not a well-formed ISBN-10 or ISBN-13."""
+    isbn = re.sub(r"[\s-]", "", isbn).upper()
+    return isbn if ISBN_PATTERN.match(isbn) else None
@@ -0,0 +1,310 @@
+"""
+Local mirror of provider metadata, built from the providers' data dumps.
+
+OpenLibrary and MusicBrainz publish full dumps of their catalogues. Loaded
+into a separate SQLite file (`settings.METADATA_MIRROR_PATH`, see
+`manage.py load_metadata_dump`), they answer searches and detail lookups in
+milliseconds instead of a round trip to the provider. The clients ask the
+mirror first and call the live API when it has no answer: no mirror file, a
+source that was never loaded, or an item missing from the dump.
+
+Searches use SQLite's FTS5 full-text index over titles and author/artist
+names. Rows keep only the fields the import flow uses, shaped like the
+providers' API responses so the clients parse them the same way.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+OPENLIBRARY = "openlibrary"
+MUSICBRAINZ = "musicbrainz"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mirror_source (
+    name TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    loaded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ol_author (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ol_work (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    author_keys TEXT NOT NULL,
+    author_names TEXT,
+    first_publish_year INTEGER,
+    cover_id INTEGER,
+    description TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS ol_work_search USING fts5(
+    title, author_names, content='ol_work', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS mb_release (
+    id INTEGER PRIMARY KEY,
+    mbid TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    artists TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS mb_release_search USING fts5(
+    title, artists, content='mb_release', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# One read-only connection per thread: sqlite3 connections must not be shared across threads
+_local = threading.local()
+
+
+def _mirror_path() -> Path:
+    return Path(settings.METADATA_MIRROR_PATH)
+
+
+def _get_connection() -> sqlite3.Connection | None:
+    """Return this thread's read-only connection to the mirror, or None if there is no mirror."""
+    path = _mirror_path()
+    connection = getattr(_local, "connection", None)
+    if connection is not None and _local.path == path:
+        return connection
+
+    if connection is not None:
+        connection.close()
+        _local.connection = None
+
+    if not path.exists():
+        return None
+    connection = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+    _local.connection = connection
+    _local.path = path
+    return connection
+
+
+def _query(sql: str, params: tuple) -> list[tuple] | None:
+    """Run a read query on the mirror. None when the mirror is missing or cannot answer."""
+    connection = _get_connection()
+    if connection is None:
+        return None
+    try:
+        return connection.execute(sql, params).fetchall()
+    except sqlite3.Error:
+        # Not loaded yet (no tables) or being replaced: the live API answers instead
+        logger.warning("Metadata mirror query failed", exc_info=True)
+        return None
+
+
+def _match_expression(query: str) -> str | None:
+    """Turn a free-text query into an FTS5 expression: all words, the last one as a prefix."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+# ---------- Reads ----------
+
+
+def search_works(query: str, limit: int) -> list[dict] | None:
+    """
+    Search OpenLibrary works by title and author.
+
+    Returns documents shaped like the `search.json` API's, or None if the
+    mirror has no match (or no OpenLibrary data).
+    """
+    expression = _match_expression(query)
+    if expression is None:
+        return None
+    rows = _query(
+        "SELECT w.key, w.title, w.author_names, w.first_publish_year, w.cover_id "
+        "FROM ol_work_search JOIN ol_work AS w ON w.id = ol_work_search.rowid "
+        "WHERE ol_work_search MATCH ? ORDER BY rank LIMIT ?",
+        (expression, limit),
+    )
+    if not rows:
+        return None
+    return [
+        {
+            "key": key,
+            "title": title,
+            "author_name": json.loads(author_names or "[]"),
+            "first_publish_year": year,
+            "cover_i": cover_id,
+        }
+        for key, title, author_names, year, cover_id in rows
+    ]
+
+
+def get_work(work_key: str) -> dict | None:
+    """
+    Return an OpenLibrary work ("/works/OL...W"), or None if it is not mirrored.
+
+    The dict has the work API's title, description and covers, plus the
+    resolved `authors` names and the `first_publish_year`.
+    """
+    rows = _query(
+        "SELECT title, description, cover_id, author_names, first_publish_year FROM ol_work WHERE key = ?",
+        (work_key,),
+    )
+    if not rows:
+        return None
+    title, description, cover_id, author_names, year = rows[0]
+    return {
+        "title": title,
+        "description": description,
+        "covers": [cover_id] if cover_id else [],
+        "authors": json.loads(author_names or "[]"),
+        "first_publish_year": year,
+    }
+
+
+def search_releases(query: str, limit: int) -> list[dict] | None:
+    """Search MusicBrainz releases by title and artist. Returns API-shaped releases, or None if no match."""
+    expression = _match_expression(query)
+    if expression is None:
+        return None
+    rows = _query(
+        "SELECT r.data FROM mb_release_search JOIN mb_release AS r ON r.id = mb_release_search.rowid "
+        "WHERE mb_release_search MATCH ? ORDER BY rank LIMIT ?",
+        (expression, limit),
+    )
+    return [json.loads(data) for (data,) in rows] if rows else None
+
+
+def get_release(mbid: str) -> dict | None:
+    """Return an API-shaped MusicBrainz release, or None if it is not mirrored."""
+    rows = _query("SELECT data FROM mb_release WHERE mbid = ?", (mbid,))
+    return json.loads(rows[0][0]) if rows else None
+
+
+def get_sources() -> dict[str, dict]:
+    """Return the loaded sources with their row count and load time."""
+    rows = _query("SELECT name, rows, loaded_at FROM mirror_source", ()) or []
+    return {name: {"rows": count, "loaded_at": loaded_at} for name, count, loaded_at in rows}
+
+
+# ---------- Loading ----------
+
+
+class MirrorLoader:
+    """
+    Writes dump records into the mirror in batches.
+
+    Records are upserted, so a newer dump can be loaded over an older one.
+    Each batch is committed on its own and can be read by key straight away;
+    the search indexes are rebuilt once by `finish()`, not per row.
+
+    Usage:
+        with MirrorLoader() as loader:
+            loader.add_authors(rows)
+            loader.add_works(rows)
+            loader.finish(OPENLIBRARY)
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or _mirror_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # A failed load is simply run again: no need to fsync every batch
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.executescript(_SCHEMA)
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _write(self, sql: str, rows: Iterable[tuple]) -> int:
+        rows = list(rows)
+        self.connection.execute("BEGIN")
+        try:
+            self.connection.executemany(sql, rows)
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+        self.rows += len(rows)
+        return len(rows)
+
+    def add_authors(self, rows: Iterable[tuple[str, str]]) -> int:
+        """Store OpenLibrary authors as (key, name) rows."""
+        return self._write(
+            "INSERT INTO ol_author (key, name) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET name = excluded.name",
+            rows,
+        )
+
+    def add_works(self, rows: Iterable[tuple[str, str, list[str], int | None, int | None, str]]) -> int:
+        """Store OpenLibrary works as (key, title, author keys, first publish year, cover id, description) rows."""
+        return self._write(
+            "INSERT INTO ol_work (key, title, author_keys, first_publish_year, cover_id, description) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET title = excluded.title, "
+            "author_keys = excluded.author_keys, first_publish_year = excluded.first_publish_year, "
+            "cover_id = excluded.cover_id, description = excluded.description",
+            (
+                (key, title, json.dumps(author_keys), year, cover_id, description)
+                for key, title, author_keys, year, cover_id, description in rows
+            ),
+        )
+
+    def add_releases(self, releases: Iterable[dict]) -> int:
+        """Store API-shaped MusicBrainz releases."""
+        return self._write(
+            "INSERT INTO mb_release (mbid, title, artists, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(mbid) DO UPDATE SET title = excluded.title, artists = excluded.artists, data = excluded.data",
+            (
+                (
+                    release["id"],
+                    release["title"],
+                    " ".join(credit["name"] for credit in release["artist-credit"]),
+                    json.dumps(release, separators=(",", ":")),
+                )
+                for release in releases
+            ),
+        )
+
+    def finish(self, source: str) -> None:
+        """Resolve names and rebuild the search index of a source, then record the load."""
+        self.connection.execute("BEGIN")
+        try:
+            if source == OPENLIBRARY:
+                # Names are resolved once all authors are in, whatever order the dumps were loaded in
+                self.connection.execute(
+                    "UPDATE ol_work SET author_names = ("
+                    "SELECT json_group_array(a.name) FROM json_each(ol_work.author_keys) AS j "
+                    "JOIN ol_author AS a ON a.key = j.value)"
+                )
+                self.connection.execute("INSERT INTO ol_work_search (ol_work_search) VALUES ('rebuild')")
+                count = self.connection.execute("SELECT count(*) FROM ol_work").fetchone()[0]
+            else:
+                self.connection.execute("INSERT INTO mb_release_search (mb_release_search) VALUES ('rebuild')")
+                count = self.connection.execute("SELECT count(*) FROM mb_release").fetchone()[0]
+            self.connection.execute(
+                "INSERT OR REPLACE INTO mirror_source (name, rows, loaded_at) VALUES (?, ?, ?)",
+                (source, count, time.time()),
+            )
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
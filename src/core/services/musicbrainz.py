@@ -5,7 +5,8 @@ API Documentation: https://musicbrainz.org/doc/MusicBrainz_API
 Cover Art Archive: https://coverartarchive.org/
 
 This API is free and does not require authentication.
-Rate limiting: 1 request per second with a proper User-Agent header.
+Rate limiting: 1 request per second with a proper User-Agent header. This is
+enforced across all worker processes by a shared token bucket.
 """
 
 import logging
@@ -15,6 +16,12 @@ from http import HTTPStatus
 from urllib.parse import quote
 
 import requests
+from django.core.cache import cache
+
+from . import metadata_mirror
+from .circuit_breaker import musicbrainz_circuit
+from .executor import provider_executor
+from .ratelimit import RateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +40,14 @@ COVERART_PATTERN = re.compile(r"^https://coverartarchive\.org/release/[a-f0-9-]+
 # Minimum size in bytes to consider a cover valid
 MIN_COVER_SIZE_BYTES = 1000
 
+# How long cover availability answers are cached (seconds)
+COVER_CHECK_TTL = 24 * 60 * 60
+
+# MusicBrainz allows 1 request/second per client; the Cover Art Archive has no
+# published limit but throttles bursts, so it gets its own, more generous bucket
+musicbrainz_rate_limiter = RateLimiter("musicbrainz", rate=1.0)
+coverart_rate_limiter = RateLimiter("coverartarchive", rate=5.0, burst=5)
+
 
 def _extract_artists(data: dict) -> list[str]:
     """Extract artist names from artist-credit data."""
@@ -75,6 +90,11 @@ class MusicBrainzResult:
     country: str | None
     label: str | None
 
+    @property
+    def external_id(self) -> str:
+        """Identifier stored on imported media."""
+        return self.mbid
+
     @property
     def cover_url(self) -> str | None:
         """Returns the URL for the cover image (front, 500px)."""
@@ -116,12 +136,14 @@ class MusicBrainzClient:
 
         url = f"{MUSICBRAINZ_BASE_URL}{endpoint}"
 
-        try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException:
-            logger.exception("MusicBrainz API request failed")
-            raise
+        with musicbrainz_circuit:
+            try:
+                musicbrainz_rate_limiter.acquire()
+                response = self.session.get(url, params=params, timeout=10)
+                response.raise_for_status()
+            except requests.RequestException:
+                logger.exception("MusicBrainz API request failed")
+                raise
 
         return response.json()
 
@@ -139,7 +161,10 @@ class MusicBrainzClient:
         if not query or len(query) < MIN_QUERY_LENGTH:
             return []
 
-        data = self._request("release", {"query": query, "limit": limit})
+        # The local mirror answers when it has matches; otherwise ask the API
+        releases = metadata_mirror.search_releases(query, limit)
+        if releases is None:
+            releases = self._request("release", {"query": query, "limit": limit}).get("releases", [])
 
         return [
             MusicBrainzResult(
@@ -150,7 +175,7 @@ class MusicBrainzClient:
                 country=release.get("country"),
                 label=_extract_label(release.get("label-info", [])),
             )
-            for release in data.get("releases", [])
+            for release in releases
         ]
 
     def get_release_details(self, mbid: str) -> dict:
@@ -168,7 +193,9 @@ class MusicBrainzClient:
             - musicbrainz_url: URL to MusicBrainz page
             - media_type: "music"
         """
-        data = self._request(f"release/{quote(mbid, safe='')}", {"inc": "artists+labels+tags+genres+release-groups"})
+        data = metadata_mirror.get_release(mbid) or self._request(
+            f"release/{quote(mbid, safe='')}", {"inc": "artists+labels+tags+genres+release-groups"}
+        )
 
         artists = _extract_artists(data)
         year = _extract_year(data.get("date", ""))
@@ -206,15 +233,48 @@ class MusicBrainzClient:
         Returns:
             True if cover exists, False otherwise
         """
+        return bool(self._fetch_cover_exists(mbid))
+
+    def _fetch_cover_exists(self, mbid: str) -> bool | None:
+        """Ask the Cover Art Archive whether a release has a front cover. None if it could not tell."""
         try:
+            coverart_rate_limiter.acquire()
             response = self.session.head(
                 f"{COVERART_BASE_URL}release/{quote(mbid, safe='')}/front",
                 timeout=5,
                 allow_redirects=True,
             )
         except requests.RequestException:
+            return None
+        if response.status_code == HTTPStatus.OK:
+            return True
+        if response.status_code == HTTPStatus.NOT_FOUND:
             return False
-        return response.status_code == HTTPStatus.OK
+        return None
+
+    def check_covers_exist(self, mbids: list[str]) -> dict[str, bool | None]:
+        """
+        Check cover availability for many releases at once.
+
+        Answers are cached per MBID for `COVER_CHECK_TTL`. Uncached releases are
+        checked concurrently on the shared provider executor; each check still
+        takes a slot from the Cover Art Archive rate limiter, so a batch never
+        exceeds its budget.
+
+        Returns:
+            {mbid: True/False}, or None for releases whose check failed (not cached)
+        """
+        keys = {mbid: f"coverart:exists:{mbid}" for mbid in dict.fromkeys(mbids)}
+        cached = cache.get_many(keys.values())
+        answers = {mbid: cached.get(key) for mbid, key in keys.items()}
+
+        missing = [mbid for mbid, answer in answers.items() if answer is None]
+        fetched = dict(
+            zip(missing, provider_executor.run_all("coverart-checks", self._fetch_cover_exists, missing), strict=True)
+        )
+        cache.set_many({keys[mbid]: answer for mbid, answer in fetched.items() if answer is not None}, COVER_CHECK_TTL)
+        answers.update(fetched)
+        return answers
 
     def download_cover(self, cover_url: str) -> bytes | None:
         """Download cover image and return bytes."""
@@ -227,6 +287,7 @@ class MusicBrainzClient:
             return None
 
         try:
+            coverart_rate_limiter.acquire()
             response = self.session.get(cover_url, timeout=15, allow_redirects=True)
             # Cover Art Archive returns 404 if no cover exists
             if response.status_code == HTTPStatus.NOT_FOUND:
@@ -14,6 +14,11 @@ from urllib.parse import quote, urlencode, urljoin
 
 import requests
 
+from . import metadata_mirror
+from .circuit_breaker import openlibrary_circuit
+from .executor import provider_executor
+from .isbn import normalize_isbn
+
 logger = logging.getLogger(__name__)
 
 OPENLIBRARY_BASE_URL = "https://openlibrary.org/"
@@ -25,10 +30,55 @@ MIN_QUERY_LENGTH = 2
 # Pattern for valid OpenLibrary cover URLs
 OPENLIBRARY_COVER_PATTERN = re.compile(r"^https://covers\.openlibrary\.org/[baw]/(?:id|olid|isbn)/[^/]+\.jpg$")
 
+# ISBNs resolved per request to the batch books API (keeps URLs reasonably short)
+BIBKEYS_BATCH_SIZE = 50
+
 # Minimum size in bytes to consider a cover valid (OpenLibrary returns 1x1 pixel placeholder)
 MIN_COVER_SIZE_BYTES = 1000
 
 
+def extract_author_keys(work_data: dict) -> list[str]:
+    """Return the author keys ("/authors/...") referenced by a work."""
+    author_keys = []
+    for author_ref in work_data.get("authors", []):
+        if isinstance(author_ref, dict):
+            # Can be {"author": {"key": "/authors/..."}} or {"key": "/authors/..."}
+            author_key = author_ref["author"].get("key") if "author" in author_ref else author_ref.get("key")
+            if author_key:
+                author_keys.append(author_key)
+    return author_keys
+
+
+def _extract_edition_year(edition_data: dict) -> int | None:
+    """Extract the publication year from an edition's free-form publish date."""
+    year_match = re.search(r"\b(1[89]\d{2}|20[0-2]\d)\b", edition_data.get("publish_date", ""))
+    return int(year_match.group(1)) if year_match else None
+
+
+def _build_work_details(work_key: str, work_data: dict, authors: list[str], year: int | None) -> dict:
+    """Build the details dict of a work from its API data and resolved author names."""
+    # Extract description
+    description = work_data.get("description", "")
+    if isinstance(description, dict):
+        description = description.get("value", "")
+
+    # Get cover IDs
+    cover_ids = work_data.get("covers", [])
+    cover_id = cover_ids[0] if cover_ids else None
+    cover_url = f"{OPENLIBRARY_COVERS_URL}b/id/{cover_id}-L.jpg" if cover_id else None
+
+    return {
+        "title": work_data.get("title", ""),
+        "year": year,
+        "overview": description,
+        "authors": authors,
+        "contributors": authors,
+        "cover_url": cover_url,
+        "openlibrary_url": f"https://openlibrary.org{work_key}",
+        "media_type": "book",
+    }
+
+
 @dataclass
 class OpenLibraryResult:
     """Represents a search result from OpenLibrary."""
@@ -46,6 +96,11 @@ class OpenLibraryResult:
         """Extract the OpenLibrary ID from the work key."""
         return self.work_key.split("/")[-1] if self.work_key else ""
 
+    @property
+    def external_id(self) -> str:
+        """Identifier stored on imported media."""
+        return self.olid
+
     @property
     def cover_url(self) -> str | None:
         """Returns the full URL for the cover image (medium size)."""
@@ -83,12 +138,13 @@ class OpenLibraryClient:
         if params:
             url = f"{url}?{urlencode(params)}"
 
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException:
-            logger.exception("OpenLibrary API request failed")
-            raise
+        with openlibrary_circuit:
+            try:
+                response = requests.get(url, timeout=10)
+                response.raise_for_status()
+            except requests.RequestException:
+                logger.exception("OpenLibrary API request failed")
+                raise
 
         return response.json()
 
@@ -106,17 +162,21 @@ class OpenLibraryClient:
         if not query or len(query) < MIN_QUERY_LENGTH:
             return []
 
-        data = self._request(
-            "search.json",
-            {
-                "q": query,
-                "limit": limit,
-                "fields": "key,title,author_name,first_publish_year,cover_i",
-            },
-        )
+        # The local mirror answers when it has matches; otherwise ask the API
+        docs = metadata_mirror.search_works(query, limit)
+        if docs is None:
+            data = self._request(
+                "search.json",
+                {
+                    "q": query,
+                    "limit": limit,
+                    "fields": "key,title,author_name,first_publish_year,cover_i",
+                },
+            )
+            docs = data.get("docs", [])
 
         results = []
-        for doc in data.get("docs", []):
+        for doc in docs:
             # Get first cover ID if available
             cover_id = doc.get("cover_i")
 
@@ -153,45 +213,28 @@ class OpenLibraryClient:
         olid = quote(work_key.removeprefix("/works/"), safe="")
         work_key = f"/works/{olid}"
 
+        if mirrored := metadata_mirror.get_work(work_key):
+            year = first_publish_year or mirrored["first_publish_year"]
+            return _build_work_details(work_key, mirrored, mirrored["authors"], year)
+
         # Fetch work details
         work_data = self._request(f"{work_key}.json")
 
-        # Extract description
-        description = work_data.get("description", "")
-        if isinstance(description, dict):
-            description = description.get("value", "")
-
-        # Get cover IDs
-        cover_ids = work_data.get("covers", [])
-        cover_id = cover_ids[0] if cover_ids else None
-        cover_url = f"{OPENLIBRARY_COVERS_URL}b/id/{cover_id}-L.jpg" if cover_id else None
+        # Get authors - need to fetch each author, concurrently
+        author_keys = extract_author_keys(work_data)
+        author_names = provider_executor.run_all("openlibrary-authors", self._fetch_author_name, author_keys)
+        authors = [name for name in author_names if name]
 
-        # Get authors - need to fetch each author
-        authors = []
-        for author_ref in work_data.get("authors", []):
-            author_key = None
-            if isinstance(author_ref, dict):
-                # Can be {"author": {"key": "/authors/..."}} or {"key": "/authors/..."}
-                author_key = author_ref["author"].get("key") if "author" in author_ref else author_ref.get("key")
+        return _build_work_details(work_key, work_data, authors, first_publish_year)
 
-            if author_key:
-                try:
-                    author_data = self._request(f"{author_key}.json")
-                    if author_data.get("name"):
-                        authors.append(author_data["name"])
-                except requests.RequestException:
-                    logger.warning("Failed to fetch author: %s", author_key)
-
-        return {
-            "title": work_data.get("title", ""),
-            "year": first_publish_year,
-            "overview": description,
-            "authors": authors,
-            "contributors": authors,
-            "cover_url": cover_url,
-            "openlibrary_url": f"https://openlibrary.org{work_key}",
-            "media_type": "book",
-        }
+    def _fetch_author_name(self, author_key: str) -> str | None:
+        """Fetch an author's name, or None if it cannot be fetched."""
+        try:
+            author_data = self._request(f"{author_key}.json")
+        except requests.RequestException:
+            logger.warning("Failed to fetch author: %s", author_key)
+            return None
+        return author_data.get("name") or None
 
     def get_book_by_isbn(self, isbn: str) -> dict | None:
         """
@@ -221,16 +264,84 @@ class OpenLibraryClient:
             if work_key:
                 details = self.get_work_details(work_key)
                 # Override year with edition's publish date if available
-                publish_date = data.get("publish_date", "")
-                if publish_date:
-                    # Try to extract year from various date formats
-                    year_match = re.search(r"\b(1[89]\d{2}|20[0-2]\d)\b", publish_date)
-                    if year_match:
-                        details["year"] = int(year_match.group(1))
+                if year := _extract_edition_year(data):
+                    details["year"] = year
                 return details
 
         return None
 
+    def get_books_by_isbns(self, isbns: list[str]) -> dict[str, dict]:
+        """
+        Get book details for many ISBNs at once.
+
+        Editions are resolved through the batch books API (`bibkeys`), then
+        the works and their authors are fetched concurrently, each one once
+        even when shared by several ISBNs.
+
+        Args:
+            isbns: ISBN-10s or ISBN-13s; malformed ones are ignored
+
+        Returns:
+            Book details dicts (as `get_book_by_isbn`) keyed by normalized ISBN.
+            ISBNs that are unknown or could not be fetched are left out.
+        """
+        isbns = list(dict.fromkeys(filter(None, map(normalize_isbn, isbns))))
+        batches = [isbns[i : i + BIBKEYS_BATCH_SIZE] for i in range(0, len(isbns), BIBKEYS_BATCH_SIZE)]
+
+        editions = {}
+        for batch_editions in provider_executor.run_all("openlibrary-isbns", self._fetch_editions, batches):
+            editions.update(batch_editions)
+
+        # Map each ISBN to its work, fetching every work once
+        isbn_works = {}
+        for isbn, edition in editions.items():
+            works = edition.get("works", [])
+            if works and works[0].get("key"):
+                isbn_works[isbn] = works[0]["key"]
+        work_keys = list(dict.fromkeys(isbn_works.values()))
+        works_data = dict(
+            zip(work_keys, provider_executor.run_all("openlibrary-works", self._fetch_work, work_keys), strict=True)
+        )
+
+        author_keys = list(
+            dict.fromkeys(key for data in works_data.values() if data for key in extract_author_keys(data))
+        )
+        author_names = dict(
+            zip(
+                author_keys,
+                provider_executor.run_all("openlibrary-authors", self._fetch_author_name, author_keys),
+                strict=True,
+            )
+        )
+
+        books = {}
+        for isbn, work_key in isbn_works.items():
+            work_data = works_data[work_key]
+            if not work_data:
+                continue
+            authors = [name for key in extract_author_keys(work_data) if (name := author_names.get(key))]
+            books[isbn] = _build_work_details(work_key, work_data, authors, _extract_edition_year(editions[isbn]))
+        return books
+
+    def _fetch_editions(self, isbns: list[str]) -> dict[str, dict]:
+        """Fetch the editions of a batch of ISBNs through the books API, keyed by ISBN."""
+        params = {"bibkeys": ",".join(f"ISBN:{isbn}" for isbn in isbns), "format": "json", "jscmd": "details"}
+        try:
+            data = self._request("api/books", params)
+        except requests.RequestException:
+            logger.warning("Failed to fetch editions for %d ISBNs", len(isbns))
+            return {}
+        return {key.removeprefix("ISBN:"): entry["details"] for key, entry in data.items() if entry.get("details")}
+
+    def _fetch_work(self, work_key: str) -> dict | None:
+        """Fetch a work's data, or None if it cannot be fetched."""
+        olid = quote(work_key.removeprefix("/works/"), safe="")
+        try:
+            return self._request(f"/works/{olid}.json")
+        except requests.RequestException:
+            logger.warning("Failed to fetch work: %s", work_key)
+            return None
+
     def download_cover(self, cover_url: str) -> bytes | None:
         """Download cover image and return bytes."""
         if not cover_url:
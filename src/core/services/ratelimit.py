@@ -0,0 +1,84 @@
+"""
+Cross-process token-bucket rate limiter for external API clients.
+
+Buckets live in the shared state file (see `shared_state`), so every gunicorn
+worker and management command draws from the same budget.
+
+A call that finds the bucket empty reserves the next free slot and sleeps
+until it comes up, so concurrent callers are queued in order instead of all
+firing at once. If the slot is further away than the caller's deadline, the
+call is rejected with `RateLimitError` without consuming anything.
+"""
+
+import logging
+import time
+
+import requests
+
+from .shared_state import transaction
+
+logger = logging.getLogger(__name__)
+
+# How long a caller is willing to queue for a slot by default (seconds)
+DEFAULT_MAX_WAIT = 10.0
+
+
+class RateLimitError(requests.RequestException):
+    """Raised when a rate-limited call cannot be scheduled before its deadline."""
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all processes using the same bucket name.
+
+    Args:
+        name: Bucket identifier (one per upstream service)
+        rate: Tokens added per second
+        burst: Maximum number of tokens the bucket can hold
+    """
+
+    def __init__(self, name: str, rate: float, burst: int = 1):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+
+    def _reserve(self, max_wait: float) -> float | None:
+        """
+        Take a token, possibly from the future.
+
+        Returns the number of seconds to wait before the reserved slot, or None
+        if the slot would be further away than `max_wait` (nothing is reserved).
+        """
+        with transaction() as connection:
+            now = time.time()
+            row = connection.execute(
+                "SELECT tokens, updated_at FROM rate_limit_bucket WHERE name = ?", (self.name,)
+            ).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+
+            # A negative balance means callers are already queued for future slots
+            tokens -= 1
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+            if wait > max_wait:
+                return None
+
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limit_bucket (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, tokens, now),
+            )
+        return wait
+
+    def acquire(self, max_wait: float = DEFAULT_MAX_WAIT) -> None:
+        """
+        Block until the caller may send one request.
+
+        Raises:
+            RateLimitError: If no slot is available within `max_wait` seconds
+        """
+        wait = self._reserve(max_wait)
+        if wait is None:
+            msg = f"Rate limit for {self.name} exceeded (no slot within {max_wait:.1f}s)"
+            logger.warning(msg)
+            raise RateLimitError(msg)
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,143 @@
+"""
+Registry of the metadata providers.
+
+Each provider is declared here as a plugin: the module holding its client,
+the hosts its covers are served from, the media types it imports and the
+client methods used to search and to fetch an item's details. Declaring them
+costs nothing; a provider's module (and what it imports) is loaded the first
+time its client is asked for, so a worker that never imports games never
+loads the IGDB client.
+"""
+
+from dataclasses import dataclass
+from importlib import import_module
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Import page tab used for media types no provider declares
+DEFAULT_IMPORT_SOURCE = "tmdb"
+
+
+@dataclass(frozen=True)
+class ProviderPlugin:
+    """Declaration of a metadata provider."""
+
+    name: str
+    label: str
+    # Module holding the client, and its factory function (returns None when the provider is not configured)
+    module: str
+    factory: str
+    # Hosts the provider serves cover images from
+    cover_hosts: tuple[str, ...]
+    # Media types (Media.media_type) the provider imports
+    media_types: tuple[str, ...]
+    # Tab of the import page searching this provider
+    import_source: str
+    # Client methods: search(query, ...) and details(item_id, ...)
+    search: str
+    details: str
+
+    def get_client(self):
+        """Load the provider's module if needed and return a client, or None if it is not configured."""
+        return getattr(import_module(self.module), self.factory)()
+
+
+PROVIDERS = {
+    plugin.name: plugin
+    for plugin in (
+        ProviderPlugin(
+            name="tmdb",
+            label="TMDB",
+            module="core.services.tmdb",
+            factory="get_tmdb_client",
+            cover_hosts=("image.tmdb.org",),
+            media_types=("FILM", "TV"),
+            import_source="tmdb",
+            search="search_multi",
+            details="get_full_details",
+        ),
+        ProviderPlugin(
+            name="igdb",
+            label="IGDB",
+            module="core.services.igdb",
+            factory="get_igdb_client",
+            cover_hosts=("images.igdb.com",),
+            media_types=("GAME",),
+            import_source="igdb",
+            search="search_games",
+            details="get_game_details",
+        ),
+        ProviderPlugin(
+            name="openlibrary",
+            label="OpenLibrary",
+            module="core.services.openlibrary",
+            factory="get_openlibrary_client",
+            cover_hosts=("covers.openlibrary.org",),
+            media_types=("BOOK", "COMIC"),
+            import_source="books",
+            search="search_books",
+            details="get_work_details",
+        ),
+        ProviderPlugin(
+            name="googlebooks",
+            label="Google Books",
+            module="core.services.googlebooks",
+            factory="get_googlebooks_client",
+            cover_hosts=("books.google.com",),
+            media_types=("BOOK", "COMIC"),
+            import_source="books",
+            search="search_books",
+            details="get_volume_details",
+        ),
+        ProviderPlugin(
+            name="musicbrainz",
+            label="MusicBrainz",
+            module="core.services.musicbrainz",
+            factory="get_musicbrainz_client",
+            cover_hosts=("coverartarchive.org",),
+            media_types=("MUSIC",),
+            import_source="musicbrainz",
+            search="search_releases",
+            details="get_release_details",
+        ),
+    )
+}
+
+
+def get_client(name: str):
+    """Return the client of a provider, or None if it is not configured."""
+    return PROVIDERS[name].get_client()
+
+
+def client_factory(name: str) -> Callable:
+    """
+    Return a `get_<name>_client()`-style function that loads the provider on first call.
+
+    Lets modules keep a module-level client factory without importing the provider.
+    """
+
+    def get_provider_client():
+        return get_client(name)
+
+    get_provider_client.__name__ = f"get_{name}_client"
+    return get_provider_client
+
+
+def get_provider_for_cover(cover_url: str) -> ProviderPlugin | None:
+    """Return the provider serving a cover URL, or None for unknown hosts."""
+    host = urlsplit(cover_url).hostname
+    return next((plugin for plugin in PROVIDERS.values() if host in plugin.cover_hosts), None)
+
+
+def get_providers_for_source(import_source: str) -> list[ProviderPlugin]:
+    """Return the providers searched by a tab of the import page, in declaration order."""
+    return [plugin for plugin in PROVIDERS.values() if plugin.import_source == import_source]
+
+
+def get_import_source(media_type: str) -> str:
+    """Return the import page tab to open for a media type."""
+    plugin = next((plugin for plugin in PROVIDERS.values() if media_type in plugin.media_types), None)
+    return plugin.import_source if plugin else DEFAULT_IMPORT_SOURCE
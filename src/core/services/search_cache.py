@@ -0,0 +1,137 @@
+"""
+Search-as-you-type cache for provider searches.
+
+Search boxes fire on every pause in typing, so the same provider is asked
+for "foundation", then "foundation as", then "foundation asimov". Results
+are cached per provider and query, and a longer query can be answered from
+a shorter one without going upstream when:
+
+- the longer query only adds words to the cached one, and
+- the cached result set was complete (the provider returned less than a
+  full page, so there is nothing beyond what we already have).
+
+In that case the cached results are filtered locally: every added word must
+match the start of a word in the result's title or people. Partial words
+inside a query ("foundat" → "foundation") are not reused: providers match
+whole words, so a shorter word does not return a superset.
+
+Hits, local prefix hits and misses are counted per provider in the shared
+state file, see `get_hit_rates()`.
+"""
+
+import hashlib
+import re
+from typing import TYPE_CHECKING
+
+from django.core.cache import cache
+
+from . import shared_state
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# How long search results stay cached (seconds)
+SEARCH_CACHE_TTL = 15 * 60
+
+STATS_PREFIX = "search-cache:"
+OUTCOMES = ("hit", "prefix_hit", "miss")
+
+# Result attributes searched when filtering a cached result set locally
+_TEXT_ATTRIBUTES = ("title", "name", "original_title")
+_PEOPLE_ATTRIBUTES = ("authors", "artists", "developers")
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _normalize(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+def _cache_key(provider: str, variant: str, query: str) -> str:
+    """Build a cache key that is safe for any backend (no spaces, bounded length)."""
+    digest = hashlib.sha256(f"{provider}\0{variant}\0{query}".encode()).hexdigest()
+    return f"search:{digest}"
+
+
+def _result_words(result) -> list[str]:
+    """Return the lowercased words of a result's title and people."""
+    parts = [getattr(result, attr, None) or "" for attr in _TEXT_ATTRIBUTES]
+    for attr in _PEOPLE_ATTRIBUTES:
+        parts.extend(getattr(result, attr, None) or [])
+    return _WORD_PATTERN.findall(" ".join(parts).lower())
+
+
+def _matches(result, words: list[str]) -> bool:
+    """Check that every query word starts some word of the result."""
+    result_words = _result_words(result)
+    return all(any(w.startswith(word) for w in result_words) for word in words)
+
+
+def _record(provider: str, outcome: str) -> None:
+    shared_state.increment(f"{STATS_PREFIX}{provider}:{outcome}")
+
+
+def search(provider: str, query: str, fetch: Callable[[], list], *, page_size: int | None, variant: str = "") -> list:
+    """
+    Return search results for `query`, from cache when possible.
+
+    Args:
+        provider: Provider name, used for cache keys and hit-rate statistics
+        query: The user's query
+        fetch: Callable performing the upstream search for `query`
+        page_size: Number of results a full upstream page holds; a shorter
+            result set is known to be complete. None if completeness cannot be
+            told from the results (only exact repeats are then served)
+        variant: Extra cache discriminator (e.g. language) for providers whose
+            results depend on more than the query
+    """
+    normalized = _normalize(query)
+    words = normalized.split(" ")
+
+    # The query itself, then every shorter query made of its leading words
+    candidates = [" ".join(words[:n]) for n in range(len(words), 0, -1)]
+    keys = [_cache_key(provider, variant, candidate) for candidate in candidates]
+    cached = cache.get_many(keys)
+
+    if (entry := cached.get(keys[0])) is not None:
+        _record(provider, "hit")
+        return entry["results"]
+
+    for n_words, key in zip(range(len(words) - 1, 0, -1), keys[1:], strict=True):
+        entry = cached.get(key)
+        if entry is not None and entry["complete"]:
+            results = [result for result in entry["results"] if _matches(result, words[n_words:])]
+            cache.set(keys[0], {"results": results, "complete": True}, SEARCH_CACHE_TTL)
+            _record(provider, "prefix_hit")
+            return results
+
+    _record(provider, "miss")
+    results = fetch()
+    store(provider, query, results, page_size=page_size, variant=variant)
+    return results
+
+
+def store(provider: str, query: str, results: list, *, page_size: int | None, variant: str = "") -> None:
+    """Cache results for a query."""
+    complete = page_size is not None and len(results) < page_size
+    key = _cache_key(provider, variant, _normalize(query))
+    cache.set(key, {"results": results, "complete": complete}, SEARCH_CACHE_TTL)
+
+
+def get_hit_rates() -> dict[str, dict]:
+    """
+    Return cache statistics per provider.
+
+    Each entry has the raw counts for every outcome plus `hit_rate`, the share
+    of searches answered without going upstream (None before any search).
+    """
+    stats = {}
+    for key, value in shared_state.get_counters(STATS_PREFIX).items():
+        provider, outcome = key.removeprefix(STATS_PREFIX).rsplit(":", 1)
+        stats.setdefault(provider, dict.fromkeys(OUTCOMES, 0))[outcome] = value
+
+    for counts in stats.values():
+        total = sum(counts[outcome] for outcome in OUTCOMES)
+        counts["hit_rate"] = (counts["hit"] + counts["prefix_hit"]) / total if total else None
+    return stats
@@ -0,0 +1,103 @@
+"""
+Small SQLite-backed store for state shared between worker processes.
+
+Gunicorn workers and management commands each have their own memory, so
+anything that has to be coordinated between them (rate-limit buckets, API
+tokens…) lives in a separate SQLite file next to the main database.
+SQLite's `BEGIN IMMEDIATE` gives us a cross-process write lock for free.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit_bucket (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shared_value (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shared_counter (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# One connection per thread: sqlite3 connections must not be shared across threads
+_local = threading.local()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Return this thread's connection to the shared state file, opening it if needed."""
+    path = Path(settings.PROVIDER_STATE_PATH)
+    connection = getattr(_local, "connection", None)
+    if connection is not None and _local.path == path:
+        return connection
+
+    if connection is not None:
+        connection.close()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # isolation_level=None: we manage transactions explicitly with BEGIN IMMEDIATE
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # Losing the last writes on power loss is fine for this data; skip the fsync per commit
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(_SCHEMA)
+    _local.connection = connection
+    _local.path = path
+    return connection
+
+
+@contextmanager
+def transaction():
+    """
+    Run a block under the shared state's cross-process write lock.
+
+    Keep the block short: every worker touching shared state waits on it.
+    """
+    connection = _get_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def get_value(key: str, default=None, connection: sqlite3.Connection | None = None):
+    """Read a JSON value from the shared store."""
+    connection = connection or _get_connection()
+    row = connection.execute("SELECT value FROM shared_value WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def set_value(key: str, value, connection: sqlite3.Connection | None = None) -> None:
+    """Write a JSON-serializable value to the shared store."""
+    connection = connection or _get_connection()
+    connection.execute("INSERT OR REPLACE INTO shared_value (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+
+def increment(key: str, amount: int = 1) -> None:
+    """Atomically add `amount` to a shared counter."""
+    _get_connection().execute(
+        "INSERT INTO shared_counter (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = value + ?",
+        (key, amount, amount),
+    )
+
+
+def get_counters(prefix: str) -> dict[str, int]:
+    """Return all shared counters whose key starts with `prefix`."""
+    rows = _get_connection().execute(
+        "SELECT key, value FROM shared_counter WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+    )
+    return dict(rows.fetchall())
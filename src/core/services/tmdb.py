@@ -12,6 +12,8 @@ from urllib.parse import urlencode, urljoin
 import requests
 from django.conf import settings
 
+from .circuit_breaker import tmdb_circuit
+
 logger = logging.getLogger(__name__)
 
 TMDB_BASE_URL = "https://api.themoviedb.org/3/"
@@ -42,6 +44,11 @@ class TMDBResult:
     cover_path: str | None
     media_type: Literal["movie", "tv"]
 
+    @property
+    def external_id(self) -> str:
+        """Identifier stored on imported media: films and series are numbered separately."""
+        return f"{self.media_type}/{self.tmdb_id}"
+
     @property
     def cover_url(self) -> str | None:
         """Returns the full URL for the cover image (w500 size)."""
@@ -73,13 +80,14 @@ class TMDBClient:
         url = urljoin(TMDB_BASE_URL, endpoint)
         full_url = f"{url}?{urlencode(params)}"
 
-        try:
-            response = requests.get(full_url, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException:
-            logger.exception("TMDB API request failed")
-            raise
+        with tmdb_circuit:
+            try:
+                response = requests.get(full_url, timeout=10)
+                response.raise_for_status()
+                return response.json()
+            except requests.RequestException:
+                logger.exception("TMDB API request failed")
+                raise
 
     def search_multi(self, query: str, language: str = "fr-FR", page: int = 1) -> list[TMDBResult]:
         """
@@ -148,6 +156,7 @@ class TMDBClient:
             - title, original_title, year, overview
             - directors: list of director names
             - production_companies: list of company names
+            - contributors: the directors, then the production companies
             - cover_url: full URL for cover image
             - tmdb_url: URL to TMDB page
         """
@@ -189,6 +198,7 @@ class TMDBClient:
             "overview": data.get("overview", ""),
             "directors": directors,
             "production_companies": production_companies,
+            "contributors": directors + production_companies,
             "genres": genres,
             "cover_url": cover_url,
             "tmdb_url": tmdb_url,
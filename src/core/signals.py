@@ -0,0 +1,42 @@
+"""Signal receivers of the core app."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete
+
+from .models import Agent, Media, SavedView, Tag, Tombstone
+
+# Models whose deletions are replayed by incremental backups. External
+# identifiers and tag/contributor links are removed along with their media.
+TRACKED_DELETIONS = (Agent, Media, SavedView, Tag)
+
+# Set while a bulk deletion records its tombstones itself, in one insert
+_recorded_by_caller = ContextVar("recorded_by_caller", default=False)
+
+
+@contextmanager
+def tombstones_recorded_by_caller():
+    """Keep record_deletion from recording the rows deleted within the block."""
+    token = _recorded_by_caller.set(True)
+    try:
+        yield
+    finally:
+        _recorded_by_caller.reset(token)
+
+
+def record_deletion(sender, instance, **kwargs):  # noqa: ARG001
+    """
+    Leave a tombstone for each deleted row of a tracked model.
+
+    One insert per row: fine for a single instance deleted from a view or the
+    admin, while bulk deletions go through utils.delete_with_tombstones().
+    """
+    if not _recorded_by_caller.get():
+        Tombstone.record(sender, [instance.pk])
+
+
+# Connected per model: a receiver for every sender would keep Django from
+# deleting the rows of any other model without fetching them first
+for model in TRACKED_DELETIONS:
+    post_delete.connect(record_deletion, sender=model, dispatch_uid=f"record_deletion_{model._meta.label_lower}")  # noqa: SLF001
@@ -0,0 +1,109 @@
+"""
+Removal of what nothing refers to anymore: agents, tags and cover files.
+
+Contributors are cleaned up when the media a request touches lose them, but
+tags never are, and neither are the cover files of deleted media or of
+replaced covers. The sweep catches all of them at once: orphan agents and
+tags are each removed with a single `DELETE ... WHERE NOT EXISTS`, and files
+under `MEDIA_ROOT/covers` that no media refers to are deleted from disk.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Agent, Media, Tag, Tombstone
+
+logger = logging.getLogger(__name__)
+
+# Directory of the cover files, relative to MEDIA_ROOT (the upload_to of Media.cover)
+COVERS_DIR = "covers"
+# Files younger than this are kept: a cover is written to disk before its media row is committed
+COVER_GRACE_PERIOD = 60 * 60
+
+
+@dataclass
+class SweepResult:
+    """What a sweep removed (or would remove, on a dry run)."""
+
+    agents: int = 0
+    tags: int = 0
+    cover_files: int = 0
+    bytes_reclaimed: int = 0
+
+
+def orphan_agents():
+    """Agents that contribute to no media."""
+    return Agent.objects.filter(~Exists(Media.contributors.through.objects.filter(agent_id=OuterRef("pk"))))
+
+
+def orphan_tags():
+    """Tags applied to no media."""
+    return Tag.objects.filter(~Exists(Media.tags.through.objects.filter(tag_id=OuterRef("pk"))))
+
+
+def _delete(queryset) -> int:
+    # An orphan has no through rows to cascade to: skip the collector (and its per-row
+    # post_delete signals) and send a single DELETE, after recording the tombstones
+    with transaction.atomic():
+        Tombstone.record(queryset.model, queryset.values_list("pk", flat=True))
+        return queryset._raw_delete(queryset.db)  # noqa: SLF001
+
+
+def unreferenced_cover_files() -> list[Path]:
+    """Files under MEDIA_ROOT/covers that no media refers to, older than the grace period."""
+    media_root = Path(settings.MEDIA_ROOT)
+    covers_dir = media_root / COVERS_DIR
+    if not covers_dir.is_dir():
+        return []
+    referenced = set(Media.objects.exclude(cover="").values_list("cover", flat=True))
+    cutoff = time.time() - COVER_GRACE_PERIOD
+    files = []
+    for path in covers_dir.rglob("*"):
+        try:
+            if (
+                path.is_file()
+                and path.relative_to(media_root).as_posix() not in referenced
+                and path.stat().st_mtime < cutoff
+            ):
+                files.append(path)
+        except OSError:
+            # Removed while listing
+            continue
+    return files
+
+
+def sweep(*, dry_run: bool = False) -> SweepResult:
+    """Delete orphan agents, orphan tags and unreferenced cover files."""
+    result = SweepResult()
+    if dry_run:
+        result.agents = orphan_agents().count()
+        result.tags = orphan_tags().count()
+    else:
+        result.agents = _delete(orphan_agents())
+        result.tags = _delete(orphan_tags())
+
+    for path in unreferenced_cover_files():
+        try:
+            size = path.stat().st_size
+            if not dry_run:
+                path.unlink()
+        except OSError as e:
+            logger.warning("Could not remove cover file %s: %s", path, e)
+            continue
+        result.cover_files += 1
+        result.bytes_reclaimed += size
+
+    logger.info(
+        "Swept %d agents, %d tags and %d cover files (%d bytes)",
+        result.agents,
+        result.tags,
+        result.cover_files,
+        result.bytes_reclaimed,
+    )
+    return result
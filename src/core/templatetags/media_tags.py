@@ -169,6 +169,19 @@ def toggle_sort_direction(sort_value):
     return f"-{sort_value}"
 
 
+@register.filter
+def get_item(mapping, key):
+    """
+    Look up a key in a dict, for keys held in template variables.
+
+    Returns None when the key (or the dict) is missing.
+
+    Example usage:
+        {% if in_library.tmdb|get_item:result.external_id %}...{% endif %}
+    """
+    return mapping.get(key) if mapping else None
+
+
 @register.simple_tag
 def has_filters(request):
     """
@@ -7,9 +7,12 @@ urlpatterns = [
     path("", views.index, name="home"),
     path("media/add/", views.media_edit, name="media_add"),
     path("media/import/", views.media_import, name="media_import"),
+    path("media/import/isbn/", views.media_import_isbns, name="media_import_isbns"),
+    path("media/import/csv/", views.media_import_csv, name="media_import_csv"),
     path("media/<int:pk>/", views.media_detail, name="media_detail"),
     path("media/<int:pk>/edit/", views.media_edit, name="media_edit"),
     path("media/<int:pk>/delete/", views.media_delete, name="media_delete"),
+    path("media/bulk/", views.media_bulk_action, name="media_bulk_action"),
     path("load-more/", views.load_more_media, name="load_more_media"),
     path("agents/search-htmx/", views.agent_search_htmx, name="agent_search_htmx"),
     path("agents/select-htmx/", views.agent_select_htmx, name="agent_select_htmx"),
@@ -25,6 +28,7 @@ urlpatterns = [
     # Backup management
     path("backup/", views.backup_manage, name="backup_manage"),
     path("backup/export/", views.backup_export, name="backup_export"),
+    path("backup/export/stream/", views.backup_export_stream, name="backup_export_stream"),
     path("backup/import/", views.backup_import, name="backup_import"),
     # Saved views
     path("saved-views/save/", views.saved_view_save, name="saved_view_save"),
@@ -1,20 +1,84 @@
+import gzip
+import hashlib
 import json
+import logging
+import os
+import sqlite3
 import tarfile
 import tomllib
-from io import BytesIO, StringIO
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from io import BytesIO, TextIOWrapper
 from pathlib import Path
+from tempfile import SpooledTemporaryFile, TemporaryDirectory
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Iterable, Iterator
+
+try:
+    from compression import zstd
+except ImportError:
+    # Python built without zstd support
+    zstd = None
 
 import django
+from django.apps import apps
 from django.conf import settings
+from django.core import serializers
 from django.core.management import call_command
-from django.db.models import Count
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
-from .models import Agent
+from .models import Agent, Media, Tag, Tombstone
+from .signals import tombstones_recorded_by_caller
+
+logger = logging.getLogger(__name__)
+
+# Models left out of backups: rebuilt by migrate, or transient
+BACKUP_EXCLUDED_MODELS = ["contenttypes", "auth.permission", "sessions.session", "core.tombstone"]
+# Database dumps up to this size are spooled in memory, larger ones in a temporary file
+DUMP_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Kinds of backup: a full one has everything, an incremental one what changed since the backup it is based on
+FULL_BACKUP = "full"
+INCREMENTAL_BACKUP = "incremental"
+BACKUP_FILE_PATTERN = "datakult_backup_*.tar.*"
+
+# Compression of backup archives: gzip in blocks compressed in parallel, or zstd with worker threads
+GZIP = "gzip"
+ZSTD = "zstd"
+BACKUP_SUFFIXES = {GZIP: ".tar.gz", ZSTD: ".tar.zst"}
+# zlib's default: level 9 is much slower for a few percent
+GZIP_LEVEL = 6
+GZIP_BLOCK_SIZE = 1024 * 1024
+# Media files that are already compressed: stored as they are rather than compressed again
+COMPRESSED_SUFFIXES = frozenset({".avif", ".gif", ".gz", ".heic", ".jpeg", ".jpg", ".png", ".webp", ".zip", ".zst"})
+
+# Formats of the database in a backup: a portable JSON dump, or a snapshot of the SQLite database file
+JSON_DATABASE = "json"
+SQLITE_SNAPSHOT = "sqlite"
+DATABASE_MEMBERS = {JSON_DATABASE: "database.json", SQLITE_SNAPSHOT: "database.sqlite3"}
+
+
+@dataclass
+class BackupInfo:
+    """What a backup archive says about itself: its metadata and the manifest of its media files."""
+
+    path: Path
+    metadata: dict
+    # Hash, size and modification time of every media file at backup time, by path relative to MEDIA_ROOT
+    files: dict[str, dict]
+
+    @property
+    def kind(self) -> str:
+        # Backups made before incrementals existed are full
+        return self.metadata.get("kind", FULL_BACKUP)
 
 
 def get_datakult_version() -> str:
@@ -32,6 +96,37 @@ def get_datakult_version() -> str:
         return "unknown"
 
 
+def get_or_create_by_names(model: type[Agent | Tag], names: Iterable[str]) -> dict[str, Agent | Tag]:
+    """Get or create Agents or Tags by name, with one query per step instead of one per name.
+
+    Existing names are looked up with a single IN query, the missing ones are
+    inserted with one bulk insert (ignoring rows created concurrently) and read
+    back once. Names must already be stripped and truncated.
+
+    Returns the instances by name.
+    """
+    names = set(names)
+    if not names:
+        return {}
+    found = {obj.name: obj for obj in model.objects.filter(name__in=names)}
+    missing = names - found.keys()
+    if missing:
+        model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+        found.update({obj.name: obj for obj in model.objects.filter(name__in=missing)})
+    return found
+
+
+def delete_with_tombstones(queryset) -> int:
+    """Delete the rows of a queryset, recording their tombstones in one insert rather than one per row.
+
+    Returns the number of rows of the queryset's model deleted.
+    """
+    with transaction.atomic(), tombstones_recorded_by_caller():
+        Tombstone.record(queryset.model, queryset.values_list("pk", flat=True))
+        _total, deleted = queryset.delete()
+    return deleted.get(queryset.model._meta.label, 0)  # noqa: SLF001
+
+
 def delete_orphan_agents_by_ids(agent_ids: Iterable[int]) -> int:
     """Delete all Agents in the given IDs that are not linked to any Media.
 
@@ -40,23 +135,414 @@ def delete_orphan_agents_by_ids(agent_ids: Iterable[int]) -> int:
     ids = list({int(i) for i in agent_ids if i is not None})
     if not ids:
         return 0
-    qs = Agent.objects.filter(pk__in=ids).annotate(n=Count("media")).filter(n=0)
-    count = qs.count()
-    qs.delete()
-    return count
+    linked = Media.contributors.through.objects.filter(agent_id=OuterRef("pk"))
+    return delete_with_tombstones(Agent.objects.filter(~Exists(linked), pk__in=ids))
+
+
+def _is_backed_up(model) -> bool:
+    opts = model._meta  # noqa: SLF001
+    return opts.managed and not opts.proxy and not {opts.app_label, opts.label_lower} & set(BACKUP_EXCLUDED_MODELS)
+
+
+def _changed_objects(since: datetime) -> Iterator:
+    """Rows changed since a date: by `updated_at` where models have one, all rows of the (small) others."""
+    for model in apps.get_models():
+        if not _is_backed_up(model):
+            continue
+        queryset = model._default_manager.order_by("pk")  # noqa: SLF001
+        if any(field.name == "updated_at" for field in model._meta.concrete_fields):  # noqa: SLF001
+            queryset = queryset.filter(updated_at__gte=since)
+        yield from queryset.iterator()
+
+
+def _add_database_dump(tar: tarfile.TarFile, since: datetime | None = None) -> None:
+    """Add the JSON dump of the database to an archive as database.json.
+
+    dumpdata iterates over each table and writes objects as it goes: the
+    dump is encoded straight into a spooled temporary file, which stays in
+    memory while small and moves to disk past DUMP_SPOOL_MAX_SIZE, so the
+    whole database is never held in memory. The tar header needs the size
+    of the member, hence the spool rather than writing to the archive directly.
+
+    With `since`, only the rows changed since then are dumped.
+    """
+    with SpooledTemporaryFile(max_size=DUMP_SPOOL_MAX_SIZE) as spool:
+        text = TextIOWrapper(spool, encoding="utf-8", newline="")
+        # No indentation: it only makes the dump larger
+        if since is None:
+            call_command("dumpdata", exclude=BACKUP_EXCLUDED_MODELS, stdout=text)
+        else:
+            serializers.serialize("json", _changed_objects(since), stream=text)
+        text.flush()
+        text.detach()
+
+        db_info = tarfile.TarInfo(name="database.json")
+        db_info.size = spool.tell()
+        spool.seek(0)
+        tar.addfile(db_info, fileobj=spool)
+
+
+def _add_database_snapshot(tar: tarfile.TarFile) -> None:
+    """Add a snapshot of the SQLite database file to an archive as database.sqlite3.
+
+    The snapshot is made with the online backup API of SQLite, which copies
+    the database page by page into a temporary file: it is consistent even
+    while the application writes, and far faster to make and to restore than
+    a JSON dump, but it can only be restored into SQLite. It holds the whole
+    database, including the tables a JSON dump leaves out.
+    """
+    if connection.vendor != "sqlite":
+        msg = f"Database snapshots require SQLite, not {connection.vendor}"
+        raise ValueError(msg)
+    if connection.in_atomic_block:
+        # SQLite refuses to copy a database its connection is writing to
+        msg = "A database snapshot cannot be made inside a transaction"
+        raise ValueError(msg)
+    connection.ensure_connection()
+    with TemporaryDirectory() as temp_dir:
+        snapshot_path = Path(temp_dir) / DATABASE_MEMBERS[SQLITE_SNAPSHOT]
+        snapshot = sqlite3.connect(snapshot_path)
+        try:
+            # In one step: the source is only read-locked for the copy, which is not restarted by writes
+            connection.connection.backup(snapshot)
+        finally:
+            snapshot.close()
+        tar.add(snapshot_path, arcname=DATABASE_MEMBERS[SQLITE_SNAPSHOT])
+
+
+def _add_json(tar: tarfile.TarFile, name: str, data) -> None:
+    data_bytes = json.dumps(data, indent=2).encode("utf-8")
+    info = tarfile.TarInfo(name=name)
+    info.size = len(data_bytes)
+    tar.addfile(info, fileobj=BytesIO(data_bytes))
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _media_manifest(media_root: Path, known_files: dict[str, dict]) -> dict[str, dict]:
+    """Hash, size and modification time of the media files.
+
+    Files whose size and modification time match `known_files` keep their
+    known hash instead of being read again.
+    """
+    files = {}
+    if not media_root.exists():
+        return files
+    for path in sorted(media_root.rglob("*")):
+        if not path.is_file():
+            continue
+        name = path.relative_to(media_root).as_posix()
+        stat = path.stat()
+        known = known_files.get(name, {})
+        if known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns:
+            sha256 = known["sha256"]
+        else:
+            sha256 = file_sha256(path)
+        files[name] = {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return files
+
+
+def default_backup_filename(codec: str = GZIP) -> str:
+    """Name of a new backup: datakult_backup_YYYYMMDD_HHMMSS_microseconds.tar.gz (or .tar.zst)."""
+    timestamp = timezone.now().strftime("%Y%m%d_%H%M%S_%f")
+    return f"datakult_backup_{timestamp}{BACKUP_SUFFIXES[codec]}"
+
+
+def _check_database_format(database_format: str, base: BackupInfo | None) -> None:
+    if database_format not in DATABASE_MEMBERS:
+        msg = f"Unknown database format: {database_format}"
+        raise ValueError(msg)
+    if base and database_format != JSON_DATABASE:
+        msg = "An incremental backup holds a JSON dump of the changed rows, not a snapshot"
+        raise ValueError(msg)
+
+
+def _add_media_file(tar: tarfile.TarFile, path: Path, arcname: str) -> None:
+    if isinstance(tar.fileobj, _ParallelGzipWriter):
+        # Compressing covers again costs time and saves next to nothing
+        tar.fileobj.set_level(0 if path.suffix.lower() in COMPRESSED_SUFFIXES else GZIP_LEVEL)
+    tar.add(path, arcname=arcname, recursive=False)
+
+
+def _add_backup_members(
+    tar: tarfile.TarFile, base: BackupInfo | None = None, database_format: str = JSON_DATABASE
+) -> Iterator[str]:
+    """Add the metadata, the manifest, the database dump and the media files to an archive.
+
+    Based on a previous backup, the archive is incremental: it holds the
+    rows changed since that backup was started, the deletions recorded since
+    then, and the media files that are new or whose hash changed.
+    The database is a JSON dump, or a snapshot of the SQLite file for a full backup.
+
+    Yields the name of each member once it is written, so that a streamed
+    archive can be sent member by member.
+    """
+    _check_database_format(database_format, base)
+
+    # Add metadata file
+    metadata = {
+        "created_at": timezone.now().isoformat(),
+        "datakult_version": get_datakult_version(),
+        "django_version": django.get_version(),
+        "database_engine": settings.DATABASES["default"]["ENGINE"],
+        "backup_id": uuid.uuid4().hex,
+        "kind": INCREMENTAL_BACKUP if base else FULL_BACKUP,
+        "database_format": database_format,
+    }
+    since = None
+    if base:
+        since = datetime.fromisoformat(base.metadata["created_at"])
+        metadata["base_id"] = base.metadata["backup_id"]
+        metadata["since"] = base.metadata["created_at"]
+    _add_json(tar, "metadata.json", metadata)
+    yield "metadata.json"
+
+    media_root = Path(settings.MEDIA_ROOT)
+    base_files = base.files if base else {}
+    files = _media_manifest(media_root, base_files)
+    _add_json(tar, "manifest.json", {"files": files})
+    yield "manifest.json"
+
+    # Deletions come before the database: an import replays them first, in one pass over the archive
+    if base:
+        deletions = Tombstone.objects.filter(deleted_at__gte=since).order_by("pk").values_list("model", "object_pk")
+        _add_json(tar, "deletions.json", [list(deletion) for deletion in deletions])
+        yield "deletions.json"
+
+    # Add database dump
+    if database_format == SQLITE_SNAPSHOT:
+        _add_database_snapshot(tar)
+    else:
+        _add_database_dump(tar, since)
+    yield DATABASE_MEMBERS[database_format]
+
+    # Add media files if they exist
+    if base:
+        for name, entry in files.items():
+            if base_files.get(name, {}).get("sha256") != entry["sha256"]:
+                _add_media_file(tar, media_root / name, f"media/{name}")
+                yield f"media/{name}"
+    elif media_root.exists() and any(media_root.iterdir()):
+        tar.add(media_root, arcname="media", recursive=False)
+        for path in sorted(media_root.rglob("*")):
+            arcname = f"media/{path.relative_to(media_root).as_posix()}"
+            _add_media_file(tar, path, arcname)
+            yield arcname
+
+
+class _StreamSink:
+    """Write-only file object collecting what a streamed archive writes, until it is drained."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self.buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+class _ParallelGzipWriter:
+    """Write-only file object compressing what is written to it into gzip, on several threads.
+
+    The data is cut into blocks compressed independently, each one a member
+    of a multi-member gzip file, which gzip readers (tarfile's included)
+    decompress as a single stream. zlib releases the GIL, so blocks are
+    compressed in parallel; they are written in order, with no more of them
+    in flight than twice the number of workers.
+    """
+
+    def __init__(self, fileobj, workers: int | None = None, block_size: int = GZIP_BLOCK_SIZE):
+        self.fileobj = fileobj
+        self.workers = workers or os.cpu_count() or 1
+        self.block_size = block_size
+        self.level = GZIP_LEVEL
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.position = 0
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backup-gzip")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.executor.shutdown(cancel_futures=True)
+
+    def tell(self) -> int:
+        # Position in the uncompressed stream, which is what tarfile keeps track of
+        return self.position
+
+    def write(self, data: bytes) -> int:
+        self.buffer += data
+        self.position += len(data)
+        while len(self.buffer) >= self.block_size:
+            self._submit(bytes(self.buffer[: self.block_size]))
+            del self.buffer[: self.block_size]
+        return len(data)
+
+    def set_level(self, level: int) -> None:
+        """Compress what is written from now on at another level (0 stores it)."""
+        if level != self.level:
+            self._submit(bytes(self.buffer))
+            self.buffer.clear()
+            self.level = level
+
+    def _submit(self, block: bytes) -> None:
+        if not block:
+            return
+        self.pending.append(self.executor.submit(gzip.compress, block, self.level, mtime=0))
+        while len(self.pending) > 2 * self.workers:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def close(self) -> None:
+        self._submit(bytes(self.buffer))
+        self.buffer.clear()
+        while self.pending:
+            self.fileobj.write(self.pending.popleft().result())
+        self.executor.shutdown()
+
+
+@contextmanager
+def _open_backup_archive(backup_path: Path, codec: str) -> Iterator[tarfile.TarFile]:
+    """Open a new backup archive for writing, compressed with the given codec."""
+    if codec == ZSTD:
+        if zstd is None:
+            msg = "zstd compression is not available in this Python build"
+            raise ValueError(msg)
+        # nb_workers is bounded to 0 when libzstd is built without threads
+        _lower, upper = zstd.CompressionParameter.nb_workers.bounds()
+        options = {zstd.CompressionParameter.nb_workers: min(os.cpu_count() or 1, upper)}
+        with tarfile.open(backup_path, "w:zst", options=options) as tar:
+            yield tar
+    else:
+        with (
+            backup_path.open("wb") as f,
+            _ParallelGzipWriter(f) as writer,
+            tarfile.open(fileobj=writer, mode="w") as tar,
+        ):
+            yield tar
+
+
+def stream_backup() -> Iterator[bytes]:
+    """Generate a backup archive (.tar.gz) on the fly, as the chunks of bytes to send.
+
+    The archive has the content of create_backup but is never written to
+    disk: the gzip blocks are written into a buffer that is handed out after
+    each member, so only the blocks being compressed are held in memory.
+    """
+    sink = _StreamSink()
+    with _ParallelGzipWriter(sink) as writer, tarfile.open(fileobj=writer, mode="w") as tar:
+        for _name in _add_backup_members(tar):
+            if sink.buffer:
+                yield sink.drain()
+    # End of archive and the last blocks
+    yield sink.drain()
+
+
+def default_backup_dir() -> Path:
+    """Directory of the backups: /app/data/backups in Docker, or ./backups locally."""
+    data_dir = Path(settings.BASE_DIR).parent / "data"
+    return data_dir / "backups" if data_dir.exists() else Path(settings.BASE_DIR) / "backups"
+
+
+def read_backup_info(backup_path: Path) -> BackupInfo:
+    """Read the metadata and manifest of a backup, which are at the start of the archive.
+
+    Raises:
+        tarfile.TarError, OSError, ValueError: If the archive cannot be read
+    """
+    metadata, files = {}, {}
+    with tarfile.open(backup_path, "r:*") as tar:
+        for member in tar:
+            if member.name == "metadata.json":
+                metadata = json.load(tar.extractfile(member))
+            elif member.name == "manifest.json":
+                files = json.load(tar.extractfile(member))["files"]
+            else:
+                # Written first: no need to read further
+                break
+    return BackupInfo(backup_path, metadata, files)
+
+
+def list_backups(backup_dir: Path) -> list[BackupInfo]:
+    """Readable backups of a directory, most recent first."""
+    backups = []
+    for path in sorted(backup_dir.glob(BACKUP_FILE_PATTERN), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            backups.append(read_backup_info(path))
+        except (tarfile.TarError, OSError, ValueError, KeyError) as e:
+            logger.warning("Skipping unreadable backup %s: %s", path, e)
+    return backups
+
+
+def find_base_backup(backup_dir: Path, *, full_only: bool = False) -> BackupInfo | None:
+    """The backup a new incremental backup builds on: the most recent one, or the most recent full one.
+
+    Backups made before incrementals existed have no identifier and cannot be built on.
+    """
+    for backup in list_backups(backup_dir):
+        if "backup_id" in backup.metadata and (backup.kind == FULL_BACKUP or not full_only):
+            return backup
+    return None
+
+
+def prune_tombstones(backup_dir: Path) -> int:
+    """Delete the tombstones older than every backup that an incremental backup can still build on.
+
+    Run after each export, against the backups of the directory exported to and
+    of the default one: a one-off backup written elsewhere leaves the deletions
+    that the chain of the default directory still needs.
+    Returns the number of tombstones deleted.
+    """
+    backup_dirs = {backup_dir.resolve(), default_backup_dir().resolve()}
+    bases = [
+        datetime.fromisoformat(backup.metadata["created_at"])
+        for directory in backup_dirs
+        for backup in list_backups(directory)
+        if "backup_id" in backup.metadata
+    ]
+    if not bases:
+        return 0
+    deleted, _by_model = Tombstone.objects.filter(deleted_at__lt=min(bases)).delete()
+    return deleted
 
 
-def create_backup(output_dir: Path | None = None, filename: str | None = None) -> Path:
+def create_backup(
+    output_dir: Path | None = None,
+    filename: str | None = None,
+    base: BackupInfo | None = None,
+    database_format: str = JSON_DATABASE,
+    codec: str = GZIP,
+) -> Path:
     """
     Create a complete backup of the Datakult application.
 
-    This function creates a compressed archive (.tar.gz) containing:
-    - JSON dump of all database data
+    This function creates a compressed archive (.tar.gz or .tar.zst) containing:
+    - JSON dump of all database data, or a snapshot of the SQLite database file
     - All media files (cover images, etc.)
+    - A manifest of the media files, with their hashes
+
+    Given a base backup, the archive is incremental: it only holds what
+    changed since the base was made (see _add_backup_members), and restoring
+    it requires the chain of backups it builds on.
 
     Args:
         output_dir: Directory where to save the backup (default: auto-detected)
         filename: Custom filename for the backup (default: datakult_backup_YYYYMMDD_HHMMSS_microseconds.tar.gz)
+        base: Backup to build an incremental backup on (default: full backup)
+        database_format: JSON_DATABASE (portable) or SQLITE_SNAPSHOT (fast, full backups on SQLite only)
+        codec: GZIP (default, readable everywhere) or ZSTD (faster, needs zstd support in Python to restore)
 
     Returns:
         Path to the created backup file
@@ -64,58 +550,32 @@ def create_backup(output_dir: Path | None = None, filename: str | None = None) -
     Raises:
         Exception: If backup creation fails
     """
+    if codec not in BACKUP_SUFFIXES:
+        msg = f"Unknown compression: {codec}"
+        raise ValueError(msg)
+
     # Determine output directory
     if output_dir is None:
-        # Default: use /app/data/backups in Docker, or ./backups locally
-        data_dir = Path(settings.BASE_DIR).parent / "data"
-        output_dir = data_dir / "backups" if data_dir.exists() else Path(settings.BASE_DIR) / "backups"
+        output_dir = default_backup_dir()
 
     # Create backup directory if it doesn't exist
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Generate filename with timestamp (including microseconds to avoid collisions)
     if filename is None:
-        timestamp = timezone.now().strftime("%Y%m%d_%H%M%S_%f")
-        filename = f"datakult_backup_{timestamp}.tar.gz"
-    elif not filename.endswith(".tar.gz"):
-        filename += ".tar.gz"
+        filename = default_backup_filename(codec)
+    elif not filename.endswith(BACKUP_SUFFIXES[codec]):
+        filename += BACKUP_SUFFIXES[codec]
 
     backup_path = output_dir / filename
 
-    # Step 1: Export database to JSON
-    json_output = StringIO()
-    call_command(
-        "dumpdata",
-        exclude=["contenttypes", "auth.permission", "sessions.session"],
-        indent=2,
-        stdout=json_output,
-    )
-    json_data = json_output.getvalue()
-
-    # Step 2: Create the tar.gz archive
-    with tarfile.open(backup_path, "w:gz") as tar:
-        # Add metadata file
-        metadata = {
-            "created_at": timezone.now().isoformat(),
-            "datakult_version": get_datakult_version(),
-            "django_version": django.get_version(),
-            "database_engine": settings.DATABASES["default"]["ENGINE"],
-        }
-        metadata_json = json.dumps(metadata, indent=2)
-        metadata_bytes = metadata_json.encode("utf-8")
-        metadata_info = tarfile.TarInfo(name="metadata.json")
-        metadata_info.size = len(metadata_bytes)
-        tar.addfile(metadata_info, fileobj=BytesIO(metadata_bytes))
-
-        # Add database dump
-        db_bytes = json_data.encode("utf-8")
-        db_info = tarfile.TarInfo(name="database.json")
-        db_info.size = len(db_bytes)
-        tar.addfile(db_info, fileobj=BytesIO(db_bytes))
-
-        # Add media files if they exist
-        media_root = Path(settings.MEDIA_ROOT)
-        if media_root.exists() and any(media_root.iterdir()):
-            tar.add(media_root, arcname="media", recursive=True)
+    # Create the archive, without leaving a partial one behind on failure
+    try:
+        with _open_backup_archive(backup_path, codec) as tar:
+            for _name in _add_backup_members(tar, base, database_format):
+                pass
+    except Exception:
+        backup_path.unlink(missing_ok=True)
+        raise
 
     return backup_path
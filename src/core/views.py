@@ -1,32 +1,48 @@
+import io
 import itertools
 import logging
 import tarfile
 import tempfile
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import urlencode
 
 import requests
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.core.files.base import ContentFile
 from django.core.management import call_command
 from django.core.management.base import CommandError
-from django.db import IntegrityError
-from django.http import FileResponse
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.http import content_disposition_header
 from django.utils.translation import gettext as _
+from django.utils.translation import ngettext
 from partial_date import PartialDate
 
+from .bulk_edit import DELETE, VALUE_FIELDS, BulkEditError, apply_bulk_action
+from .bulk_import import import_isbns, parse_isbns
+from .csv_import import FORMATS, CsvImportError, import_csv
 from .forms import MediaForm
-from .models import Agent, Media, SavedView, Tag
-from .queries import build_media_context
-from .services.googlebooks import get_googlebooks_client
-from .services.igdb import get_igdb_client
-from .services.musicbrainz import get_musicbrainz_client
-from .services.openlibrary import get_openlibrary_client
-from .services.tmdb import get_tmdb_client
-from .utils import create_backup, delete_orphan_agents_by_ids
+from .models import Agent, Media, MediaExternalId, SavedView, Tag
+from .queries import build_filtered_queryset, build_media_context, find_library_media
+from .services import cover_prefetch, registry, search_cache
+from .services.circuit_breaker import get_provider_health
+from .services.coalesce import provider_calls
+from .services.executor import ExecutorSaturatedError, provider_executor
+from .utils import (
+    BACKUP_SUFFIXES,
+    create_backup,
+    default_backup_filename,
+    delete_orphan_agents_by_ids,
+    get_or_create_by_names,
+    prune_tombstones,
+    stream_backup,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +50,16 @@ logger = logging.getLogger(__name__)
 DEFAULT_TMDB_LANGUAGE = "en-US"
 MIN_SEARCH_QUERY_LENGTH = 2
 MAX_SEARCH_RESULTS = 15
+# How long the latest search sequence number of a search box is remembered (seconds)
+SEARCH_SEQ_TTL = 300
+
+# Bulk ISBN import limits
+MAX_ISBN_FILE_SIZE = 1024 * 1024
+MAX_ISBNS_PER_IMPORT = 500
+# Library export (CSV) import limit
+MAX_CSV_FILE_SIZE = 50 * 1024 * 1024
+# How long the book search waits for its sources before returning what it has (seconds)
+BOOK_SEARCH_BUDGET = 1.5
 
 
 @login_required
@@ -54,49 +80,23 @@ def media_detail(request, pk):
 MAX_NAME_LENGTH = 100
 
 
-def _get_or_create_safe(model_class, name):
+def _resolve_new_names(model_class, raw_names):
     """
-    Safely get or create an object by name with validation.
+    Get or create the objects named in POST data, with one lookup and one insert for all names.
 
-    Returns (instance, error_message). If error_message is not None,
-    instance will be None.
+    Returns (list of primary keys as strings, errors).
     """
-    clean_name = name.strip()[:MAX_NAME_LENGTH]
-
-    if not clean_name:
-        return None, None  # Skip empty names silently
-
-    # Try to find existing object first to avoid race conditions
-    existing = model_class.objects.filter(name=clean_name).first()
-    if existing:
-        return existing, None
-
-    # Try to create, catching IntegrityError for race conditions
-    try:
-        obj, _created = model_class.objects.get_or_create(name=clean_name)
-    except IntegrityError:
-        # Race condition: object was created between filter() and get_or_create()
-        existing = model_class.objects.filter(name=clean_name).first()
-        if existing:
-            return existing, None
-        # Unexpected error
-        return None, f"Failed to create {model_class.__name__}: {clean_name}"
-    else:
-        return obj, None
+    names = list(dict.fromkeys(name.strip()[:MAX_NAME_LENGTH] for name in raw_names))
+    names = [name for name in names if name]  # Skip empty names silently
+    objects = get_or_create_by_names(model_class, names)
+    ids = [str(objects[name].pk) for name in names if name in objects]
+    errors = [f"Failed to create {model_class.__name__}: {name}" for name in names if name not in objects]
+    return ids, errors
 
 
 def _process_new_contributors(post_data):
     """Process new contributors from POST and return (modified POST data, errors)."""
-    new_contributor_names = post_data.getlist("new_contributors")
-    new_contributor_ids = []
-    errors = []
-
-    for raw_name in new_contributor_names:
-        agent, error = _get_or_create_safe(Agent, raw_name)
-        if error:
-            errors.append(error)
-        elif agent:
-            new_contributor_ids.append(str(agent.pk))
+    new_contributor_ids, errors = _resolve_new_names(Agent, post_data.getlist("new_contributors"))
 
     # Create a mutable copy and merge contributors
     post_data = post_data.copy()
@@ -107,16 +107,7 @@ def _process_new_contributors(post_data):
 
 def _process_new_tags(post_data):
     """Process new tags from POST and return (modified POST data, errors)."""
-    new_tag_names = post_data.getlist("new_tags")
-    new_tag_ids = []
-    errors = []
-
-    for raw_name in new_tag_names:
-        tag, error = _get_or_create_safe(Tag, raw_name)
-        if error:
-            errors.append(error)
-        elif tag:
-            new_tag_ids.append(str(tag.pk))
+    new_tag_ids, errors = _resolve_new_names(Tag, post_data.getlist("new_tags"))
 
     # Merge with existing tags
     existing_tags = post_data.getlist("tags")
@@ -125,22 +116,30 @@ def _process_new_tags(post_data):
 
 
 def _handle_import_cover(request, instance):
-    """Download and attach cover from import source if provided."""
+    """Attach the cover from the import source if provided, prefetched during the preview when possible."""
     cover_url = request.POST.get("import_cover_url")
     if cover_url and not request.FILES.get("cover"):
-        cover_bytes = _download_cover(cover_url)
-        if cover_bytes:
+        cover = cover_prefetch.claim(request.POST.get("import_cover_token"), cover_url)
+        if cover is None:
+            cover = cover_prefetch.prepare_cover(cover_url, _download_cover)
+        if cover:
             filename = f"{instance.title[:50].replace('/', '_')}.jpg"
-            instance.cover.save(filename, ContentFile(cover_bytes), save=False)
+            instance.cover.save(filename, cover, save=False)
 
 
-_COVER_SOURCES = (
-    ("image.tmdb.org", get_tmdb_client),
-    ("images.igdb.com", get_igdb_client),
-    ("covers.openlibrary.org", get_openlibrary_client),
-    ("books.google.com", get_googlebooks_client),
-    ("coverartarchive.org", get_musicbrainz_client),
-)
+def _handle_import_external_id(request, instance):
+    """Record the provider identifier of an imported media, unless another media already has it."""
+    provider = request.POST.get("import_provider")
+    external_id = request.POST.get("import_external_id", "").strip()
+    if provider not in registry.PROVIDERS or not external_id:
+        return
+    try:
+        with transaction.atomic():
+            MediaExternalId.objects.update_or_create(
+                media=instance, provider=provider, defaults={"external_id": external_id[:100]}
+            )
+    except IntegrityError:
+        logger.info("%s item %s is already in the library", provider, external_id)
 
 
 def _download_cover(cover_url: str) -> bytes | None:
@@ -148,12 +147,11 @@ def _download_cover(cover_url: str) -> bytes | None:
     if not cover_url:
         return None
 
-    for host, get_client in _COVER_SOURCES:
-        if host in cover_url:
-            client = get_client()
-            return client.download_cover(cover_url) if client else None
-
-    return None
+    plugin = registry.get_provider_for_cover(cover_url)
+    if plugin is None:
+        return None
+    client = registry.get_client(plugin.name)
+    return client.download_cover(cover_url) if client else None
 
 
 def _build_import_initial_data(import_data: dict, media=None) -> dict:
@@ -209,18 +207,30 @@ def _get_import_data_from_request(request) -> dict | None:
     musicbrainz_id = request.GET.get("musicbrainz_id")
 
     if tmdb_id and media_type in ("movie", "tv"):
-        return _fetch_tmdb_data(tmdb_id, media_type, language=lang)
-    if igdb_id:
-        return _fetch_igdb_data(igdb_id)
-    if openlibrary_key:
+        provider, external_id = "tmdb", f"{media_type}/{tmdb_id}"
+        import_data = _fetch_tmdb_data(tmdb_id, media_type, language=lang)
+    elif igdb_id:
+        provider, external_id = "igdb", igdb_id
+        import_data = _fetch_igdb_data(igdb_id)
+    elif openlibrary_key:
         openlibrary_year = request.GET.get("year")
         year = int(openlibrary_year) if openlibrary_year and openlibrary_year.isdigit() else None
-        return _fetch_openlibrary_data(openlibrary_key, year=year)
-    if googlebooks_id:
-        return _fetch_googlebooks_data(googlebooks_id)
-    if musicbrainz_id:
-        return _fetch_musicbrainz_data(musicbrainz_id)
-    return None
+        provider, external_id = "openlibrary", openlibrary_key.rsplit("/", 1)[-1]
+        import_data = _fetch_openlibrary_data(openlibrary_key, year=year)
+    elif googlebooks_id:
+        provider, external_id = "googlebooks", googlebooks_id
+        import_data = _fetch_googlebooks_data(googlebooks_id)
+    elif musicbrainz_id:
+        provider, external_id = "musicbrainz", musicbrainz_id
+        import_data = _fetch_musicbrainz_data(musicbrainz_id)
+    else:
+        return None
+
+    if import_data:
+        # Carried through the form so the saved media keeps its provider identifier
+        import_data["provider"] = provider
+        import_data["external_id"] = external_id
+    return import_data
 
 
 @login_required
@@ -245,6 +255,7 @@ def media_edit(request, pk=None):
             _handle_import_cover(request, instance)
             instance.save()
             form.save_m2m()
+            _handle_import_external_id(request, instance)
 
             # Cleanup orphan agents
             after_contributor_ids = set(instance.contributors.values_list("pk", flat=True))
@@ -258,6 +269,8 @@ def media_edit(request, pk=None):
     else:
         import_data = _get_import_data_from_request(request)
         if import_data:
+            if import_data.get("cover_url"):
+                import_data["cover_token"] = cover_prefetch.start(import_data["cover_url"], _download_cover)
             initial_data = _build_import_initial_data(import_data, media)
             form = MediaForm(initial=initial_data, instance=media)
 
@@ -285,76 +298,45 @@ def media_edit(request, pk=None):
     return render(request, "base/media_edit.html", context)
 
 
-def _fetch_tmdb_data(tmdb_id: str, media_type: str, language: str = DEFAULT_TMDB_LANGUAGE) -> dict | None:
-    """Fetch TMDB data for pre-filling the form."""
-    client = get_tmdb_client()
+def _fetch_details(provider_name: str, item_id, *args, **kwargs) -> dict | None:
+    """Fetch an item's details from a provider for pre-filling the form. None if unavailable."""
+    plugin = registry.PROVIDERS[provider_name]
+    client = registry.get_client(provider_name)
     if not client:
         return None
 
     try:
-        details = client.get_full_details(int(tmdb_id), media_type, language=language)
+        return getattr(client, plugin.details)(item_id, *args, **kwargs)
     except requests.RequestException, ValueError:
-        logger.exception("Failed to fetch TMDB data for %s/%s", media_type, tmdb_id)
+        logger.exception("Failed to fetch %s data for %s", plugin.label, item_id)
         return None
 
-    # Combine directors and production companies
-    contributors = details.get("directors", []) + details.get("production_companies", [])
-    details["contributors"] = contributors
-    return details
-
 
-def _fetch_igdb_data(igdb_id: str) -> dict | None:
-    """Fetch IGDB data for pre-filling the form."""
-    client = get_igdb_client()
-    if not client:
+def _fetch_tmdb_data(tmdb_id: str, media_type: str, language: str = DEFAULT_TMDB_LANGUAGE) -> dict | None:
+    """Fetch TMDB data for pre-filling the form."""
+    if not tmdb_id.isdigit():
         return None
+    return _fetch_details("tmdb", int(tmdb_id), media_type, language=language)
 
-    try:
-        details = client.get_game_details(int(igdb_id))
-    except requests.RequestException, ValueError:
-        logger.exception("Failed to fetch IGDB data for game %s", igdb_id)
-        return None
 
-    return details
+def _fetch_igdb_data(igdb_id: str) -> dict | None:
+    """Fetch IGDB data for pre-filling the form."""
+    return _fetch_details("igdb", int(igdb_id)) if igdb_id.isdigit() else None
 
 
 def _fetch_openlibrary_data(work_key: str, year: int | None = None) -> dict | None:
     """Fetch OpenLibrary data for pre-filling the form."""
-    client = get_openlibrary_client()
-
-    try:
-        details = client.get_work_details(work_key, first_publish_year=year)
-    except requests.RequestException:
-        logger.exception("Failed to fetch OpenLibrary data for work %s", work_key)
-        return None
-
-    return details
+    return _fetch_details("openlibrary", work_key, first_publish_year=year)
 
 
 def _fetch_googlebooks_data(volume_id: str) -> dict | None:
     """Fetch Google Books data for pre-filling the form."""
-    client = get_googlebooks_client()
-
-    try:
-        details = client.get_volume_details(volume_id)
-    except requests.RequestException:
-        logger.exception("Failed to fetch Google Books data for volume %s", volume_id)
-        return None
-
-    return details
+    return _fetch_details("googlebooks", volume_id)
 
 
 def _fetch_musicbrainz_data(mbid: str) -> dict | None:
     """Fetch MusicBrainz data for pre-filling the form."""
-    client = get_musicbrainz_client()
-
-    try:
-        details = client.get_release_details(mbid)
-    except requests.RequestException:
-        logger.exception("Failed to fetch MusicBrainz data for release %s", mbid)
-        return None
-
-    return details
+    return _fetch_details("musicbrainz", mbid)
 
 
 @login_required
@@ -364,25 +346,127 @@ def media_import(request):
     media_type = request.GET.get("media_type", "")
     title = request.GET.get("title", "")
 
-    # Map media_type to the appropriate import source
-    source_mapping = {
-        "FILM": "tmdb",
-        "TV": "tmdb",
-        "GAME": "igdb",
-        "BOOK": "books",
-        "COMIC": "books",
-        "MUSIC": "musicbrainz",
-    }
-    default_source = source_mapping.get(media_type, "tmdb")
-
     context = {
         "media_id": media_id,
-        "default_source": default_source,
+        "default_source": registry.get_import_source(media_type),
         "default_query": title,
+        "provider_health": get_provider_health(),
     }
     return render(request, "base/media_import.html", context)
 
 
+@login_required
+def media_import_isbns(request):
+    """Add books in bulk from a pasted or uploaded list of ISBNs."""
+    if request.method != "POST":
+        return render(request, "base/media_import_isbns.html")
+
+    text = request.POST.get("isbns", "")
+    isbn_file = request.FILES.get("isbn_file")
+    if isbn_file:
+        if isbn_file.size > MAX_ISBN_FILE_SIZE:
+            messages.error(request, _("The ISBN file is too large"))
+            return redirect("media_import_isbns")
+        try:
+            text = f"{text}\n{isbn_file.read().decode('utf-8-sig')}"
+        except UnicodeDecodeError:
+            messages.error(request, _("The ISBN file must be a UTF-8 text file"))
+            return redirect("media_import_isbns")
+
+    isbns, invalid = parse_isbns(text)
+    if not isbns:
+        messages.error(request, _("No valid ISBN found"))
+        return redirect("media_import_isbns")
+    if len(isbns) > MAX_ISBNS_PER_IMPORT:
+        messages.error(request, _("Please import at most %(max)d ISBNs at once") % {"max": MAX_ISBNS_PER_IMPORT})
+        return redirect("media_import_isbns")
+
+    result = import_isbns(isbns)
+
+    created = len(result.created)
+    messages.success(request, ngettext("%(count)d book added", "%(count)d books added", created) % {"count": created})
+    if result.already_in_library:
+        messages.info(
+            request,
+            _("Already in your library: %(isbns)s") % {"isbns": ", ".join(result.already_in_library)},
+        )
+    if result.not_found or invalid:
+        messages.warning(
+            request,
+            _("Not found: %(isbns)s") % {"isbns": ", ".join(result.not_found + invalid)},
+        )
+    return redirect("home")
+
+
+@login_required
+def media_import_csv(request):
+    """Import a Goodreads, Letterboxd or generic CSV export, streamed from the upload."""
+    status_choices = Media._meta.get_field("status").choices  # noqa: SLF001
+    if request.method != "POST":
+        return render(request, "base/media_import_csv.html", {"statuses": status_choices})
+
+    csv_file = request.FILES.get("csv_file")
+    if not csv_file:
+        messages.error(request, _("Please choose a CSV file"))
+        return redirect("media_import_csv")
+    if csv_file.size > MAX_CSV_FILE_SIZE:
+        messages.error(request, _("The CSV file is too large"))
+        return redirect("media_import_csv")
+
+    export_format = request.POST.get("format")
+    status = request.POST.get("status")
+    valid_statuses = {value for value, _label in status_choices}
+    # Large uploads are spooled to a temporary file by Django: the import reads it row by row
+    lines = io.TextIOWrapper(csv_file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = import_csv(
+            lines,
+            export_format if export_format in FORMATS else None,
+            status=status if status in valid_statuses else None,
+        )
+    except CsvImportError as e:
+        logger.warning("CSV import failed: %s", e)
+        messages.error(request, _("The file could not be imported: %(error)s") % {"error": e})
+        if e.result.created:
+            # Chunks written before the error are kept: importing the file again may duplicate them
+            messages.warning(
+                request,
+                ngettext(
+                    "%(count)d item added before the error",
+                    "%(count)d items added before the error",
+                    e.result.created,
+                )
+                % {"count": e.result.created},
+            )
+        return redirect("media_import_csv")
+
+    messages.success(
+        request,
+        ngettext("%(count)d item added", "%(count)d items added", result.created) % {"count": result.created},
+    )
+    if result.already_in_library:
+        messages.info(
+            request,
+            ngettext(
+                "%(count)d item was already in your library",
+                "%(count)d items were already in your library",
+                result.already_in_library,
+            )
+            % {"count": result.already_in_library},
+        )
+    if result.invalid:
+        messages.warning(
+            request,
+            ngettext(
+                "%(count)d row could not be imported (no title or unknown media type)",
+                "%(count)d rows could not be imported (no title or unknown media type)",
+                len(result.invalid),
+            )
+            % {"count": len(result.invalid)},
+        )
+    return redirect("home")
+
+
 @login_required
 def media_delete(request, pk):
     media = get_object_or_404(Media, pk=pk)
@@ -401,6 +485,45 @@ def media_delete(request, pk):
     return redirect("media_edit", pk=pk)
 
 
+@login_required
+def media_bulk_action(request):
+    """
+    Apply one action to the selected media, or to every media of the current search and filters.
+
+    The search and filters come from the query string, as on the media list,
+    so the list is shown again unchanged afterwards.
+    """
+    home_url = reverse("home")
+    if request.GET:
+        home_url = f"{home_url}?{request.GET.urlencode()}"
+    if request.method != "POST":
+        return redirect(home_url)
+
+    if request.POST.get("scope") == "filters":
+        queryset, _filters, _contributor, _tag = build_filtered_queryset(request)
+    else:
+        selected_ids = [pk for pk in request.POST.getlist("media") if pk.isdigit()]
+        if not selected_ids:
+            messages.error(request, _("No media selected"))
+            return redirect(home_url)
+        queryset = Media.objects.filter(pk__in=selected_ids)
+
+    try:
+        action = request.POST.get("action", "")
+        result = apply_bulk_action(queryset, action, request.POST.get(VALUE_FIELDS.get(action, ""), ""))
+    except BulkEditError as e:
+        logger.warning("Bulk action refused: %s", e)
+        messages.error(request, _("This action could not be applied"))
+        return redirect(home_url)
+
+    if result.action == DELETE:
+        message = ngettext("%(count)d item deleted", "%(count)d items deleted", result.count)
+    else:
+        message = ngettext("%(count)d item updated", "%(count)d items updated", result.count)
+    messages.success(request, message % {"count": result.count})
+    return redirect(home_url)
+
+
 @login_required
 def load_more_media(request):
     """HTMX view: load next page of media items for infinite scrolling."""
@@ -449,6 +572,31 @@ def tag_select_htmx(request):
         return render(request, "partials/tags/tag_chip.html", {"tag": None, "error": "Tag not found"})
 
 
+def _is_superseded(request, scope: str) -> bool:
+    """
+    Check whether the client already sent a newer search from the same search box.
+
+    Search inputs send a client-side sequence number (`seq`). A request older
+    than the latest one seen for this session and scope has been replaced in
+    the browser (hx-sync), so its results would be thrown away anyway.
+
+    Reading and storing the latest sequence number is not atomic, and the race
+    is accepted: two requests of a box arriving together can both be sent, or
+    store the older number last, which only lets a superseded search through.
+    Its results are still discarded by the browser; nothing relies on the skip.
+    """
+    seq = request.GET.get("seq", "")
+    session_key = request.session.session_key
+    if not seq.isdigit() or not session_key:
+        return False
+
+    cache_key = f"search-seq:{session_key}:{scope}"
+    if int(seq) < cache.get(cache_key, 0):
+        return True
+    cache.set(cache_key, int(seq), SEARCH_SEQ_TTL)
+    return False
+
+
 @login_required
 def tmdb_search_htmx(request):
     """HTMX view: search TMDB for movies and TV shows."""
@@ -461,7 +609,10 @@ def tmdb_search_htmx(request):
     if len(query) < MIN_SEARCH_QUERY_LENGTH:
         return render(request, "partials/tmdb/tmdb_suggestions.html", base_context)
 
-    client = get_tmdb_client()
+    if _is_superseded(request, "tmdb"):
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+    client = registry.get_client("tmdb")
     if not client:
         logger.warning("TMDB search attempted but API key not configured")
         return render(
@@ -471,7 +622,14 @@ def tmdb_search_htmx(request):
         )
 
     try:
-        results = client.search_multi(query, language=lang)[:MAX_SEARCH_RESULTS]
+        # TMDB drops people from its result pages, so a short page doesn't mean a complete one
+        results = search_cache.search(
+            "tmdb",
+            query,
+            lambda: provider_calls.do(("tmdb", query, lang), client.search_multi, query, language=lang),
+            page_size=None,
+            variant=lang,
+        )[:MAX_SEARCH_RESULTS]
     except requests.RequestException:
         logger.exception("TMDB search failed")
         return render(
@@ -480,7 +638,12 @@ def tmdb_search_htmx(request):
             {**base_context, "error": "Search failed"},
         )
 
-    return render(request, "partials/tmdb/tmdb_suggestions.html", {**base_context, "results": results})
+    in_library = find_library_media({"tmdb": [result.external_id for result in results]})
+    return render(
+        request,
+        "partials/tmdb/tmdb_suggestions.html",
+        {**base_context, "results": results, "in_library": in_library},
+    )
 
 
 @login_required
@@ -494,7 +657,10 @@ def igdb_search_htmx(request):
     if len(query) < MIN_SEARCH_QUERY_LENGTH:
         return render(request, "partials/igdb/igdb_suggestions.html", base_context)
 
-    client = get_igdb_client()
+    if _is_superseded(request, "igdb"):
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+    client = registry.get_client("igdb")
     if not client:
         logger.warning("IGDB search attempted but API credentials not configured")
         return render(
@@ -504,7 +670,14 @@ def igdb_search_htmx(request):
         )
 
     try:
-        results = client.search_games(query, limit=MAX_SEARCH_RESULTS)
+        results = search_cache.search(
+            "igdb",
+            query,
+            lambda: provider_calls.do(
+                ("igdb", query, MAX_SEARCH_RESULTS), client.search_games, query, limit=MAX_SEARCH_RESULTS
+            ),
+            page_size=MAX_SEARCH_RESULTS,
+        )
     except requests.RequestException:
         logger.exception("IGDB search failed")
         return render(
@@ -513,7 +686,12 @@ def igdb_search_htmx(request):
             {**base_context, "error": "Search failed"},
         )
 
-    return render(request, "partials/igdb/igdb_suggestions.html", {**base_context, "results": results})
+    in_library = find_library_media({"igdb": [result.external_id for result in results]})
+    return render(
+        request,
+        "partials/igdb/igdb_suggestions.html",
+        {**base_context, "results": results, "in_library": in_library},
+    )
 
 
 def _search_books_source(search_fn, query: str, limit: int, source_name: str) -> tuple[list, bool]:
@@ -523,10 +701,17 @@ def _search_books_source(search_fn, query: str, limit: int, source_name: str) ->
     ok=False means the source errored — the other source can still fill the page.
     """
     try:
-        return search_fn(query, limit=limit), True
+        results = search_cache.search(
+            source_name,
+            query,
+            lambda: provider_calls.do((source_name, query, limit), search_fn, query, limit=limit),
+            page_size=limit,
+        )
     except requests.RequestException:
         logger.exception("%s search failed", source_name)
         return [], False
+    else:
+        return results, True
 
 
 def _interleave(*iterables):
@@ -536,6 +721,42 @@ def _interleave(*iterables):
     return [item for group in zipped for item in group if item is not sentinel]
 
 
+def _search_book_sources(query: str, budget: float | None) -> tuple[dict, list[str]]:
+    """
+    Search every book source for at most `budget` seconds.
+
+    Returns ({source name: (results, ok)}, names of the sources still running).
+    Searches run on the shared executor rather than a per-request one: a source
+    that misses the budget keeps running and its results land in the search cache.
+    """
+    sources = {
+        plugin.label: getattr(registry.get_client(plugin.name), plugin.search)
+        for plugin in registry.get_providers_for_source("books")
+    }
+    futures = {}
+    for source_name, search_fn in sources.items():
+        try:
+            futures[source_name] = provider_executor.submit(
+                "book-search", _search_books_source, search_fn, query, MAX_SEARCH_RESULTS, source_name
+            )
+        except ExecutorSaturatedError:
+            logger.warning("Too many provider calls in flight, skipping %s search", source_name)
+    wait(futures.values(), timeout=budget)
+
+    results = {}
+    pending_sources = []
+    for source_name in sources:
+        future = futures.get(source_name)
+        if future is None:
+            results[source_name] = ([], False)
+        elif future.done():
+            results[source_name] = future.result()
+        else:
+            pending_sources.append(source_name)
+            results[source_name] = ([], True)
+    return results, pending_sources
+
+
 @login_required
 def book_search_htmx(request):
     """HTMX view: search OpenLibrary and Google Books in parallel, return merged results."""
@@ -547,25 +768,32 @@ def book_search_htmx(request):
     if len(query) < MIN_SEARCH_QUERY_LENGTH:
         return render(request, "partials/book/book_suggestions.html", base_context)
 
-    openlibrary = get_openlibrary_client()
-    googlebooks = get_googlebooks_client()
+    if _is_superseded(request, "books"):
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
 
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        ol_future = executor.submit(
-            _search_books_source, openlibrary.search_books, query, MAX_SEARCH_RESULTS, "OpenLibrary"
-        )
-        gb_future = executor.submit(
-            _search_books_source, googlebooks.search_books, query, MAX_SEARCH_RESULTS, "Google Books"
-        )
-        ol_results, ol_ok = ol_future.result()
-        gb_results, gb_ok = gb_future.result()
+    # The follow-up request for late results waits for them, bounded by the providers' own timeouts
+    budget = None if request.GET.get("complete") else BOOK_SEARCH_BUDGET
+    results, pending_sources = _search_book_sources(query, budget)
+    ol_results, ol_ok = results["OpenLibrary"]
+    gb_results, gb_ok = results["Google Books"]
 
     # Google Books typically has richer metadata for modern fiction, so we lead with it
     merged = _interleave(gb_results, ol_results)[:MAX_SEARCH_RESULTS]
 
-    context = {**base_context, "results": merged}
+    in_library = find_library_media(
+        {
+            plugin.name: [result.external_id for result in merged if result.source == plugin.name]
+            for plugin in registry.get_providers_for_source("books")
+        }
+    )
+    context = {**base_context, "results": merged, "pending_sources": pending_sources, "in_library": in_library}
     if not ol_ok and not gb_ok:
         context["error"] = "Search failed"
+    if pending_sources:
+        followup_params = {"q": query, "seq": request.GET.get("seq", ""), "complete": 1}
+        if media_id:
+            followup_params["media_id"] = media_id
+        context["followup_query"] = urlencode(followup_params)
 
     return render(request, "partials/book/book_suggestions.html", context)
 
@@ -581,10 +809,20 @@ def musicbrainz_search_htmx(request):
     if len(query) < MIN_SEARCH_QUERY_LENGTH:
         return render(request, "partials/musicbrainz/musicbrainz_suggestions.html", base_context)
 
-    client = get_musicbrainz_client()
+    if _is_superseded(request, "musicbrainz"):
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+    client = registry.get_client("musicbrainz")
 
     try:
-        results = client.search_releases(query, limit=MAX_SEARCH_RESULTS)
+        results = search_cache.search(
+            "musicbrainz",
+            query,
+            lambda: provider_calls.do(
+                ("musicbrainz", query, MAX_SEARCH_RESULTS), client.search_releases, query, limit=MAX_SEARCH_RESULTS
+            ),
+            page_size=MAX_SEARCH_RESULTS,
+        )
     except requests.RequestException:
         logger.exception("MusicBrainz search failed")
         return render(
@@ -593,7 +831,17 @@ def musicbrainz_search_htmx(request):
             {**base_context, "error": "Search failed"},
         )
 
-    return render(request, "partials/musicbrainz/musicbrainz_suggestions.html", {**base_context, "results": results})
+    if request.GET.get("covers_only"):
+        # Releases whose check failed are kept: better an empty cover than a missing album
+        covers = client.check_covers_exist([result.mbid for result in results])
+        results = [result for result in results if covers[result.mbid] is not False]
+
+    in_library = find_library_media({"musicbrainz": [result.external_id for result in results]})
+    return render(
+        request,
+        "partials/musicbrainz/musicbrainz_suggestions.html",
+        {**base_context, "results": results, "in_library": in_library},
+    )
 
 
 @login_required
@@ -615,6 +863,7 @@ def backup_export(request):
     """Export backup and download it."""
     try:
         backup_path = create_backup()
+        prune_tombstones(backup_path.parent)
 
         # Return the file as a download
         # FileResponse accepts a file object and handles closing it
@@ -629,6 +878,20 @@ def backup_export(request):
         return redirect("backup_manage")
 
 
+@login_required
+def backup_export_stream(request):  # noqa: ARG001
+    """
+    Download a backup generated while it is sent.
+
+    The download starts at once and nothing is written to disk. An error
+    while the archive is generated can only cut the download short: the
+    response has already started.
+    """
+    response = StreamingHttpResponse(stream_backup(), content_type="application/gzip")
+    response["Content-Disposition"] = content_disposition_header(as_attachment=True, filename=default_backup_filename())
+    return response
+
+
 @login_required
 def backup_import(request):
     """Import a backup file (with warning)."""
@@ -639,14 +902,15 @@ def backup_import(request):
             messages.error(request, _("No file selected"))
             return redirect("backup_manage")
 
-        if not backup_file.name.endswith(".tar.gz"):
-            messages.error(request, _("Invalid file format. Use a .tar.gz file"))
+        suffix = next((s for s in BACKUP_SUFFIXES.values() if backup_file.name.endswith(s)), None)
+        if suffix is None:
+            messages.error(request, _("Invalid file format. Use a .tar.gz or .tar.zst file"))
             return redirect("backup_manage")
 
         tmp_path = None
         try:
             # Save the uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".tar.gz") as tmp_file:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
                 for chunk in backup_file.chunks():
                     tmp_file.write(chunk)
                 tmp_path = tmp_file.name
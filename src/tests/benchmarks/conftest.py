@@ -0,0 +1,110 @@
+"""
+Fixtures and reporting for the provider benchmarks.
+
+Every benchmark runs a view several times against the recorded provider
+responses of `tests.replay`, under each of `CONDITIONS`, and adds a row to
+the timing table printed at the end of the run.
+"""
+
+import statistics
+import time
+import zlib
+from dataclasses import replace
+
+import pytest
+from django.core.cache import cache
+
+from core.services.executor import BoundedExecutor
+from tests.replay import Conditions, replay_providers
+
+CONDITIONS = {
+    "ideal": Conditions(),
+    "slow": Conditions(latency=0.2, jitter=0.1),
+    "flaky": Conditions(latency=0.05, jitter=0.05, error_rate=0.1, throttle_rate=0.05),
+}
+
+_results = []
+
+
+@pytest.fixture(autouse=True)
+def provider_credentials(settings):
+    settings.TMDB_API_KEY = "replay"
+    settings.TWITCH_CLIENT_ID = "replay"
+    settings.TWITCH_CLIENT_SECRET = "replay"  # noqa: S105
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+
+
+@pytest.fixture(autouse=True)
+def provider_executor(monkeypatch):
+    """A fresh executor per benchmark, so background work never spills into the next one."""
+    executor = BoundedExecutor(8, 32, thread_name_prefix="benchmark-io")
+    for module in (
+        "core.views",
+        "core.bulk_import",
+        "core.services.cover_prefetch",
+        "core.services.openlibrary",
+        "core.services.musicbrainz",
+    ):
+        monkeypatch.setattr(f"{module}.provider_executor", executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def run_benchmark(request, provider_executor):
+    """
+    Time `flow()` under the conditions named by the test's `conditions` parameter.
+
+    `flow` makes one request through the test client and returns the response.
+    """
+    iterations = request.config.getoption("--benchmark-iterations")
+
+    def run(name, conditions_name, flow):
+        timings = []
+        # Each benchmark gets its own jitter and fault positions, the same from one run to the next
+        conditions = replace(CONDITIONS[conditions_name], seed=zlib.crc32(name.encode()))
+        with replay_providers(conditions) as transport:
+            for _ in range(iterations):
+                # Every run is a cold one: no cached searches or cover checks
+                cache.clear()
+                started_at = time.perf_counter()
+                response = flow()
+                timings.append(time.perf_counter() - started_at)
+                assert response.status_code < 500
+            provider_executor.shutdown(wait=True)
+
+        failed = sum(1 for _, _, status in transport.calls if status >= 400)
+        if len(transport.calls) * max(conditions.error_rate, conditions.throttle_rate) >= 1:
+            faults = {status for _, _, status in transport.calls} & {429, 503}
+            assert faults, f"No fault injected into {name} under {conditions_name} conditions"
+        _results.append(
+            {
+                "name": name,
+                "conditions": conditions_name,
+                "p50": statistics.median(timings),
+                "p95": statistics.quantiles(timings, n=20, method="inclusive")[-1] if len(timings) > 1 else timings[0],
+                "max": max(timings),
+                "calls": len(transport.calls) / iterations,
+                "failed": failed / max(len(transport.calls), 1),
+            }
+        )
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("provider benchmarks (ms)")
+    terminalreporter.write_line(
+        f"{'benchmark':<32} {'conditions':<10} {'p50':>8} {'p95':>8} {'max':>8} {'calls/run':>10} {'failed':>7}"
+    )
+    for row in _results:
+        terminalreporter.write_line(
+            f"{row['name']:<32} {row['conditions']:<10} {row['p50'] * 1000:>8.0f} {row['p95'] * 1000:>8.0f} "
+            f"{row['max'] * 1000:>8.0f} {row['calls']:>10.1f} {row['failed']:>7.0%}"
+        )
@@ -0,0 +1,52 @@
+"""
+Benchmarks of the provider-facing views against recorded responses.
+
+Run with `poe benchmark` (or `pytest src/tests/benchmarks --benchmark`);
+`--benchmark-iterations` sets the number of timed runs per row.
+"""
+
+import pytest
+from django.urls import reverse
+
+from .conftest import CONDITIONS
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.parametrize("conditions", CONDITIONS)]
+
+IMPORT_PREVIEWS = {
+    "tmdb": {"tmdb_id": "438631", "media_type": "movie"},
+    "igdb": {"igdb_id": "1942"},
+    "openlibrary": {"openlibrary_key": "OL893415W", "year": "1965"},
+    "googlebooks": {"googlebooks_id": "B1hSG45JCX4C"},
+    "musicbrainz": {"musicbrainz_id": "b84ee12a-09ef-421b-82de-0441a926375b"},
+}
+
+COVER_URLS = {
+    "tmdb": "https://image.tmdb.org/t/p/w500/d5NXSklXo0qyIYkgV94XAgMIckC.jpg",
+    "igdb": "https://images.igdb.com/igdb/image/upload/t_cover_big/coaarl.jpg",
+    "openlibrary": "https://covers.openlibrary.org/b/id/11481354-L.jpg",
+    "googlebooks": "https://books.google.com/books/content?id=B1hSG45JCX4C&printsec=frontcover&img=1&fife=w800-h1200",
+    "musicbrainz": "https://coverartarchive.org/release/b84ee12a-09ef-421b-82de-0441a926375b/front-500",
+}
+
+
+def test_tmdb_search(conditions, logged_in_client, run_benchmark):
+    url = reverse("tmdb_search_htmx")
+    run_benchmark("tmdb_search_htmx", conditions, lambda: logged_in_client.get(url, {"q": "dune"}))
+
+
+def test_book_search(conditions, logged_in_client, run_benchmark):
+    url = reverse("book_search_htmx")
+    run_benchmark("book_search_htmx", conditions, lambda: logged_in_client.get(url, {"q": "dune"}))
+
+
+@pytest.mark.parametrize("source", IMPORT_PREVIEWS)
+def test_import_preview(conditions, source, logged_in_client, run_benchmark):
+    url = reverse("media_add")
+    run_benchmark(f"import preview ({source})", conditions, lambda: logged_in_client.get(url, IMPORT_PREVIEWS[source]))
+
+
+@pytest.mark.parametrize("source", COVER_URLS)
+def test_cover_import(conditions, source, logged_in_client, run_benchmark):
+    url = reverse("media_add")
+    data = {"title": "Dune", "media_type": "BOOK", "status": "PLANNED", "import_cover_url": COVER_URLS[source]}
+    run_benchmark(f"cover import ({source})", conditions, lambda: logged_in_client.post(url, data))
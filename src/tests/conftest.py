@@ -8,6 +8,70 @@ See https://docs.pytest.org/en/stable/reference/fixtures.html
 import pytest
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="Run the provider benchmarks in tests/benchmarks (skipped by default).",
+    )
+    parser.addoption(
+        "--benchmark-iterations",
+        type=int,
+        default=10,
+        help="Number of timed runs per benchmark (default: 10).",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def provider_state(settings, tmp_path):
+    """Keep shared provider state (rate limits, tokens) out of the real state file."""
+    settings.PROVIDER_STATE_PATH = tmp_path / "provider_state.sqlite3"
+    return settings.PROVIDER_STATE_PATH
+
+
+@pytest.fixture(autouse=True)
+def cover_prefetch_dir(settings, tmp_path):
+    """Keep prefetched covers in the test's temporary directory."""
+    settings.COVER_PREFETCH_DIR = tmp_path / "cover_prefetch"
+    return settings.COVER_PREFETCH_DIR
+
+
+@pytest.fixture(autouse=True)
+def metadata_mirror_path(settings, tmp_path):
+    """Use an empty metadata mirror, so clients call the (mocked) APIs unless a test loads one."""
+    settings.METADATA_MIRROR_PATH = tmp_path / "metadata_mirror.sqlite3"
+    return settings.METADATA_MIRROR_PATH
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache so cached searches don't leak between tests."""
+    from django.core.cache import cache
+
+    cache.clear()
+
+
+@pytest.fixture
+def provider_clients():
+    """Mock provider clients by name, returned by the registry in place of the real ones."""
+    from collections import defaultdict
+    from unittest.mock import MagicMock, patch
+
+    clients = defaultdict(MagicMock)
+    with patch("core.services.registry.get_client", side_effect=clients.__getitem__):
+        yield clients
+
+
 @pytest.fixture
 def agent(db):
     """Create and return a sample Agent instance."""
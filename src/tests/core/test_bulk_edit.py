@@ -0,0 +1,119 @@
+"""
+Tests for the bulk edition of media.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.contrib.messages import get_messages
+from django.urls import reverse
+from django.utils import timezone
+
+from core.bulk_edit import BulkEditError, apply_bulk_action
+from core.models import Agent, Media, Tag, Tombstone
+
+
+@pytest.fixture
+def library(media_factory):
+    return [media_factory(title=f"Book {i}", media_type="BOOK", status="PLANNED") for i in range(5)]
+
+
+def test_status_is_set_with_one_update(library, django_assert_num_queries):
+    Media.objects.update(updated_at=timezone.now() - timedelta(days=1))
+
+    # The UPDATE, within the savepoint of the transaction
+    with django_assert_num_queries(3):
+        result = apply_bulk_action(Media.objects.filter(pk__in=[library[0].pk, library[1].pk]), "set_status", "DNF")
+
+    assert result.count == 2
+    assert set(Media.objects.filter(status="DNF").values_list("pk", flat=True)) == {library[0].pk, library[1].pk}
+    assert Media.objects.filter(updated_at__gte=timezone.now() - timedelta(minutes=1)).count() == 2
+
+
+def test_score_can_be_cleared(library):
+    Media.objects.update(score=8)
+
+    apply_bulk_action(Media.objects.all(), "set_score", "")
+
+    assert not Media.objects.filter(score__isnull=False).exists()
+
+
+def test_tag_is_added_to_every_media_in_a_fixed_number_of_queries(library, django_assert_max_num_queries):
+    library[0].tags.add(Tag.objects.create(name="Favorites"))
+
+    with django_assert_max_num_queries(6):
+        result = apply_bulk_action(Media.objects.all(), "add_tag", " Favorites ")
+
+    assert result.count == 5
+    assert Tag.objects.get().media.count() == 5
+
+
+def test_tag_is_removed_from_the_tagged_media_only(library):
+    tag = Tag.objects.create(name="Favorites")
+    tag.media.add(library[0], library[1])
+
+    result = apply_bulk_action(Media.objects.all(), "remove_tag", "Favorites")
+
+    assert result.count == 2
+    assert not tag.media.exists()
+
+
+def test_delete_cleans_up_orphan_contributors(library):
+    shared = Agent.objects.create(name="Shared")
+    alone = Agent.objects.create(name="Alone")
+    library[0].contributors.add(shared, alone)
+    library[1].contributors.add(shared)
+
+    result = apply_bulk_action(Media.objects.filter(pk=library[0].pk), "delete")
+
+    assert (result.count, result.orphan_agents_deleted) == (1, 1)
+    assert list(Agent.objects.values_list("name", flat=True)) == ["Shared"]
+
+
+def test_delete_records_tombstones_in_a_fixed_number_of_queries(media_factory, django_assert_num_queries):
+    for i in range(50):
+        media_factory(title=f"Book {i}", media_type="BOOK").contributors.add(Agent.objects.create(name=f"Author {i}"))
+
+    # Per model (media, then orphan agents): read the pks, one tombstone INSERT, then the collector's
+    # SELECT and DELETEs; plus the contributors lookup and the savepoints
+    with django_assert_num_queries(19):
+        result = apply_bulk_action(Media.objects.all(), "delete")
+
+    assert (result.count, result.orphan_agents_deleted) == (50, 50)
+    assert Tombstone.objects.filter(model="core.media").count() == 50
+    assert Tombstone.objects.filter(model="core.agent").count() == 50
+
+
+def test_invalid_values_are_rejected(library):
+    with pytest.raises(BulkEditError, match="Unknown status"):
+        apply_bulk_action(Media.objects.all(), "set_status", "LOST")
+    with pytest.raises(BulkEditError, match="Unknown action"):
+        apply_bulk_action(Media.objects.all(), "archive")
+
+
+def test_view_applies_the_action_to_the_selection(logged_in_client, library):
+    response = logged_in_client.post(
+        reverse("media_bulk_action"),
+        {"scope": "selection", "media": [library[0].pk, library[2].pk], "action": "set_status", "status": "DNF"},
+    )
+
+    assert response.url == reverse("home")
+    assert Media.objects.filter(status="DNF").count() == 2
+    assert "2 items updated" in [str(message) for message in get_messages(response.wsgi_request)]
+
+
+def test_view_applies_the_action_to_the_current_filters(logged_in_client, library, media_factory):
+    media_factory(title="Film", media_type="FILM", status="PLANNED")
+    url = f"{reverse('media_bulk_action')}?type=BOOK&view_mode=list"
+
+    response = logged_in_client.post(url, {"scope": "filters", "action": "add_tag", "tag": "Shelf"})
+
+    assert response.url == f"{reverse('home')}?type=BOOK&view_mode=list"
+    assert sorted(Tag.objects.get().media.values_list("title", flat=True)) == [f"Book {i}" for i in range(5)]
+
+
+def test_view_reports_an_empty_selection(logged_in_client, library):
+    response = logged_in_client.post(reverse("media_bulk_action"), {"action": "delete"})
+
+    assert Media.objects.count() == 5
+    assert "No media selected" in [str(message) for message in get_messages(response.wsgi_request)]
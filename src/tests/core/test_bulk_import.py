@@ -0,0 +1,202 @@
+"""
+Tests for bulk ISBN lookup and import.
+"""
+
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+
+from core.bulk_import import import_isbns, parse_isbns
+from core.models import Agent, Media, MediaExternalId
+from core.services.openlibrary import OpenLibraryClient
+
+DUNE = "9780441172719"
+DUNE_OTHER_EDITION = "0441013597"
+FOUNDATION = "9780553293357"
+
+
+def _book(title, authors, work):
+    return {
+        "title": title,
+        "year": 1965,
+        "authors": authors,
+        "contributors": authors,
+        "cover_url": None,
+        "openlibrary_url": f"https://openlibrary.org/works/{work}",
+        "media_type": "book",
+    }
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
+
+
+# ---------- Parsing ----------
+
+
+def test_parse_isbns_accepts_common_formats():
+    text = f"978-0-441-17271-9\n{FOUNDATION}, 0-441-01359-7 ; 080442957x\n\n{DUNE}"
+
+    isbns, invalid = parse_isbns(text)
+
+    assert isbns == [DUNE, FOUNDATION, DUNE_OTHER_EDITION, "080442957X"]
+    assert invalid == []
+
+
+def test_parse_isbns_splits_space_separated_isbns_and_reports_invalid_entries():
+    isbns, invalid = parse_isbns(f"{DUNE} {FOUNDATION}\nnot an isbn\n12345")
+
+    assert isbns == [DUNE, FOUNDATION]
+    assert invalid == ["not an isbn", "12345"]
+
+
+# ---------- OpenLibrary batch lookup ----------
+
+
+def _fake_api(calls):
+    responses = {
+        "/works/OL1W.json": {"title": "Dune", "authors": [{"author": {"key": "/authors/A1"}}], "covers": [42]},
+        "/works/OL2W.json": {"title": "Foundation", "authors": [{"key": "/authors/A2"}]},
+        "/authors/A1.json": {"name": "Frank Herbert"},
+        "/authors/A2.json": {"name": "Isaac Asimov"},
+    }
+    editions = {
+        DUNE: {"works": [{"key": "/works/OL1W"}], "publish_date": "1990"},
+        DUNE_OTHER_EDITION: {"works": [{"key": "/works/OL1W"}], "publish_date": "June 2005"},
+        FOUNDATION: {"works": [{"key": "/works/OL2W"}], "publish_date": "1991"},
+    }
+
+    def request(endpoint, params=None):
+        calls.append(endpoint)
+        if endpoint == "api/books":
+            keys = params["bibkeys"].split(",")
+            return {key: {"details": editions[key[5:]]} for key in keys if key[5:] in editions}
+        return responses[endpoint]
+
+    return request
+
+
+def test_get_books_by_isbns_fetches_each_work_and_author_once():
+    client = OpenLibraryClient()
+    calls = []
+    with patch.object(client, "_request", side_effect=_fake_api(calls)):
+        books = client.get_books_by_isbns([DUNE, "978-0-441-01359-3", DUNE_OTHER_EDITION, FOUNDATION, "garbage"])
+
+    assert set(books) == {DUNE, DUNE_OTHER_EDITION, FOUNDATION}
+    assert books[DUNE]["authors"] == ["Frank Herbert"]
+    assert books[DUNE]["year"] == 1990
+    assert books[DUNE_OTHER_EDITION]["year"] == 2005
+    assert books[DUNE]["cover_url"] == "https://covers.openlibrary.org/b/id/42-L.jpg"
+    assert books[FOUNDATION]["openlibrary_url"] == "https://openlibrary.org/works/OL2W"
+    assert sorted(calls) == sorted(
+        ["api/books", "/works/OL1W.json", "/works/OL2W.json", "/authors/A1.json", "/authors/A2.json"]
+    )
+
+
+def test_get_books_by_isbns_batches_bibkeys():
+    client = OpenLibraryClient()
+    calls = []
+    isbns = [f"978{i:010d}" for i in range(120)]
+    with patch.object(client, "_request", side_effect=_fake_api(calls)):
+        assert client.get_books_by_isbns(isbns) == {}
+
+    assert calls.count("api/books") == 3
+
+
+# ---------- Import ----------
+
+
+@patch("core.bulk_import.get_openlibrary_client")
+def test_import_isbns_creates_books_in_bulk(mock_get_client, db, media_root):
+    Agent.objects.create(name="Frank Herbert")
+    books = {
+        DUNE: {**_book("Dune", ["Frank Herbert"], "OL1W"), "cover_url": "https://covers.openlibrary.org/b/id/1-L.jpg"},
+        FOUNDATION: _book("Foundation", ["Isaac Asimov", "Frank Herbert"], "OL2W"),
+    }
+    mock_get_client.return_value.get_books_by_isbns.return_value = books
+    cover = BytesIO()
+    Image.new("RGB", (1200, 1800)).save(cover, format="PNG")
+    mock_get_client.return_value.download_cover.return_value = cover.getvalue()
+
+    result = import_isbns([DUNE, FOUNDATION, DUNE_OTHER_EDITION])
+
+    assert len(result.created) == 2
+    assert result.not_found == [DUNE_OTHER_EDITION]
+    dune = Media.objects.get(title="Dune")
+    assert dune.media_type == "BOOK"
+    assert dune.status == "PLANNED"
+    assert dune.cover
+    assert max(Image.open(dune.cover.path).size) <= 800
+    foundation = Media.objects.get(title="Foundation")
+    assert sorted(foundation.contributors.values_list("name", flat=True)) == ["Frank Herbert", "Isaac Asimov"]
+    assert Agent.objects.count() == 2
+    assert MediaExternalId.objects.get(external_id="OL2W").media == foundation
+
+
+@patch("core.bulk_import.get_openlibrary_client")
+def test_import_isbns_skips_books_already_in_library(mock_get_client, db):
+    dune = Media.objects.create(title="Dune", media_type="BOOK", external_uri="https://openlibrary.org/works/OL1W")
+    dune.external_ids.create(provider="openlibrary", external_id="OL1W")
+    mock_get_client.return_value.get_books_by_isbns.return_value = {
+        DUNE: _book("Dune", [], "OL1W"),
+        DUNE_OTHER_EDITION: _book("Dune", [], "OL1W"),
+    }
+
+    result = import_isbns([DUNE, DUNE_OTHER_EDITION])
+
+    assert result.created == []
+    assert result.already_in_library == [DUNE, DUNE_OTHER_EDITION]
+    assert Media.objects.count() == 1
+
+
+@patch("core.bulk_import.get_openlibrary_client")
+def test_import_isbns_runs_queries_independent_of_book_count(mock_get_client, db, django_assert_max_num_queries):
+    mock_get_client.return_value.get_books_by_isbns.return_value = {
+        f"978{i:010d}": _book(f"Book {i}", [f"Author {i}"], f"OL{i}W") for i in range(50)
+    }
+
+    # Existing check, agents lookup + insert + re-read, media insert, links insert, savepoint
+    with django_assert_max_num_queries(10):
+        import_isbns([f"978{i:010d}" for i in range(50)])
+
+    assert Media.objects.count() == 50
+
+
+# ---------- View ----------
+
+
+@patch("core.views.import_isbns")
+def test_isbn_import_view_imports_pasted_and_uploaded_isbns(mock_import, logged_in_client):
+    mock_import.return_value.created = [object()]
+    mock_import.return_value.already_in_library = []
+    mock_import.return_value.not_found = []
+    upload = SimpleUploadedFile("isbns.txt", FOUNDATION.encode(), content_type="text/plain")
+
+    response = logged_in_client.post(reverse("media_import_isbns"), {"isbns": f"{DUNE}\nnope", "isbn_file": upload})
+
+    assert response.status_code == 302
+    assert response.url == reverse("home")
+    mock_import.assert_called_once_with([DUNE, FOUNDATION])
+    messages = [str(m) for m in get_messages(response.wsgi_request)]
+    assert "1 book added" in messages
+    assert "Not found: nope" in messages
+
+
+def test_isbn_import_view_rejects_input_without_isbns(logged_in_client):
+    response = logged_in_client.post(reverse("media_import_isbns"), {"isbns": "hello"})
+
+    assert response.url == reverse("media_import_isbns")
+    assert "No valid ISBN found" in [str(m) for m in get_messages(response.wsgi_request)]
+
+
+def test_isbn_import_page_renders(logged_in_client):
+    response = logged_in_client.get(reverse("media_import_isbns"))
+
+    assert response.status_code == 200
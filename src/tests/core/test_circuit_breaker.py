@@ -0,0 +1,121 @@
+"""
+Tests for the per-provider circuit breakers.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from django.urls import reverse
+
+from core.services.circuit_breaker import CircuitBreaker, CircuitOpenError, openlibrary_circuit
+from core.services.openlibrary import OpenLibraryClient
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker("test", "Test", failure_threshold=3, reset_timeout=30)
+
+
+def _fail(breaker, exc=None):
+    with pytest.raises(requests.RequestException), breaker:
+        raise exc or requests.ConnectionError("down")
+
+
+def _http_error(status):
+    response = MagicMock(status_code=status)
+    return requests.HTTPError(f"{status}", response=response)
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        _fail(breaker)
+
+
+def test_circuit_opens_after_consecutive_failures(breaker):
+    _open(breaker)
+
+    call = MagicMock()
+    with pytest.raises(CircuitOpenError), breaker:
+        call()
+
+    call.assert_not_called()
+    assert breaker.health()["state"] == "open"
+
+
+def test_success_resets_failure_count(breaker):
+    _fail(breaker)
+    _fail(breaker)
+    with breaker:
+        pass
+    _fail(breaker)
+
+    assert breaker.health() == {"name": "test", "label": "Test", "state": "closed", "failures": 1, "retry_in": 0}
+
+
+def test_client_errors_do_not_count(breaker):
+    for _ in range(5):
+        _fail(breaker, _http_error(404))
+
+    assert breaker.health()["state"] == "closed"
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_server_errors_and_throttling_count(breaker, status):
+    for _ in range(3):
+        _fail(breaker, _http_error(status))
+
+    assert breaker.health()["state"] == "open"
+
+
+def test_single_probe_after_cool_down(breaker):
+    _open(breaker)
+
+    with patch("core.services.circuit_breaker.time.time", return_value=10**10):
+        assert breaker.health()["state"] == "half_open"
+        with breaker:  # noqa: SIM117
+            # While the probe runs, other calls still fail fast
+            with pytest.raises(CircuitOpenError), breaker:
+                pass
+        assert breaker.health()["state"] == "closed"
+
+
+def test_failed_probe_reopens_circuit(breaker):
+    _open(breaker)
+
+    with patch("core.services.circuit_breaker.time.time", return_value=10**10):
+        _fail(breaker)
+        assert breaker.health()["state"] == "open"
+
+
+def test_state_is_shared_between_instances(breaker):
+    """Breakers with the same name share state, as workers do through the state file."""
+    _open(breaker)
+
+    with pytest.raises(CircuitOpenError), CircuitBreaker("test", "Test"):
+        pass
+
+
+# ---------- Integration ----------
+
+
+def test_client_fails_fast_while_circuit_is_open():
+    client = OpenLibraryClient()
+    with patch("core.services.openlibrary.requests.get", side_effect=requests.Timeout("slow")) as mock_get:
+        for _ in range(openlibrary_circuit.failure_threshold):
+            with pytest.raises(requests.Timeout):
+                client.search_books("dune")
+        with pytest.raises(CircuitOpenError):
+            client.search_books("dune")
+
+    assert mock_get.call_count == openlibrary_circuit.failure_threshold
+
+
+def test_import_page_shows_unavailable_provider(logged_in_client):
+    _open(openlibrary_circuit)
+
+    response = logged_in_client.get(reverse("media_import"))
+
+    assert response.context["provider_health"]["openlibrary"]["state"] == "open"
+    assert response.context["provider_health"]["tmdb"]["state"] == "closed"
+    assert "OpenLibrary unavailable" in response.content.decode()
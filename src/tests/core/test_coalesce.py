@@ -0,0 +1,138 @@
+"""
+Tests for single-flight coalescing of provider calls and superseded searches.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from django.urls import reverse
+
+from core.services.coalesce import SingleFlight
+
+# ---------- SingleFlight ----------
+
+
+def _run_concurrently(group, key, fn, callers):
+    """
+    Call group.do(key, fn) from `callers` threads while `fn` is blocked.
+
+    `fn` must block until its `release` event is set. Returns (results, errors).
+    """
+    results = [None] * callers
+    errors = [None] * callers
+
+    def call(index):
+        try:
+            results[index] = group.do(key, fn)
+        except Exception as e:  # noqa: BLE001
+            errors[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    threads[0].start()
+    # Wait for the leader to be inside fn, then let the followers pile up behind it
+    while group.in_flight() == 0:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    fn.release.set()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    group = SingleFlight()
+    calls = []
+
+    def slow_search():
+        calls.append(1)
+        slow_search.release.wait(timeout=5)
+        return ["result"]
+
+    slow_search.release = threading.Event()
+    results, _errors = _run_concurrently(group, "key", slow_search, 5)
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 5
+
+
+def test_exception_is_shared_with_waiting_callers():
+    group = SingleFlight()
+
+    def failing_search():
+        failing_search.release.wait(timeout=5)
+        msg = "upstream down"
+        raise RuntimeError(msg)
+
+    failing_search.release = threading.Event()
+    _results, errors = _run_concurrently(group, "key", failing_search, 3)
+
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+
+def test_sequential_calls_are_not_cached():
+    group = SingleFlight()
+    fn = MagicMock(side_effect=[1, 2])
+
+    assert group.do("key", fn) == 1
+    assert group.do("key", fn) == 2
+    assert group.in_flight() == 0
+
+
+def test_different_keys_are_not_coalesced():
+    group = SingleFlight()
+    fn = MagicMock(return_value="x")
+
+    group.do("a", fn)
+    group.do("b", fn)
+
+    assert fn.call_count == 2
+
+
+def test_failed_call_is_not_remembered():
+    group = SingleFlight()
+    fn = MagicMock(side_effect=[RuntimeError("boom"), "ok"])
+
+    with pytest.raises(RuntimeError):
+        group.do("key", fn)
+    assert group.do("key", fn) == "ok"
+
+
+# ---------- Superseded searches ----------
+
+
+def test_superseded_search_is_skipped(provider_clients, logged_in_client):
+    """A search older than one already received for the same box is not sent upstream."""
+    provider_clients["musicbrainz"].search_releases.return_value = []
+    url = reverse("musicbrainz_search_htmx")
+
+    logged_in_client.get(url, {"q": "abbey road", "seq": "200"})
+    response = logged_in_client.get(url, {"q": "abbey", "seq": "100"})
+
+    assert response.status_code == 204
+    provider_clients["musicbrainz"].search_releases.assert_called_once()
+
+
+def test_newer_search_is_not_superseded(provider_clients, logged_in_client):
+    provider_clients["musicbrainz"].search_releases.return_value = []
+    url = reverse("musicbrainz_search_htmx")
+
+    logged_in_client.get(url, {"q": "abbey road", "seq": "100"})
+    response = logged_in_client.get(url, {"q": "let it be", "seq": "200"})
+
+    assert response.status_code == 200
+    assert provider_clients["musicbrainz"].search_releases.call_count == 2
+
+
+def test_sequence_is_tracked_per_search_box(provider_clients, logged_in_client):
+    provider_clients["musicbrainz"].search_releases.return_value = []
+    provider_clients["igdb"].search_games.return_value = []
+
+    logged_in_client.get(reverse("musicbrainz_search_htmx"), {"q": "zelda", "seq": "200"})
+    response = logged_in_client.get(reverse("igdb_search_htmx"), {"q": "zelda", "seq": "100"})
+
+    assert response.status_code == 200
+    provider_clients["igdb"].search_games.assert_called_once()
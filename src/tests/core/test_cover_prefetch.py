@@ -0,0 +1,117 @@
+"""
+Tests for the speculative cover prefetch of the import preview.
+"""
+
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.urls import reverse
+from PIL import Image
+
+from core.models import Media
+from core.services import cover_prefetch
+
+COVER_URL = "https://coverartarchive.org/release/abc/front-500"
+
+
+def _png_bytes(size=(1600, 1600)):
+    output = BytesIO()
+    Image.new("RGB", size, color="blue").save(output, format="PNG")
+    return output.getvalue()
+
+
+def _wait_for(token):
+    """Let the background prefetch for `token` finish."""
+    future = cover_prefetch._pending.get(token)  # noqa: SLF001
+    if future is not None:
+        future.result(timeout=5)
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
+
+
+# ---------- Service ----------
+
+
+def test_prefetched_cover_is_compressed_and_claimed_once():
+    token = cover_prefetch.start(COVER_URL, MagicMock(return_value=_png_bytes()))
+    _wait_for(token)
+
+    cover = cover_prefetch.claim(token, COVER_URL)
+
+    with Image.open(cover) as image:
+        assert image.format == "JPEG"
+        assert max(image.size) <= 800
+    assert cover_prefetch.claim(token, COVER_URL) is None
+
+
+def test_claim_waits_for_running_prefetch():
+    token = cover_prefetch.start(COVER_URL, MagicMock(return_value=_png_bytes()))
+
+    assert cover_prefetch.claim(token, COVER_URL) is not None
+
+
+def test_claim_rejects_other_cover_url():
+    token = cover_prefetch.start(COVER_URL, MagicMock(return_value=_png_bytes()))
+    _wait_for(token)
+
+    assert cover_prefetch.claim(token, "https://image.tmdb.org/t/p/w500/other.jpg") is None
+
+
+@pytest.mark.parametrize("token", [None, "", "../../etc/passwd", "short"])
+def test_claim_rejects_invalid_tokens(token):
+    assert cover_prefetch.claim(token, COVER_URL) is None
+
+
+def test_invalid_image_is_not_stashed():
+    token = cover_prefetch.start(COVER_URL, MagicMock(return_value=b"not an image"))
+    _wait_for(token)
+
+    assert cover_prefetch.claim(token, COVER_URL) is None
+
+
+# ---------- Views ----------
+
+
+@patch("core.views._download_cover")
+@patch("core.views._fetch_musicbrainz_data")
+def test_import_preview_prefetches_cover_for_save(mock_fetch, mock_download, logged_in_client, media_root):
+    """The cover is downloaded while the preview is shown, and the save attaches it without downloading again."""
+    mock_fetch.return_value = {"title": "Abbey Road", "media_type": "music", "cover_url": COVER_URL}
+    mock_download.return_value = _png_bytes()
+
+    response = logged_in_client.get(reverse("media_add"), {"musicbrainz_id": "abc"})
+    token = response.context["import_data"]["cover_token"]
+    _wait_for(token)
+
+    response = logged_in_client.post(
+        reverse("media_add"),
+        {
+            "title": "Abbey Road",
+            "media_type": "MUSIC",
+            "status": "PLANNED",
+            "import_cover_url": COVER_URL,
+            "import_cover_token": token,
+        },
+    )
+
+    assert response.status_code == 302
+    mock_download.assert_called_once()
+    assert Media.objects.get(title="Abbey Road").cover
+
+
+@patch("core.views._download_cover")
+def test_import_save_without_prefetch_downloads_cover(mock_download, logged_in_client, media_root):
+    mock_download.return_value = _png_bytes()
+
+    logged_in_client.post(
+        reverse("media_add"),
+        {"title": "Abbey Road", "media_type": "MUSIC", "status": "PLANNED", "import_cover_url": COVER_URL},
+    )
+
+    mock_download.assert_called_once_with(COVER_URL)
+    assert Media.objects.get(title="Abbey Road").cover
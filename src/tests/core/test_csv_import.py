@@ -0,0 +1,220 @@
+"""
+Tests for the streaming import of Goodreads, Letterboxd and generic CSV exports.
+"""
+
+import csv
+import io
+
+import pytest
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from core.csv_import import DEFAULT_CHUNK_SIZE, CsvImportError, import_csv
+from core.models import Agent, Media, Tag
+
+GOODREADS_HEADER = [
+    "Book Id",
+    "Title",
+    "Author",
+    "Additional Authors",
+    "ISBN13",
+    "My Rating",
+    "Year Published",
+    "Original Publication Year",
+    "Date Read",
+    "Date Added",
+    "Bookshelves",
+    "Exclusive Shelf",
+    "My Review",
+]
+LETTERBOXD_HEADER = ["Date", "Name", "Year", "Letterboxd URI", "Rating", "Rewatch", "Tags", "Watched Date", "Review"]
+GENERIC_HEADER = ["title", "media_type", "contributors", "tags", "status", "pub_year", "score"]
+
+
+def _csv_lines(header, rows):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return io.StringIO(output.getvalue(), newline="")
+
+
+def _goodreads_row(book_id, title, author="Frank Herbert", shelf="read", **columns):
+    row = dict.fromkeys(GOODREADS_HEADER, "")
+    row.update({"Book Id": book_id, "Title": title, "Author": author, "Exclusive Shelf": shelf, **columns})
+    return [row[column] for column in GOODREADS_HEADER]
+
+
+def test_goodreads_export_is_imported(db):
+    lines = _csv_lines(
+        GOODREADS_HEADER,
+        [
+            _goodreads_row(
+                "234225",
+                "Dune",
+                **{
+                    "Additional Authors": "Brian Herbert, Kevin J. Anderson",
+                    "My Rating": "5",
+                    "Year Published": "2005",
+                    "Original Publication Year": "1965",
+                    "Date Read": "2023/05/14",
+                    "Date Added": "2023/01/02",
+                    "Bookshelves": "science-fiction, favorites, read",
+                    "My Review": "A classic.<br/><br/>Spice!",
+                },
+            ),
+            _goodreads_row("11", "Foundation", author="Isaac Asimov", shelf="to-read", **{"My Rating": "0"}),
+        ],
+    )
+
+    result = import_csv(lines)
+
+    assert (result.export_format, result.rows, result.created) == ("goodreads", 2, 2)
+    dune = Media.objects.get(title="Dune")
+    assert (dune.media_type, dune.status, dune.pub_year, dune.score) == ("BOOK", "COMPLETED", 1965, 10)
+    assert str(dune.review_date) == "2023-05-14"
+    assert timezone.localdate(dune.created_at).isoformat() == "2023-01-02"
+    assert dune.review == "A classic.\n\nSpice!"
+    assert "<p>A classic.</p>" in dune.review_rendered
+    assert dune.external_uri == "https://www.goodreads.com/book/show/234225"
+    assert list(dune.contributors.order_by("name").values_list("name", flat=True)) == [
+        "Brian Herbert",
+        "Frank Herbert",
+        "Kevin J. Anderson",
+    ]
+    assert sorted(dune.tags.values_list("name", flat=True)) == ["favorites", "science-fiction"]
+    foundation = Media.objects.get(title="Foundation")
+    assert (foundation.status, foundation.score) == ("PLANNED", None)
+
+
+def test_letterboxd_export_is_imported(db):
+    lines = _csv_lines(
+        LETTERBOXD_HEADER,
+        [["2024-02-01", "Perfect Days", "2023", "https://boxd.it/abc", "4.5", "", "japan, 2024", "2024-01-30", ""]],
+    )
+
+    import_csv(lines)
+
+    film = Media.objects.get()
+    assert (film.title, film.media_type, film.status, film.pub_year, film.score) == (
+        "Perfect Days",
+        "FILM",
+        "COMPLETED",
+        2023,
+        9,
+    )
+    assert film.external_uri == "https://boxd.it/abc"
+    assert sorted(film.tags.values_list("name", flat=True)) == ["2024", "japan"]
+
+
+def test_status_can_be_set_for_every_row(db):
+    lines = _csv_lines(LETTERBOXD_HEADER[:4], [["2024-02-01", "Perfect Days", "2023", "https://boxd.it/abc"]])
+
+    import_csv(lines, status="PLANNED")
+
+    assert Media.objects.get().status == "PLANNED"
+
+
+def test_generic_rows_without_title_or_known_type_are_reported(db):
+    lines = _csv_lines(
+        GENERIC_HEADER,
+        [
+            ["Outer Wilds", "game", "Mobius Digital", "exploration; space", "completed", "2019", "10"],
+            ["", "BOOK", "", "", "", "", ""],
+            ["Some podcast", "RADIO", "", "", "", "", ""],
+        ],
+    )
+
+    result = import_csv(lines)
+
+    assert result.invalid == [3, 4]
+    game = Media.objects.get()
+    assert (game.media_type, game.status, game.score) == ("GAME", "COMPLETED", 10)
+    assert sorted(game.tags.values_list("name", flat=True)) == ["exploration", "space"]
+
+
+def test_items_already_in_the_library_are_skipped(db):
+    Media.objects.create(title="Dune", media_type="BOOK", external_uri="https://www.goodreads.com/book/show/1")
+    rows = [_goodreads_row("1", "Dune"), _goodreads_row("2", "Dune Messiah"), _goodreads_row("2", "Dune Messiah")]
+
+    result = import_csv(_csv_lines(GOODREADS_HEADER, rows))
+
+    assert (result.created, result.already_in_library) == (1, 2)
+    assert Media.objects.count() == 2
+
+
+def test_rows_are_written_in_chunks_with_cached_names(db, django_assert_max_num_queries):
+    rows = [_goodreads_row(str(i), f"Book {i}", author=f"Author {i % 3}", Bookshelves="sf") for i in range(200)]
+    progress = []
+
+    with django_assert_max_num_queries(40):
+        result = import_csv(
+            _csv_lines(GOODREADS_HEADER, rows), chunk_size=50, on_progress=lambda r: progress.append(r.rows)
+        )
+
+    assert result.created == 200
+    assert progress == [50, 100, 150, 200]
+    assert Agent.objects.count() == 3
+    assert Tag.objects.get().media.count() == 200
+
+
+def test_unknown_formats_are_rejected(db):
+    with pytest.raises(CsvImportError, match="Unrecognized export format"):
+        import_csv(_csv_lines(["foo", "bar"], [["1", "2"]]))
+
+
+def test_command_imports_a_file_and_reports_progress(db, tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text(_csv_lines(GOODREADS_HEADER, [_goodreads_row("1", "Dune"), ["", ""]]).getvalue())
+    out = io.StringIO()
+
+    call_command("import_library", str(path), "--chunk-size=1", stdout=out)
+
+    assert "1 rows read, 1 added" in out.getvalue()
+    assert "✓ 1 of 2 goodreads rows imported (0 already in the library, 1 invalid)" in out.getvalue()
+    assert "Invalid rows: 3" in out.getvalue()
+
+
+def test_command_rejects_missing_files(tmp_path):
+    with pytest.raises(CommandError, match="File not found"):
+        call_command("import_library", str(tmp_path / "missing.csv"))
+
+
+def test_upload_view_imports_the_file(logged_in_client):
+    content = _csv_lines(LETTERBOXD_HEADER[:4], [["2024-02-01", "Perfect Days", "2023", "https://boxd.it/abc"]])
+    upload = SimpleUploadedFile("watchlist.csv", content.getvalue().encode("utf-8-sig"), content_type="text/csv")
+
+    response = logged_in_client.post(
+        reverse("media_import_csv"), {"csv_file": upload, "format": "letterboxd", "status": "PLANNED"}
+    )
+
+    assert response.status_code == 302
+    assert Media.objects.get().status == "PLANNED"
+    assert "1 item added" in [str(message) for message in get_messages(response.wsgi_request)]
+
+
+def test_upload_view_reports_unreadable_files(logged_in_client):
+    upload = SimpleUploadedFile("export.csv", b"title,media_type\n\xff\xfe,BOOK\n", content_type="text/csv")
+
+    response = logged_in_client.post(reverse("media_import_csv"), {"csv_file": upload})
+
+    assert response.url == reverse("media_import_csv")
+    assert not Media.objects.exists()
+
+
+def test_upload_view_reports_the_items_added_before_an_unreadable_row(logged_in_client):
+    # Decoded block by block: the first chunk is written before the invalid byte is reached
+    rows = "".join(f"Book {i:04},BOOK\n" for i in range(2 * DEFAULT_CHUNK_SIZE))
+    upload = SimpleUploadedFile("export.csv", f"title,media_type\n{rows}".encode() + b"\xff,BOOK\n")
+
+    response = logged_in_client.post(reverse("media_import_csv"), {"csv_file": upload})
+
+    assert response.url == reverse("media_import_csv")
+    assert Media.objects.count() == DEFAULT_CHUNK_SIZE
+    assert f"{DEFAULT_CHUNK_SIZE} items added before the error" in [
+        str(message) for message in get_messages(response.wsgi_request)
+    ]
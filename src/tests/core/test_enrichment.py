@@ -0,0 +1,238 @@
+"""
+Tests for the enrichment of media missing metadata.
+"""
+
+from io import BytesIO, StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from django.core.management import call_command
+from PIL import Image
+
+from core import enrichment
+from core.models import Agent, Media, MediaExternalId, Tag
+from core.services import shared_state
+from core.services.openlibrary import OpenLibraryResult
+
+
+def _png_bytes():
+    output = BytesIO()
+    Image.new("RGB", (1200, 1800), color="red").save(output, format="PNG")
+    return output.getvalue()
+
+
+def _film_details(title, year):
+    return {
+        "title": title,
+        "year": year,
+        "directors": ["Lana Wachowski"],
+        "production_companies": ["Warner Bros."],
+        "contributors": ["Lana Wachowski", "Warner Bros."],
+        "genres": ["Science Fiction"],
+        "cover_url": "https://image.tmdb.org/t/p/w500/matrix.jpg",
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_pacing(monkeypatch, settings, tmp_path):
+    monkeypatch.setattr(enrichment, "_rate_limiters", {})
+    settings.MEDIA_ROOT = tmp_path / "media"
+
+
+@pytest.fixture
+def clients():
+    tmdb = MagicMock()
+    tmdb.get_full_details.side_effect = lambda tmdb_id, media_type, language: _film_details(f"Film {tmdb_id}", 1999)
+    tmdb.download_cover.return_value = _png_bytes()
+    openlibrary = MagicMock()
+    openlibrary.search_books.return_value = [
+        OpenLibraryResult("/works/OL2W", "Dune Messiah", ["Frank Herbert"], 1969, None),
+        OpenLibraryResult("/works/OL1W", "Dune", ["Frank Herbert"], 1965, None),
+    ]
+    openlibrary.get_work_details.return_value = {"title": "Dune", "year": 1965, "contributors": ["Frank Herbert"]}
+    mocks = {"tmdb": tmdb, "openlibrary": openlibrary}
+    with patch("core.enrichment.registry.get_client", side_effect=mocks.get):
+        yield mocks
+
+
+def _film(media_factory, title, tmdb_id, **kwargs):
+    media = media_factory(title=title, media_type="FILM", **kwargs)
+    media.external_ids.create(provider="tmdb", external_id=f"movie/{tmdb_id}")
+    return media
+
+
+def test_missing_fields_are_filled_from_the_stored_identifier(media_factory, clients):
+    matrix = _film(media_factory, "The Matrix", 603)
+
+    stats = enrichment.enrich_library()
+
+    matrix.refresh_from_db()
+    assert stats.enriched == 1
+    assert matrix.pub_year == 1999
+    assert matrix.cover
+    assert sorted(matrix.contributors.values_list("name", flat=True)) == ["Lana Wachowski", "Warner Bros."]
+    assert list(matrix.tags.values_list("name", flat=True)) == ["Science Fiction"]
+    clients["tmdb"].get_full_details.assert_called_once_with(603, "movie", language="en-US")
+
+
+def test_fields_already_set_are_kept(media_factory, clients):
+    matrix = _film(media_factory, "The Matrix", 603, pub_year=2000)
+    matrix.tags.add(Tag.objects.create(name="Cyberpunk"))
+
+    enrichment.enrich_library()
+
+    matrix.refresh_from_db()
+    assert matrix.pub_year == 2000
+    assert list(matrix.tags.values_list("name", flat=True)) == ["Cyberpunk"]
+    assert matrix.contributors.count() == 2
+
+
+def test_media_without_identifier_are_matched_by_title(media_factory, clients):
+    dune = media_factory(title="dune", media_type="BOOK")
+    media_factory(title="Unknown book", media_type="BOOK")
+
+    stats = enrichment.enrich_library()
+
+    assert (stats.enriched, stats.not_found) == (1, 1)
+    assert dune.contributors.get().name == "Frank Herbert"
+    assert MediaExternalId.objects.get(media=dune).external_id == "OL1W"
+    clients["openlibrary"].get_work_details.assert_called_once_with("OL1W", first_publish_year=1965)
+
+
+def test_games_of_a_batch_are_fetched_in_one_igdb_call(media_factory, clients):
+    games = {}
+    for igdb_id in (1942, 1943, 404):
+        games[igdb_id] = media_factory(title=f"Game {igdb_id}", media_type="GAME")
+        games[igdb_id].external_ids.create(provider="igdb", external_id=str(igdb_id))
+    clients["igdb"] = MagicMock()
+    clients["igdb"].get_games_details.return_value = {
+        igdb_id: {"title": f"Game {igdb_id}", "year": 2015, "contributors": ["CD Projekt Red"]}
+        for igdb_id in (1942, 1943)
+    }
+
+    stats = enrichment.enrich_library(batch_size=10)
+
+    clients["igdb"].get_games_details.assert_called_once_with([1942, 1943, 404])
+    clients["igdb"].get_game_details.assert_not_called()
+    assert (stats.enriched, stats.not_found) == (2, 1)
+    assert games[1943].contributors.get().name == "CD Projekt Red"
+
+
+def test_complete_media_are_not_looked_up(media_factory, clients):
+    matrix = _film(media_factory, "The Matrix", 603, pub_year=1999, cover="covers/matrix.jpg")
+    matrix.tags.add(Tag.objects.create(name="Cyberpunk"))
+    matrix.contributors.add(Agent.objects.create(name="Lana Wachowski"))
+
+    assert enrichment.enrich_library().checked == 0
+    clients["tmdb"].get_full_details.assert_not_called()
+
+
+def test_provider_errors_spare_the_rest_of_the_batch(media_factory, clients):
+    _film(media_factory, "Broken", 1)
+    matrix = _film(media_factory, "The Matrix", 603)
+
+    def get_full_details(tmdb_id, media_type, language):
+        if tmdb_id == 1:
+            raise requests.ConnectionError
+        return _film_details("The Matrix", 1999)
+
+    clients["tmdb"].get_full_details.side_effect = get_full_details
+
+    stats = enrichment.enrich_library(batch_size=10)
+
+    matrix.refresh_from_db()
+    assert (stats.enriched, stats.failed) == (1, 1)
+    assert matrix.pub_year == 1999
+
+
+def test_failed_lookups_are_retried_after_the_rest_of_the_run(media_factory, clients):
+    flaky = _film(media_factory, "Flaky", 1)
+    _film(media_factory, "The Matrix", 603)
+    attempts = []
+
+    def get_full_details(tmdb_id, media_type, language):
+        attempts.append(tmdb_id)
+        if tmdb_id == 1 and attempts.count(1) == 1:
+            raise requests.ConnectionError
+        return _film_details(f"Film {tmdb_id}", 1999)
+
+    clients["tmdb"].get_full_details.side_effect = get_full_details
+
+    stats = enrichment.enrich_library(batch_size=1)
+
+    flaky.refresh_from_db()
+    assert attempts == [1, 603, 1]
+    assert (stats.checked, stats.enriched, stats.failed) == (2, 2, 0)
+    assert flaky.pub_year == 1999
+
+
+def test_interrupted_run_keeps_the_failed_lookups_to_retry(media_factory, clients):
+    broken = _film(media_factory, "Broken", 1)
+    _film(media_factory, "The Matrix", 603)
+    clients["tmdb"].get_full_details.side_effect = requests.ConnectionError
+
+    def interrupt(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        enrichment.enrich_library(batch_size=1, on_batch=interrupt)
+    assert shared_state.get_value(enrichment.CHECKPOINT_KEY)["failed_pks"] == [broken.pk]
+    clients["tmdb"].get_full_details.reset_mock(side_effect=True)
+    clients["tmdb"].get_full_details.side_effect = lambda tmdb_id, media_type, language: _film_details("", 1999)
+
+    stats = enrichment.enrich_library(batch_size=1)
+
+    broken.refresh_from_db()
+    assert [call.args[0] for call in clients["tmdb"].get_full_details.call_args_list] == [603, 1]
+    assert (stats.checked, stats.enriched, stats.failed) == (2, 2, 0)
+    assert broken.pub_year == 1999
+
+
+def test_interrupted_run_resumes_after_the_last_saved_batch(media_factory, clients):
+    films = [_film(media_factory, f"Film {tmdb_id}", tmdb_id) for tmdb_id in range(1, 6)]
+
+    def interrupt(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        enrichment.enrich_library(batch_size=2, on_batch=interrupt)
+    assert shared_state.get_value(enrichment.CHECKPOINT_KEY)["last_pk"] == films[1].pk
+    clients["tmdb"].get_full_details.reset_mock()
+
+    stats = enrichment.enrich_library(batch_size=2)
+
+    looked_up = [call.args[0] for call in clients["tmdb"].get_full_details.call_args_list]
+    assert sorted(looked_up) == [3, 4, 5]
+    assert (stats.checked, stats.enriched) == (5, 5)
+    assert shared_state.get_value(enrichment.CHECKPOINT_KEY) is None
+
+
+def test_batches_are_saved_with_a_fixed_number_of_queries(media_factory, clients, django_assert_max_num_queries):
+    for tmdb_id in range(1, 21):
+        _film(media_factory, f"Film {tmdb_id}", tmdb_id)
+
+    with django_assert_max_num_queries(20):
+        enrichment.enrich_library(batch_size=20)
+
+    assert Media.objects.filter(pub_year=1999).count() == 20
+
+
+def test_lookups_are_paced_per_provider(media_factory, clients, monkeypatch):
+    limiter = MagicMock()
+    monkeypatch.setattr(enrichment, "_rate_limiters", {"tmdb": limiter})
+    _film(media_factory, "The Matrix", 603)
+
+    enrichment.enrich_library()
+
+    limiter.acquire.assert_called_once_with(max_wait=enrichment.RATE_LIMIT_MAX_WAIT)
+
+
+def test_command_reports_progress(media_factory, clients):
+    _film(media_factory, "The Matrix", 603)
+    out = StringIO()
+
+    call_command("enrich_media", "--batch-size=5", stdout=out)
+
+    assert "1 checked, 1 enriched" in out.getvalue()
+    assert "✓ 1 of 1 media enriched (0 not found, 0 failed)" in out.getvalue()
@@ -0,0 +1,110 @@
+"""
+Tests for the bounded provider I/O executor.
+"""
+
+import threading
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from core.services.executor import BoundedExecutor, ExecutorSaturatedError, get_stats
+from core.services.openlibrary import OpenLibraryClient
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    yield executor
+    executor.shutdown()
+
+
+def test_submit_returns_result(executor):
+    assert executor.submit("test", lambda x: x * 2, 21).result(timeout=5) == 42
+
+
+def test_rejects_when_threads_and_queue_are_full(executor):
+    release = threading.Event()
+    running = executor.submit("test", release.wait, 5)
+    queued = executor.submit("test", lambda: "queued")
+
+    with pytest.raises(ExecutorSaturatedError):
+        executor.submit("test", lambda: "rejected")
+
+    release.set()
+    assert running.result(timeout=5) is True
+    assert queued.result(timeout=5) == "queued"
+    # Slots are given back once tasks finish
+    assert executor.submit("test", lambda: "again").result(timeout=5) == "again"
+
+
+def test_metrics_separate_queue_wait_from_run_time(executor):
+    release = threading.Event()
+    executor.submit("slow", release.wait, 5)
+    queued = executor.submit("fast", lambda: None)
+    with pytest.raises(ExecutorSaturatedError):
+        executor.submit("fast", lambda: None)
+    threading.Timer(0.1, release.set).start()
+    queued.result(timeout=5)
+    executor.shutdown()
+
+    stats = get_stats()
+
+    assert stats["slow"]["tasks"] == 1
+    assert stats["slow"]["avg_run_ms"] >= 50
+    assert stats["fast"]["tasks"] == 1
+    assert stats["fast"]["rejected"] == 1
+    assert stats["fast"]["avg_wait_ms"] >= 50
+    assert stats["fast"]["avg_run_ms"] < 50
+
+
+def test_run_all_keeps_order_and_runs_rejected_items_inline(executor):
+    release = threading.Event()
+    executor.submit("test", release.wait, 5)
+    threading.Timer(0.1, release.set).start()
+
+    # One queue slot for three items: two of them run in this thread
+    assert executor.run_all("test", lambda x: x * 10, [1, 2, 3]) == [10, 20, 30]
+
+
+def test_run_all_runs_inline_inside_executor_threads(executor):
+    """Nested fan-outs must not wait on a pool they are occupying."""
+    future = executor.submit("outer", executor.run_all, "inner", lambda x: x + 1, [1, 2])
+
+    assert future.result(timeout=5) == [2, 3]
+
+
+def test_run_all_reraises_exceptions(executor):
+    def fail(_item):
+        msg = "boom"
+        raise ValueError(msg)
+
+    with pytest.raises(ValueError, match="boom"):
+        executor.run_all("test", fail, [1, 2])
+
+
+def test_openlibrary_resolves_authors_concurrently_in_order():
+    client = OpenLibraryClient()
+    responses = {
+        "/works/OL1W.json": {
+            "title": "Good Omens",
+            "authors": [{"author": {"key": "/authors/A1"}}, {"key": "/authors/A2"}],
+        },
+        "/authors/A1.json": {"name": "Terry Pratchett"},
+        "/authors/A2.json": {"name": "Neil Gaiman"},
+    }
+    with patch.object(client, "_request", side_effect=lambda endpoint: responses[endpoint]):
+        details = client.get_work_details("OL1W")
+
+    assert details["authors"] == ["Terry Pratchett", "Neil Gaiman"]
+
+
+def test_provider_io_stats_command(executor):
+    executor.submit("book-search", lambda: None).result(timeout=5)
+    executor.shutdown()
+    out = StringIO()
+
+    call_command("provider_io_stats", stdout=out)
+
+    assert "book-search: 1 tasks, 0 rejected, avg wait" in out.getvalue()
@@ -0,0 +1,105 @@
+"""
+Tests for the provider identifiers stored on imported media.
+"""
+
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Media, MediaExternalId
+from core.queries import find_library_media
+from core.services.googlebooks import GoogleBooksResult
+from core.services.openlibrary import OpenLibraryResult
+from core.services.tmdb import TMDBResult
+
+ABBEY_ROAD = "b84ee12a-09ef-421b-82de-0441a926375b"
+
+
+def _import_post(logged_in_client, title, provider, external_id):
+    return logged_in_client.post(
+        reverse("media_add"),
+        {
+            "title": title,
+            "media_type": "MUSIC",
+            "status": "PLANNED",
+            "import_provider": provider,
+            "import_external_id": external_id,
+        },
+    )
+
+
+@patch("core.views._fetch_musicbrainz_data")
+def test_import_preview_carries_the_provider_identifier(mock_fetch, logged_in_client):
+    mock_fetch.return_value = {"title": "Abbey Road", "media_type": "music"}
+
+    response = logged_in_client.get(reverse("media_add"), {"musicbrainz_id": ABBEY_ROAD})
+
+    assert response.context["import_data"]["provider"] == "musicbrainz"
+    assert response.context["import_data"]["external_id"] == ABBEY_ROAD
+    assert f'value="{ABBEY_ROAD}"' in response.content.decode()
+
+
+def test_imported_media_keeps_its_provider_identifier(logged_in_client):
+    _import_post(logged_in_client, "Abbey Road", "musicbrainz", ABBEY_ROAD)
+
+    media = Media.objects.get(title="Abbey Road")
+    assert list(media.external_ids.values_list("provider", "external_id")) == [("musicbrainz", ABBEY_ROAD)]
+
+
+def test_importing_an_item_twice_keeps_the_identifier_on_the_first_media(logged_in_client):
+    _import_post(logged_in_client, "Abbey Road", "musicbrainz", ABBEY_ROAD)
+    response = _import_post(logged_in_client, "Abbey Road (again)", "musicbrainz", ABBEY_ROAD)
+
+    assert response.status_code == 302
+    assert Media.objects.count() == 2
+    assert MediaExternalId.objects.get().media.title == "Abbey Road"
+
+
+def test_unknown_providers_are_ignored(logged_in_client):
+    _import_post(logged_in_client, "Abbey Road", "discogs", "123")
+
+    assert not MediaExternalId.objects.exists()
+
+
+def test_find_library_media_separates_providers(media_factory):
+    film = media_factory(title="The Matrix")
+    film.external_ids.create(provider="tmdb", external_id="movie/603")
+    book = media_factory(title="Dune")
+    book.external_ids.create(provider="openlibrary", external_id="OL1W")
+
+    found = find_library_media({"tmdb": ["movie/603", "tv/603"], "googlebooks": ["OL1W"], "igdb": []})
+
+    assert found == {"tmdb": {"movie/603": film.pk}, "googlebooks": {}, "igdb": {}}
+
+
+def test_tmdb_suggestions_mark_items_in_library(provider_clients, logged_in_client, media_factory):
+    media_factory(title="The Matrix").external_ids.create(provider="tmdb", external_id="movie/603")
+    provider_clients["tmdb"].search_multi.return_value = [
+        TMDBResult(603, "The Matrix", "The Matrix", 1999, "", None, "movie"),
+        TMDBResult(603, "Matrix", "Matrix", 1993, "", None, "tv"),
+    ]
+
+    response = logged_in_client.get(reverse("tmdb_search_htmx"), {"q": "matrix"})
+
+    assert response.content.decode().count("In library") == 1
+
+
+def test_book_suggestions_are_matched_in_one_query(provider_clients, logged_in_client, media_factory):
+    media_factory(title="Dune").external_ids.create(provider="openlibrary", external_id="OL1W")
+    media_factory(title="Foundation").external_ids.create(provider="googlebooks", external_id="vol-2")
+    provider_clients["openlibrary"].search_books.return_value = [
+        OpenLibraryResult(f"/works/OL{i}W", f"Book {i}", [], None, None) for i in range(10)
+    ]
+    provider_clients["googlebooks"].search_books.return_value = [
+        GoogleBooksResult(f"vol-{i}", f"Book {i}", [], None, None) for i in range(10)
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = logged_in_client.get(reverse("book_search_htmx"), {"q": "book"})
+
+    assert response.context["in_library"]["openlibrary"] == {"OL1W": Media.objects.get(title="Dune").pk}
+    assert response.context["in_library"]["googlebooks"] == {"vol-2": Media.objects.get(title="Foundation").pk}
+    assert response.content.decode().count("In library") == 2
+    assert sum("core_mediaexternalid" in query["sql"] for query in queries.captured_queries) == 1
@@ -4,12 +4,14 @@ Tests for the Google Books service and the unified book search view.
 These tests verify application behavior, not the external API.
 """
 
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 import requests
 from django.urls import reverse
 
+from core.services.executor import BoundedExecutor
 from core.services.googlebooks import (
     GoogleBooksResult,
     _extract_year,
@@ -126,12 +128,10 @@ def _make_gb(title, year=2020):
     )
 
 
-@patch("core.views.get_googlebooks_client")
-@patch("core.views.get_openlibrary_client")
-def test_search_interleaves_results_leading_with_googlebooks(mock_ol, mock_gb, logged_in_client):
+def test_search_interleaves_results_leading_with_googlebooks(provider_clients, logged_in_client):
     """Merged list alternates sources, Google Books first."""
-    mock_ol.return_value.search_books.return_value = [_make_ol("OL1"), _make_ol("OL2")]
-    mock_gb.return_value.search_books.return_value = [_make_gb("GB1"), _make_gb("GB2")]
+    provider_clients["openlibrary"].search_books.return_value = [_make_ol("OL1"), _make_ol("OL2")]
+    provider_clients["googlebooks"].search_books.return_value = [_make_gb("GB1"), _make_gb("GB2")]
 
     response = logged_in_client.get(reverse("book_search_htmx"), {"q": "test"})
 
@@ -139,12 +139,10 @@ def test_search_interleaves_results_leading_with_googlebooks(mock_ol, mock_gb, l
     assert titles == ["GB1", "OL1", "GB2", "OL2"]
 
 
-@patch("core.views.get_googlebooks_client")
-@patch("core.views.get_openlibrary_client")
-def test_search_falls_back_when_googlebooks_fails(mock_ol, mock_gb, logged_in_client):
+def test_search_falls_back_when_googlebooks_fails(provider_clients, logged_in_client):
     """OpenLibrary results still render when Google Books raises."""
-    mock_ol.return_value.search_books.return_value = [_make_ol("OL1")]
-    mock_gb.return_value.search_books.side_effect = requests.RequestException("boom")
+    provider_clients["openlibrary"].search_books.return_value = [_make_ol("OL1")]
+    provider_clients["googlebooks"].search_books.side_effect = requests.RequestException("boom")
 
     response = logged_in_client.get(reverse("book_search_htmx"), {"q": "test"})
 
@@ -154,12 +152,10 @@ def test_search_falls_back_when_googlebooks_fails(mock_ol, mock_gb, logged_in_cl
     assert titles == ["OL1"]
 
 
-@patch("core.views.get_googlebooks_client")
-@patch("core.views.get_openlibrary_client")
-def test_search_falls_back_when_openlibrary_fails(mock_ol, mock_gb, logged_in_client):
+def test_search_falls_back_when_openlibrary_fails(provider_clients, logged_in_client):
     """Google Books results still render when OpenLibrary raises."""
-    mock_ol.return_value.search_books.side_effect = requests.RequestException("boom")
-    mock_gb.return_value.search_books.return_value = [_make_gb("GB1")]
+    provider_clients["openlibrary"].search_books.side_effect = requests.RequestException("boom")
+    provider_clients["googlebooks"].search_books.return_value = [_make_gb("GB1")]
 
     response = logged_in_client.get(reverse("book_search_htmx"), {"q": "test"})
 
@@ -169,11 +165,9 @@ def test_search_falls_back_when_openlibrary_fails(mock_ol, mock_gb, logged_in_cl
     assert titles == ["GB1"]
 
 
-@patch("core.views.get_googlebooks_client")
-@patch("core.views.get_openlibrary_client")
-def test_search_surfaces_error_only_when_both_sources_fail(mock_ol, mock_gb, logged_in_client):
-    mock_ol.return_value.search_books.side_effect = requests.RequestException("boom")
-    mock_gb.return_value.search_books.side_effect = requests.RequestException("boom")
+def test_search_surfaces_error_only_when_both_sources_fail(provider_clients, logged_in_client):
+    provider_clients["openlibrary"].search_books.side_effect = requests.RequestException("boom")
+    provider_clients["googlebooks"].search_books.side_effect = requests.RequestException("boom")
 
     response = logged_in_client.get(reverse("book_search_htmx"), {"q": "test"})
 
@@ -182,11 +176,9 @@ def test_search_surfaces_error_only_when_both_sources_fail(mock_ol, mock_gb, log
     assert response.context["results"] == []
 
 
-@patch("core.views.get_googlebooks_client")
-@patch("core.views.get_openlibrary_client")
-def test_search_preserves_media_id_and_query_in_context(mock_ol, mock_gb, logged_in_client):
-    mock_ol.return_value.search_books.return_value = []
-    mock_gb.return_value.search_books.return_value = []
+def test_search_preserves_media_id_and_query_in_context(provider_clients, logged_in_client):
+    provider_clients["openlibrary"].search_books.return_value = []
+    provider_clients["googlebooks"].search_books.return_value = []
 
     response = logged_in_client.get(reverse("book_search_htmx"), {"q": "hello", "media_id": "42"})
 
@@ -195,6 +187,56 @@ def test_search_preserves_media_id_and_query_in_context(mock_ol, mock_gb, logged
     assert response.context["query"] == "hello"
 
 
+@patch("core.views.BOOK_SEARCH_BUDGET", 0.05)
+def test_search_returns_partial_results_when_a_source_is_slow(provider_clients, logged_in_client):
+    """A source missing the budget is marked as loading, and the follow-up gets its results from the cache."""
+    release = threading.Event()
+    executor = BoundedExecutor(max_workers=2, max_queue=0)
+
+    def slow_search(_query, limit):
+        release.wait(timeout=5)
+        return [_make_gb("GB1")]
+
+    provider_clients["openlibrary"].search_books.return_value = [_make_ol("OL1")]
+    provider_clients["googlebooks"].search_books.side_effect = slow_search
+
+    with patch("core.views.provider_executor", executor):
+        response = logged_in_client.get(reverse("book_search_htmx"), {"q": "test", "seq": "100", "media_id": "7"})
+
+    assert [r.title for r in response.context["results"]] == ["OL1"]
+    assert response.context["pending_sources"] == ["Google Books"]
+    assert "complete=1" in response.context["followup_query"]
+    assert "seq=100" in response.context["followup_query"]
+    assert "Still loading results from Google Books" in response.content.decode()
+
+    # The late search finishes in the background after the response
+    release.set()
+    executor.shutdown(wait=True)
+
+    followup = logged_in_client.get(f"{reverse('book_search_htmx')}?{response.context['followup_query']}")
+
+    assert [r.title for r in followup.context["results"]] == ["GB1", "OL1"]
+    assert followup.context["pending_sources"] == []
+    provider_clients["googlebooks"].search_books.assert_called_once()
+    provider_clients["openlibrary"].search_books.assert_called_once()
+
+
+def test_search_skips_sources_when_executor_is_saturated(provider_clients, logged_in_client):
+    """A source that cannot be queued counts as failed, the other one still renders."""
+    provider_clients["openlibrary"].search_books.return_value = [_make_ol("OL1")]
+    provider_clients["googlebooks"].search_books.return_value = [_make_gb("GB1")]
+    # One slot left: OpenLibrary is queued, Google Books is rejected
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    executor._slots.acquire()  # noqa: SLF001
+
+    with patch("core.views.provider_executor", executor):
+        response = logged_in_client.get(reverse("book_search_htmx"), {"q": "test"})
+
+    assert "error" not in response.context
+    assert [r.title for r in response.context["results"]] == ["OL1"]
+    provider_clients["googlebooks"].search_books.assert_not_called()
+
+
 # ---------- get_volume_details: user-ID escaping (defense-in-depth) ----------
 
 
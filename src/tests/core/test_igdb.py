@@ -0,0 +1,158 @@
+"""
+Tests for the IGDB client: shared token handling and multiquery batching.
+
+These tests verify application behavior, not the external API.
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from core.services import shared_state
+from core.services.igdb import TOKEN_LEASE_KEY, TOKEN_STATE_KEY, IGDBClient, IGDBError
+
+
+@pytest.fixture
+def client():
+    return IGDBClient(client_id="id", client_secret="secret")
+
+
+def _get_token(client):
+    return client._get_access_token()  # noqa: SLF001
+
+
+def _token_response(token="fresh-token", expires_in=3600):  # noqa: S107
+    response = MagicMock()
+    response.json.return_value = {"access_token": token, "expires_in": expires_in}
+    return response
+
+
+def _api_response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+# ---------- Shared access token ----------
+
+
+def test_token_is_fetched_once_and_shared_between_clients(client):
+    with patch("core.services.igdb.requests.post", return_value=_token_response()) as mock_post:
+        assert _get_token(client) == "fresh-token"
+        assert _get_token(IGDBClient(client_id="id", client_secret="secret")) == "fresh-token"
+
+    mock_post.assert_called_once()
+
+
+def test_token_is_read_from_shared_state(client):
+    """A token refreshed by another process is reused without calling Twitch."""
+    shared_state.set_value(TOKEN_STATE_KEY, {"access_token": "from-other-worker", "expires_at": time.time() + 3600})
+
+    with patch("core.services.igdb.requests.post") as mock_post:
+        assert _get_token(client) == "from-other-worker"
+
+    mock_post.assert_not_called()
+
+
+def test_expiring_token_is_refreshed(client):
+    shared_state.set_value(TOKEN_STATE_KEY, {"access_token": "stale", "expires_at": time.time() + 10})
+
+    with patch("core.services.igdb.requests.post", return_value=_token_response()) as mock_post:
+        assert _get_token(client) == "fresh-token"
+
+    mock_post.assert_called_once()
+    assert shared_state.get_value(TOKEN_LEASE_KEY) == 0
+
+
+def test_waits_for_refresh_in_progress_elsewhere(client):
+    """While another process holds the refresh lease, we wait for its token instead of refreshing too."""
+    shared_state.set_value(TOKEN_LEASE_KEY, time.time() + 30)
+
+    def other_worker_finishes(_seconds):
+        shared_state.set_value(TOKEN_STATE_KEY, {"access_token": "theirs", "expires_at": time.time() + 3600})
+
+    with (
+        patch("core.services.igdb.requests.post") as mock_post,
+        patch("core.services.igdb.time.sleep", side_effect=other_worker_finishes),
+    ):
+        assert _get_token(client) == "theirs"
+
+    mock_post.assert_not_called()
+
+
+def test_failed_refresh_releases_lease(client):
+    with (
+        patch("core.services.igdb.requests.post", side_effect=requests.ConnectionError("down")),
+        pytest.raises(IGDBError),
+    ):
+        _get_token(client)
+
+    assert shared_state.get_value(TOKEN_LEASE_KEY) == 0
+
+
+# ---------- Multiquery ----------
+
+
+def test_search_expands_cover_and_developers_in_one_call(client):
+    payload = [
+        {
+            "id": 1,
+            "name": "Hades",
+            "first_release_date": 1600300800,
+            "cover": {"image_id": "abc"},
+            "involved_companies": [
+                {"company": {"name": "Supergiant"}, "developer": True},
+                {"company": {"name": "Some Publisher"}, "developer": False},
+            ],
+        }
+    ]
+    with (
+        patch.object(client, "_get_access_token", return_value="t"),
+        patch("core.services.igdb.requests.post", return_value=_api_response(payload)) as mock_post,
+    ):
+        results = client.search_games("hades")
+
+    mock_post.assert_called_once()
+    assert results[0].developers == ["Supergiant"]
+    assert results[0].year == 2020
+    assert results[0].cover_url_small.endswith("/t_cover_small/abc.jpg")
+
+
+def test_get_games_details_batches_ids_in_one_multiquery(client):
+    payload = [
+        {"name": "details-0", "result": [{"id": 1, "name": "One"}, {"id": 2, "name": "Two"}]},
+    ]
+    with (
+        patch.object(client, "_get_access_token", return_value="t"),
+        patch("core.services.igdb.requests.post", return_value=_api_response(payload)) as mock_post,
+    ):
+        details = client.get_games_details([1, 2, 2])
+
+    mock_post.assert_called_once()
+    assert mock_post.call_args[0][0].endswith("/multiquery")
+    body = mock_post.call_args[1]["data"]
+    assert 'query games "details-0"' in body
+    assert "where id = (1,2)" in body
+    assert details[1]["title"] == "One"
+    assert details[2]["igdb_url"] == "https://www.igdb.com/games/2"
+
+
+def test_get_games_details_splits_large_batches_into_sub_queries(client):
+    with (
+        patch.object(client, "_get_access_token", return_value="t"),
+        patch("core.services.igdb.requests.post", return_value=_api_response([])) as mock_post,
+    ):
+        client.get_games_details(list(range(1, 1202)))
+
+    mock_post.assert_called_once()
+    body = mock_post.call_args[1]["data"]
+    assert body.count("query games") == 3
+
+
+def test_get_games_details_empty_list_makes_no_call(client):
+    with patch("core.services.igdb.requests.post") as mock_post:
+        assert client.get_games_details([]) == {}
+
+    mock_post.assert_not_called()
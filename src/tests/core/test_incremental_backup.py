@@ -0,0 +1,190 @@
+"""
+Tests for incremental backups and the restoration of backup chains.
+"""
+
+import json
+import os
+import tarfile
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core.models import Agent, Media, Tag, Tombstone
+from core.utils import FULL_BACKUP, INCREMENTAL_BACKUP, create_backup, read_backup_info
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    (settings.MEDIA_ROOT / "covers").mkdir(parents=True)
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    # Stands in for the default directory, whose chain keeps the tombstones it needs
+    backup_dir = tmp_path / "backups"
+    monkeypatch.setattr("core.utils.default_backup_dir", lambda: backup_dir)
+    return backup_dir
+
+
+def _export(backup_dir, *args):
+    return read_backup_info(Path(call_command("export_backup", f"--output={backup_dir}", *args, stdout=StringIO())))
+
+
+def _members(backup):
+    with tarfile.open(backup.path, "r:gz") as tar:
+        return {member.name: tar.extractfile(member).read() for member in tar if member.isfile()}
+
+
+def test_incremental_backup_holds_only_what_changed(db, media_root, backup_dir):
+    (media_root / "covers" / "kept.jpg").write_bytes(b"kept")
+    kept = Media.objects.create(title="Kept", media_type="BOOK", cover="covers/kept.jpg")
+    deleted_pk = Media.objects.create(title="Deleted", media_type="BOOK").pk
+    full = _export(backup_dir)
+
+    Media.objects.create(title="New", media_type="FILM", cover="covers/new.jpg")
+    (media_root / "covers" / "new.jpg").write_bytes(b"new")
+    Media.objects.filter(pk=deleted_pk).delete()
+    incremental = _export(backup_dir, "--incremental")
+
+    assert (full.kind, incremental.kind) == (FULL_BACKUP, INCREMENTAL_BACKUP)
+    assert incremental.metadata["base_id"] == full.metadata["backup_id"]
+    assert set(incremental.files) == {"covers/kept.jpg", "covers/new.jpg"}
+    members = _members(incremental)
+    assert "media/covers/kept.jpg" not in members
+    assert members["media/covers/new.jpg"] == b"new"
+    titles = [
+        entry["fields"]["title"] for entry in json.loads(members["database.json"]) if entry["model"] == "core.media"
+    ]
+    assert titles == ["New"]
+    assert json.loads(members["deletions.json"]) == [["core.media", str(deleted_pk)]]
+    assert kept.title not in titles
+
+
+def test_chain_of_backups_is_restored(db, media_root, backup_dir):
+    (media_root / "covers" / "old.jpg").write_bytes(b"old")
+    dune = Media.objects.create(title="Dune", media_type="BOOK", cover="covers/old.jpg")
+    dune.tags.add(Tag.objects.create(name="Drama"))
+    gone = Media.objects.create(title="Gone", media_type="FILM")
+    gone.contributors.add(Agent.objects.create(name="Someone"))
+    full = _export(backup_dir)
+
+    dune.status = "COMPLETED"
+    dune.cover = "covers/new.jpg"
+    dune.save()
+    (media_root / "covers" / "new.jpg").write_bytes(b"new")
+    (media_root / "covers" / "old.jpg").unlink()
+    Tag.objects.get(name="Drama").delete()
+    dune.tags.add(Tag.objects.create(name="Drama"))
+    first = _export(backup_dir, "--incremental")
+    gone.delete()
+    Agent.objects.filter(name="Someone").delete()
+    second = _export(backup_dir, "--incremental")
+
+    call_command("flush", interactive=False, verbosity=0)
+    for path in (media_root / "covers").iterdir():
+        path.unlink()
+    call_command("import_backup", str(full.path), str(first.path), str(second.path), "--flush", stdout=StringIO())
+
+    restored = Media.objects.get()
+    assert (restored.title, restored.status, restored.cover.name) == ("Dune", "COMPLETED", "covers/new.jpg")
+    assert list(restored.tags.values_list("name", flat=True)) == ["Drama"]
+    assert not Agent.objects.exists()
+    assert sorted(path.name for path in (media_root / "covers").iterdir()) == ["new.jpg"]
+
+
+def test_chain_must_start_with_a_full_backup_and_be_in_order(db, media_root, backup_dir):
+    full = _export(backup_dir)
+    first = _export(backup_dir, "--incremental")
+    second = _export(backup_dir, "--incremental")
+
+    with pytest.raises(CommandError, match="start with the full backup"):
+        call_command("import_backup", str(first.path), stdout=StringIO())
+    with pytest.raises(CommandError, match="does not build on the backup before it"):
+        call_command("import_backup", str(full.path), str(second.path), stdout=StringIO())
+
+
+def test_differential_backup_builds_on_the_last_full_backup(db, media_root, backup_dir):
+    full = _export(backup_dir)
+    _export(backup_dir, "--incremental")
+
+    differential = _export(backup_dir, "--differential")
+
+    assert differential.metadata["base_id"] == full.metadata["backup_id"]
+
+
+def test_incremental_without_previous_backup_is_full(db, media_root, backup_dir):
+    out = StringIO()
+
+    path = call_command("export_backup", f"--output={backup_dir}", "--incremental", stdout=out)
+
+    assert read_backup_info(Path(path)).kind == FULL_BACKUP
+    assert "No previous backup to build on" in out.getvalue()
+
+
+def test_rotation_prunes_tombstones_older_than_the_kept_backups(db, media_root, backup_dir):
+    first = _export(backup_dir)
+    Media.objects.create(title="Dune", media_type="BOOK").delete()
+    second = _export(backup_dir)
+    Tag.objects.create(name="Drama").delete()
+    for age, backup in enumerate([second, first], start=1):
+        os.utime(backup.path, (1_000_000 - age, 1_000_000 - age))
+    assert sorted(Tombstone.objects.values_list("model", flat=True)) == ["core.media", "core.tag"]
+
+    _export(backup_dir, "--keep=2")
+
+    # The incrementals to come can still build on the second backup, not on the first
+    assert list(Tombstone.objects.values_list("model", flat=True)) == ["core.tag"]
+
+
+def test_every_export_prunes_tombstones_older_than_the_backups(db, media_root, backup_dir):
+    first = _export(backup_dir)
+    Media.objects.create(title="Dune", media_type="BOOK").delete()
+    first.path.unlink()
+    Tag.objects.create(name="Drama").delete()
+    assert Tombstone.objects.count() == 2
+
+    _export(backup_dir)
+
+    # Nothing can build on the deleted backup anymore, and the new one holds both deletions
+    assert not Tombstone.objects.exists()
+
+
+def test_full_backup_elsewhere_keeps_the_deletions_of_the_chain(db, media_root, backup_dir, tmp_path):
+    _export(backup_dir)
+    deleted_pk = Media.objects.create(title="Dune", media_type="BOOK").pk
+    Media.objects.filter(pk=deleted_pk).delete()
+    _export(tmp_path / "elsewhere")
+
+    incremental = _export(backup_dir, "--incremental")
+
+    assert json.loads(_members(incremental)["deletions.json"]) == [["core.media", str(deleted_pk)]]
+
+
+def test_rotation_keeps_the_incrementals_of_kept_full_backups(db, media_root, backup_dir):
+    backups = [_export(backup_dir), _export(backup_dir, "--incremental")]
+    backups += [_export(backup_dir), _export(backup_dir, "--incremental")]
+    for age, backup in enumerate(reversed(backups)):
+        os.utime(backup.path, (1_000_000 - age, 1_000_000 - age))
+
+    _export(backup_dir, "--keep=2")
+
+    remaining = {path.name for path in backup_dir.iterdir()}
+    assert backups[0].path.name not in remaining
+    assert backups[1].path.name not in remaining
+    assert {backups[2].path.name, backups[3].path.name} <= remaining
+    assert len(remaining) == 3
+
+
+def test_unchanged_files_are_not_hashed_again(db, media_root, tmp_path, monkeypatch):
+    (media_root / "covers" / "cover.jpg").write_bytes(b"jpeg")
+    full = read_backup_info(create_backup(output_dir=tmp_path))
+    monkeypatch.setattr("core.utils.hashlib.file_digest", lambda *args: pytest.fail("hashed again"))
+
+    incremental = read_backup_info(create_backup(output_dir=tmp_path, base=full))
+
+    assert incremental.files == full.files
@@ -193,3 +193,85 @@ def test_import_with_no_media_flag(db):
         # Check output mentions skipping media
         output = out.getvalue()
         assert "Skipping media files import" in output
+
+
+def test_export_snapshot_holds_the_sqlite_database(transactional_db):
+    """The export_backup command with --snapshot archives the database file instead of a JSON dump."""
+    Media.objects.create(title="Dune", media_type="BOOK")
+
+    with TemporaryDirectory() as tmpdir:
+        backup_path = Path(call_command("export_backup", f"--output={tmpdir}", "--snapshot", stdout=StringIO()))
+
+        with tarfile.open(backup_path, "r:gz") as tar:
+            names = tar.getnames()
+            metadata = json.load(tar.extractfile("metadata.json"))
+
+    assert "database.sqlite3" in names
+    assert "database.json" not in names
+    assert metadata["database_format"] == "sqlite"
+
+
+def test_import_snapshot_replaces_data(transactional_db):
+    """The import_backup command restores a snapshot, and the incremental backups built on it."""
+    Media.objects.create(title="Original", media_type="BOOK")
+
+    with TemporaryDirectory() as tmpdir:
+        snapshot_path = call_command("export_backup", f"--output={tmpdir}", "--snapshot", stdout=StringIO())
+        Media.objects.create(title="Added later", media_type="FILM")
+        incremental_path = call_command("export_backup", f"--output={tmpdir}", "--incremental", stdout=StringIO())
+        Media.objects.create(title="Not backed up", media_type="FILM")
+
+        out = StringIO()
+        call_command("import_backup", snapshot_path, incremental_path, stdout=out)
+
+    assert sorted(Media.objects.values_list("title", flat=True)) == ["Added later", "Original"]
+    assert "Restoring database snapshot" in out.getvalue()
+
+
+def test_export_snapshot_cannot_be_incremental(db):
+    """A snapshot is always a full backup."""
+    with pytest.raises(CommandError):
+        call_command("export_backup", "--snapshot", "--incremental", stdout=StringIO())
+
+
+def test_export_snapshot_inside_a_transaction_fails_without_leaving_a_file(db):
+    """SQLite cannot copy a database its connection is writing to: no partial backup is left behind."""
+    with TemporaryDirectory() as tmpdir:
+        with pytest.raises(ValueError, match="inside a transaction"):
+            call_command("export_backup", f"--output={tmpdir}", "--snapshot", stdout=StringIO())
+
+        assert not list(Path(tmpdir).iterdir())
+
+
+def test_import_only_writes_the_media_files_that_differ(db, settings, tmp_path):
+    """Media files already present with the same size and hash are left alone."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    covers = settings.MEDIA_ROOT / "covers"
+    covers.mkdir(parents=True)
+    (covers / "same.jpg").write_bytes(b"same")
+    (covers / "changed.jpg").write_bytes(b"old!")
+    backup_path = call_command("export_backup", f"--output={tmp_path}", stdout=StringIO())
+    (covers / "changed.jpg").write_bytes(b"new!")
+
+    out = StringIO()
+    call_command("import_backup", backup_path, stdout=out)
+
+    assert (covers / "changed.jpg").read_bytes() == b"old!"
+    assert (covers / "same.jpg").read_bytes() == b"same"
+    assert "1 written, 1 already up to date" in out.getvalue()
+
+
+def test_import_rejects_unsafe_paths_before_changing_anything(db, tmp_path):
+    """Members with paths leaving their destination are refused, even after the database dump."""
+    Media.objects.create(title="Kept", media_type="BOOK")
+    backup_path = Path(call_command("export_backup", f"--output={tmp_path}", stdout=StringIO()))
+    evil_path = tmp_path / "evil.tar.gz"
+    with tarfile.open(backup_path, "r:gz") as source, tarfile.open(evil_path, "w:gz") as tar:
+        for member in source:
+            tar.addfile(member, source.extractfile(member) if member.isfile() else None)
+        tar.addfile(tarfile.TarInfo("media/../../evil.txt"))
+
+    with pytest.raises(CommandError, match="Unsafe path"):
+        call_command("import_backup", str(evil_path), "--flush", stdout=StringIO())
+
+    assert list(Media.objects.values_list("title", flat=True)) == ["Kept"]
@@ -0,0 +1,136 @@
+"""
+Tests for the local metadata mirror built from provider data dumps.
+"""
+
+import gzip
+import io
+import json
+import lzma
+import tarfile
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core.services import metadata_mirror
+from core.services.musicbrainz import MusicBrainzClient
+from core.services.openlibrary import OpenLibraryClient
+
+OK_COMPUTER = "b84ee12a-09ef-421b-82de-0441a926375b"
+
+
+def _openlibrary_line(record_type, data):
+    return "\t".join([record_type, data["key"], "3", "2024-01-01T00:00:00", json.dumps(data)]) + "\n"
+
+
+@pytest.fixture
+def openlibrary_dump(tmp_path):
+    path = tmp_path / "ol_dump.txt.gz"
+    lines = [
+        _openlibrary_line("/type/author", {"key": "/authors/OL79034A", "name": "Frank Herbert"}),
+        _openlibrary_line(
+            "/type/work",
+            {
+                "key": "/works/OL893415W",
+                "title": "Dune",
+                "authors": [{"author": {"key": "/authors/OL79034A"}}],
+                "covers": [-1, 11481354],
+                "description": {"type": "/type/text", "value": "Set on the desert planet Arrakis."},
+                "first_publish_date": "August 1965",
+            },
+        ),
+        _openlibrary_line("/type/work", {"key": "/works/OL893526W", "title": "Dune Messiah"}),
+        _openlibrary_line("/type/edition", {"key": "/books/OL1M", "title": "Dune"}),
+    ]
+    with gzip.open(path, "wt", encoding="utf-8") as dump:
+        dump.writelines(lines)
+    return path
+
+
+@pytest.fixture
+def musicbrainz_dump(tmp_path):
+    release = {
+        "id": OK_COMPUTER,
+        "title": "OK Computer",
+        "date": "1997-05-21",
+        "country": "GB",
+        "artist-credit": [{"name": "Radiohead", "joinphrase": "", "artist": {"id": "a74b"}}],
+        "label-info": [{"catalog-number": "NODATA 02", "label": {"id": "df7d", "name": "Parlophone"}}],
+        "release-group": {"primary-type": "Album", "title": "OK Computer"},
+        "genres": [{"name": "alternative rock", "count": 12}],
+        "media": [{"tracks": [{"title": "Airbag"}]}],
+    }
+    content = (json.dumps(release) + "\n").encode()
+    path = tmp_path / "release.tar.xz"
+    with lzma.open(path, "wb") as compressed, tarfile.open(fileobj=compressed, mode="w|") as archive:
+        member = tarfile.TarInfo("mbdump/release")
+        member.size = len(content)
+        archive.addfile(member, io.BytesIO(content))
+    return path
+
+
+def _load(*args):
+    call_command("load_metadata_dump", *args, "--batch-size=1", stdout=StringIO())
+
+
+# ---------- OpenLibrary ----------
+
+
+def test_openlibrary_search_and_details_are_answered_by_the_mirror(openlibrary_dump):
+    _load("openlibrary", str(openlibrary_dump))
+    client = OpenLibraryClient()
+
+    with patch.object(client, "_request", side_effect=AssertionError("live API called")):
+        results = client.search_books("herbert dun")
+        details = client.get_work_details("OL893415W")
+
+    assert [(result.title, result.authors, result.year) for result in results] == [("Dune", ["Frank Herbert"], 1965)]
+    assert results[0].cover_id == 11481354
+    assert details["authors"] == ["Frank Herbert"]
+    assert details["overview"] == "Set on the desert planet Arrakis."
+    assert details["cover_url"] == "https://covers.openlibrary.org/b/id/11481354-L.jpg"
+    assert metadata_mirror.get_sources()["openlibrary"]["rows"] == 2
+
+
+def test_openlibrary_falls_back_to_the_live_api(openlibrary_dump):
+    client = OpenLibraryClient()
+    live_work = {"title": "Live", "authors": []}
+
+    # No mirror yet
+    with patch.object(client, "_request", return_value=live_work) as mock_request:
+        assert client.get_work_details("OL893415W")["title"] == "Live"
+    mock_request.assert_called_once()
+
+    # Mirror loaded, but without this work or any search match
+    _load("openlibrary", str(openlibrary_dump))
+    with patch.object(client, "_request", return_value=live_work) as mock_request:
+        assert client.get_work_details("OL1W")["title"] == "Live"
+    with patch.object(client, "_request", return_value={"docs": []}) as mock_request:
+        assert client.search_books("foundation") == []
+    mock_request.assert_called_once()
+
+
+# ---------- MusicBrainz ----------
+
+
+def test_musicbrainz_search_and_details_are_answered_by_the_mirror(musicbrainz_dump):
+    _load("musicbrainz", str(musicbrainz_dump))
+    client = MusicBrainzClient()
+
+    with patch.object(client, "_request", side_effect=AssertionError("live API called")):
+        results = client.search_releases("radiohead ok")
+        details = client.get_release_details(OK_COMPUTER)
+
+    assert [(result.mbid, result.artists, result.label) for result in results] == [
+        (OK_COMPUTER, ["Radiohead"], "Parlophone")
+    ]
+    assert details["year"] == 1997
+    assert details["genres"] == ["alternative rock"]
+    assert details["overview"] == "Label: Parlophone | Country: GB | Type: Album"
+
+
+def test_load_rejects_missing_files(tmp_path):
+    with pytest.raises(CommandError, match="File not found"):
+        _load("musicbrainz", str(tmp_path / "missing.tar.xz"))
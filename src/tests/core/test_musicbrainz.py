@@ -9,7 +9,7 @@ from unittest.mock import MagicMock, patch
 import requests
 from django.urls import reverse
 
-from core.services.musicbrainz import MusicBrainzResult
+from core.services.musicbrainz import MusicBrainzClient, MusicBrainzResult
 
 
 def test_returns_empty_for_short_query(logged_in_client):
@@ -29,8 +29,7 @@ def test_returns_empty_for_empty_query(logged_in_client):
     assert response.context["results"] == []
 
 
-@patch("core.views.get_musicbrainz_client")
-def test_returns_search_results(mock_get_client, logged_in_client):
+def test_returns_search_results(provider_clients, logged_in_client):
     """Returns search results from MusicBrainz client."""
     mock_client = MagicMock()
     mock_client.search_releases.return_value = [
@@ -43,7 +42,7 @@ def test_returns_search_results(mock_get_client, logged_in_client):
             label="Apple Records",
         )
     ]
-    mock_get_client.return_value = mock_client
+    provider_clients["musicbrainz"] = mock_client
 
     response = logged_in_client.get(reverse("musicbrainz_search_htmx"), {"q": "abbey road"})
 
@@ -53,12 +52,11 @@ def test_returns_search_results(mock_get_client, logged_in_client):
     mock_client.search_releases.assert_called_once()
 
 
-@patch("core.views.get_musicbrainz_client")
-def test_handles_api_error_gracefully(mock_get_client, logged_in_client):
+def test_handles_api_error_gracefully(provider_clients, logged_in_client):
     """Handles API errors gracefully and shows error message."""
     mock_client = MagicMock()
     mock_client.search_releases.side_effect = requests.RequestException("API Error")
-    mock_get_client.return_value = mock_client
+    provider_clients["musicbrainz"] = mock_client
 
     response = logged_in_client.get(reverse("musicbrainz_search_htmx"), {"q": "test query"})
 
@@ -75,14 +73,71 @@ def test_preserves_media_id_in_context(logged_in_client):
     assert response.context["media_id"] == "42"
 
 
-@patch("core.views.get_musicbrainz_client")
-def test_preserves_query_in_context(mock_get_client, logged_in_client):
+def test_preserves_query_in_context(provider_clients, logged_in_client):
     """Preserves search query in context."""
     mock_client = MagicMock()
     mock_client.search_releases.return_value = []
-    mock_get_client.return_value = mock_client
+    provider_clients["musicbrainz"] = mock_client
 
     response = logged_in_client.get(reverse("musicbrainz_search_htmx"), {"q": "test"})
 
     assert response.status_code == 200
     assert response.context["query"] == "test"
+
+
+# ---------- Batched cover checks ----------
+
+
+def _head_response(status):
+    return MagicMock(status_code=status)
+
+
+def _release(mbid):
+    return MusicBrainzResult(mbid=mbid, title=mbid, artists=[], year=None, country=None, label=None)
+
+
+def test_check_covers_exist_checks_each_release_once_and_caches():
+    client = MusicBrainzClient()
+    statuses = {"with-cover": 200, "no-cover": 404, "flaky": 503}
+
+    def head(url, **_kwargs):
+        return _head_response(statuses[url.split("/")[-2]])
+
+    with patch.object(client.session, "head", side_effect=head) as mock_head:
+        first = client.check_covers_exist(["with-cover", "no-cover", "flaky", "with-cover"])
+        second = client.check_covers_exist(["with-cover", "no-cover", "flaky"])
+
+    assert first == {"with-cover": True, "no-cover": False, "flaky": None}
+    assert second == first
+    # Known answers are cached, the failed check is retried
+    assert mock_head.call_count == 4
+
+
+def test_check_covers_exist_uses_the_coverart_rate_limiter():
+    client = MusicBrainzClient()
+    with (
+        patch.object(client.session, "head", return_value=_head_response(200)),
+        patch("core.services.musicbrainz.coverart_rate_limiter") as mock_limiter,
+    ):
+        client.check_covers_exist(["a", "b", "c"])
+
+    assert mock_limiter.acquire.call_count == 3
+
+
+def test_covers_only_hides_releases_without_cover(provider_clients, logged_in_client):
+    mock_client = provider_clients["musicbrainz"]
+    mock_client.search_releases.return_value = [_release("a"), _release("b"), _release("c")]
+    mock_client.check_covers_exist.return_value = {"a": True, "b": False, "c": None}
+
+    response = logged_in_client.get(reverse("musicbrainz_search_htmx"), {"q": "abbey", "covers_only": "1"})
+
+    assert [r.mbid for r in response.context["results"]] == ["a", "c"]
+    mock_client.check_covers_exist.assert_called_once_with(["a", "b", "c"])
+
+
+def test_covers_are_not_checked_by_default(provider_clients, logged_in_client):
+    provider_clients["musicbrainz"].search_releases.return_value = [_release("a")]
+
+    logged_in_client.get(reverse("musicbrainz_search_htmx"), {"q": "abbey"})
+
+    provider_clients["musicbrainz"].check_covers_exist.assert_not_called()
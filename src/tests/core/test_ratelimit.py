@@ -0,0 +1,116 @@
+"""
+Tests for the cross-process rate limiter.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.services.ratelimit import RateLimiter, RateLimitError
+
+
+def test_burst_is_available_immediately():
+    limiter = RateLimiter("test", rate=1.0, burst=3)
+
+    with patch("core.services.ratelimit.time.sleep") as mock_sleep:
+        for _ in range(3):
+            limiter.acquire()
+
+    mock_sleep.assert_not_called()
+
+
+def test_over_limit_call_waits_for_next_slot():
+    limiter = RateLimiter("test", rate=2.0, burst=1)
+
+    with patch("core.services.ratelimit.time.sleep") as mock_sleep:
+        limiter.acquire()
+        limiter.acquire()
+
+    mock_sleep.assert_called_once()
+    assert mock_sleep.call_args[0][0] == pytest.approx(0.5, abs=0.05)
+
+
+def test_queued_callers_get_successive_slots():
+    """Each caller waiting on an empty bucket reserves the slot after the previous one."""
+    limiter = RateLimiter("test", rate=1.0, burst=1)
+
+    with patch("core.services.ratelimit.time.sleep") as mock_sleep:
+        for _ in range(3):
+            limiter.acquire()
+
+    waits = [c[0][0] for c in mock_sleep.call_args_list]
+    assert waits == [pytest.approx(1.0, abs=0.05), pytest.approx(2.0, abs=0.05)]
+
+
+def test_raises_when_slot_is_past_deadline():
+    limiter = RateLimiter("test", rate=1.0, burst=1)
+
+    with patch("core.services.ratelimit.time.sleep"):
+        limiter.acquire()
+        with pytest.raises(RateLimitError):
+            limiter.acquire(max_wait=0.5)
+
+
+def test_rejected_call_does_not_consume_a_slot():
+    limiter = RateLimiter("test", rate=1.0, burst=1)
+
+    with patch("core.services.ratelimit.time.sleep") as mock_sleep:
+        limiter.acquire()
+        with pytest.raises(RateLimitError):
+            limiter.acquire(max_wait=0.1)
+        limiter.acquire()
+
+    # The third call only waits one interval, not two
+    assert mock_sleep.call_args[0][0] == pytest.approx(1.0, abs=0.05)
+
+
+def test_buckets_are_independent():
+    first = RateLimiter("first", rate=1.0, burst=1)
+    second = RateLimiter("second", rate=1.0, burst=1)
+
+    with patch("core.services.ratelimit.time.sleep") as mock_sleep:
+        first.acquire()
+        second.acquire()
+
+    mock_sleep.assert_not_called()
+
+
+def test_bucket_is_shared_between_limiter_instances():
+    """Two instances with the same name (e.g. two workers) draw from one bucket."""
+    with patch("core.services.ratelimit.time.sleep") as mock_sleep:
+        RateLimiter("shared", rate=1.0).acquire()
+        RateLimiter("shared", rate=1.0).acquire()
+
+    mock_sleep.assert_called_once()
+
+
+def test_musicbrainz_client_is_rate_limited():
+    from core.services.musicbrainz import MusicBrainzClient
+
+    client = MusicBrainzClient()
+    response = MagicMock()
+    response.json.return_value = {"releases": []}
+
+    with (
+        patch.object(client.session, "get", return_value=response),
+        patch("core.services.musicbrainz.musicbrainz_rate_limiter") as mock_limiter,
+    ):
+        client.search_releases("abbey road")
+
+    mock_limiter.acquire.assert_called_once()
+
+
+def test_musicbrainz_search_fails_cleanly_when_rate_limited():
+    from core.services.musicbrainz import MusicBrainzClient
+
+    client = MusicBrainzClient()
+
+    with (
+        patch.object(client.session, "get") as mock_get,
+        patch("core.services.musicbrainz.musicbrainz_rate_limiter") as mock_limiter,
+    ):
+        mock_limiter.acquire.side_effect = RateLimitError("busy")
+        with pytest.raises(RateLimitError):
+            client.search_releases("abbey road")
+
+    mock_get.assert_not_called()
@@ -0,0 +1,69 @@
+"""
+Tests for the provider registry.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from django.urls import reverse
+
+from core.services import registry
+
+
+def test_providers_are_not_imported_until_used():
+    # A fresh interpreter: this test process has long imported every provider
+    code = (
+        "import sys, django; django.setup(); import core.urls; "
+        "from core.services.registry import PROVIDERS; "
+        "print([plugin.module for plugin in PROVIDERS.values() if plugin.module in sys.modules])"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parents[2],
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "config.settings"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_cover_urls_are_matched_on_host():
+    assert registry.get_provider_for_cover("https://covers.openlibrary.org/b/id/1-L.jpg").name == "openlibrary"
+    assert registry.get_provider_for_cover("https://coverartarchive.org/release/abc/front").name == "musicbrainz"
+    assert registry.get_provider_for_cover("https://evil.example/image.tmdb.org/x.jpg") is None
+
+
+def test_client_factory_loads_the_provider_client():
+    get_client = registry.client_factory("openlibrary")
+
+    assert get_client.__name__ == "get_openlibrary_client"
+    assert type(get_client()).__name__ == "OpenLibraryClient"
+
+
+def test_import_page_opens_the_tab_of_the_media_type(logged_in_client):
+    for media_type, source in [("COMIC", "books"), ("GAME", "igdb"), ("MUSIC", "musicbrainz"), ("", "tmdb")]:
+        response = logged_in_client.get(reverse("media_import"), {"media_type": media_type})
+        assert response.context["default_source"] == source
+
+
+def test_cover_download_uses_the_provider_of_the_host(provider_clients):
+    from core.views import _download_cover
+
+    provider_clients["musicbrainz"].download_cover.return_value = b"cover"
+
+    assert _download_cover("https://coverartarchive.org/release/abc/front-500") == b"cover"
+    assert _download_cover("https://example.com/cover.jpg") is None
+    provider_clients["musicbrainz"].download_cover.assert_called_once()
+
+
+def test_failed_twitch_authentication_leaves_the_form_empty(provider_clients):
+    from core.services.igdb import IGDBError
+    from core.views import _fetch_details
+
+    provider_clients["igdb"].get_game_details.side_effect = IGDBError("Failed to authenticate with Twitch")
+
+    assert _fetch_details("igdb", 1942) is None
@@ -0,0 +1,68 @@
+"""
+Tests for the replay transport used by the provider benchmarks.
+"""
+
+import contextlib
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from core.services.googlebooks import GoogleBooksClient
+from core.services.musicbrainz import MusicBrainzClient
+from core.services.openlibrary import OpenLibraryClient
+from core.services.tmdb import TMDBClient
+from tests.replay import Conditions, replay_providers
+
+
+def test_clients_are_served_recorded_responses():
+    with replay_providers() as transport:
+        movies = TMDBClient(api_key="replay").search_multi("dune")
+        work = OpenLibraryClient().get_work_details("OL893415W")
+        cover = MusicBrainzClient().download_cover("https://coverartarchive.org/release/abc/front-500")
+
+    assert [movie.title for movie in movies] == ["Dune", "Dune", "Dune: Prophecy"]
+    assert work["authors"] == ["Frank Herbert"]
+    assert cover.startswith(b"\xff\xd8")
+    assert ("GET", "https://openlibrary.org/authors/OL79034A.json", 200) in transport.calls
+
+
+def test_hosts_without_recordings_are_unreachable():
+    with replay_providers(), pytest.raises(requests.ConnectionError):
+        requests.get("https://example.com/", timeout=1)
+
+
+def test_throttling_and_latency_are_injected():
+    client = TMDBClient(api_key="replay")
+    with replay_providers(Conditions(latency=0.05, throttle_rate=1)):
+        started_at = time.monotonic()
+        with pytest.raises(requests.HTTPError) as exc_info:
+            client.search_multi("dune")
+
+    assert exc_info.value.response.status_code == 429
+    assert exc_info.value.response.headers["Retry-After"] == "1"
+    assert time.monotonic() - started_at >= 0.05
+
+
+def test_session_retry_policy_applies_to_injected_errors():
+    with (
+        replay_providers(Conditions(error_rate=1)) as transport,
+        patch("tests.replay.time.sleep"),
+        pytest.raises(requests.HTTPError),
+    ):
+        GoogleBooksClient().search_books("dune")
+
+    # The first attempt plus Google Books' three retries
+    assert [status for _, _, status in transport.calls] == [503] * 4
+
+
+def test_faults_are_spread_evenly_over_a_short_run():
+    client = TMDBClient(api_key="replay")
+    with replay_providers(Conditions(error_rate=0.1, throttle_rate=0.05, seed=1)) as transport:
+        for _ in range(20):
+            with contextlib.suppress(requests.HTTPError):
+                client.search_multi("dune")
+
+    statuses = [status for _, _, status in transport.calls]
+    assert (statuses.count(503), statuses.count(429)) == (2, 1)
@@ -0,0 +1,128 @@
+"""
+Tests for the search-as-you-type cache.
+"""
+
+from io import StringIO
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from core.services import search_cache
+from core.services.musicbrainz import MusicBrainzResult
+from core.services.openlibrary import OpenLibraryResult
+
+
+def _book(title, authors=()):
+    return OpenLibraryResult(work_key=f"/works/{title}", title=title, authors=list(authors), year=None, cover_id=None)
+
+
+# ---------- search() ----------
+
+
+def test_repeated_query_is_served_from_cache():
+    fetch = MagicMock(return_value=[_book("Dune")])
+
+    search_cache.search("ol", "Dune", fetch, page_size=15)
+    results = search_cache.search("ol", "  dune ", fetch, page_size=15)
+
+    fetch.assert_called_once()
+    assert [r.title for r in results] == ["Dune"]
+
+
+def test_longer_query_is_filtered_from_complete_shorter_result():
+    books = [_book("Foundation", ["Isaac Asimov"]), _book("Foundation Design", ["Someone Else"])]
+    search_cache.search("ol", "foundation", MagicMock(return_value=books), page_size=15)
+
+    fetch = MagicMock()
+    results = search_cache.search("ol", "foundation asim", fetch, page_size=15)
+
+    fetch.assert_not_called()
+    assert [r.title for r in results] == ["Foundation"]
+
+
+def test_longer_query_goes_upstream_when_shorter_result_was_a_full_page():
+    search_cache.search("ol", "foundation", MagicMock(return_value=[_book("Foundation")] * 2), page_size=2)
+
+    fetch = MagicMock(return_value=[])
+    search_cache.search("ol", "foundation asimov", fetch, page_size=2)
+
+    fetch.assert_called_once()
+
+
+def test_unknown_completeness_only_serves_exact_repeats():
+    search_cache.search("tmdb", "alien", MagicMock(return_value=[]), page_size=None)
+
+    fetch = MagicMock(return_value=[])
+    search_cache.search("tmdb", "alien romulus", fetch, page_size=None)
+
+    fetch.assert_called_once()
+
+
+def test_partial_word_is_not_reused():
+    search_cache.search("ol", "foundat", MagicMock(return_value=[]), page_size=15)
+
+    fetch = MagicMock(return_value=[])
+    search_cache.search("ol", "foundation", fetch, page_size=15)
+
+    fetch.assert_called_once()
+
+
+def test_variant_separates_cache_entries():
+    fetch = MagicMock(return_value=[])
+
+    search_cache.search("tmdb", "alien", fetch, page_size=None, variant="fr")
+    search_cache.search("tmdb", "alien", fetch, page_size=None, variant="en")
+
+    assert fetch.call_count == 2
+
+
+def test_failed_fetch_is_not_cached():
+    fetch = MagicMock(side_effect=[RuntimeError("down"), []])
+
+    with pytest.raises(RuntimeError):
+        search_cache.search("ol", "dune", fetch, page_size=15)
+    search_cache.search("ol", "dune", fetch, page_size=15)
+
+    assert fetch.call_count == 2
+
+
+# ---------- Hit rates ----------
+
+
+def test_hit_rates_are_counted_per_provider():
+    search_cache.search("ol", "dune", MagicMock(return_value=[]), page_size=15)
+    search_cache.search("ol", "dune", MagicMock(), page_size=15)
+    search_cache.search("ol", "dune messiah", MagicMock(), page_size=15)
+    search_cache.search("igdb", "zelda", MagicMock(return_value=[]), page_size=15)
+
+    stats = search_cache.get_hit_rates()
+
+    assert stats["ol"] == {"hit": 1, "prefix_hit": 1, "miss": 1, "hit_rate": 2 / 3}
+    assert stats["igdb"]["hit_rate"] == 0
+
+
+def test_search_cache_stats_command():
+    search_cache.search("ol", "dune", MagicMock(return_value=[]), page_size=15)
+    out = StringIO()
+
+    call_command("search_cache_stats", stdout=out)
+
+    assert "ol: 0% answered from cache (0 hits, 0 prefix hits, 1 misses)" in out.getvalue()
+
+
+# ---------- Views ----------
+
+
+def test_search_as_you_type_hits_provider_once(provider_clients, logged_in_client):
+    provider_clients["musicbrainz"].search_releases.return_value = [
+        MusicBrainzResult(mbid="1", title="Abbey Road", artists=["The Beatles"], year=1969, country=None, label=None),
+    ]
+    url = reverse("musicbrainz_search_htmx")
+
+    logged_in_client.get(url, {"q": "abbey"})
+    response = logged_in_client.get(url, {"q": "abbey road beat"})
+
+    provider_clients["musicbrainz"].search_releases.assert_called_once()
+    assert "Abbey Road" in response.content.decode()
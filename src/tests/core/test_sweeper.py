@@ -0,0 +1,82 @@
+"""
+Tests for the sweep of orphan agents, tags and cover files.
+"""
+
+import os
+import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core import sweeper
+from core.models import Agent, Tag, Tombstone
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    (settings.MEDIA_ROOT / "covers").mkdir(parents=True)
+    return settings.MEDIA_ROOT
+
+
+def _cover_file(media_root, name, size=100, age=2 * sweeper.COVER_GRACE_PERIOD):
+    path = media_root / "covers" / name
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_orphan_agents_and_tags_are_deleted_with_one_statement_each(media_factory, media_root):
+    media = media_factory()
+    media.contributors.add(Agent.objects.create(name="Used"))
+    media.tags.add(Tag.objects.create(name="Used"))
+    Agent.objects.create(name="Orphan")
+    Tag.objects.create(name="Orphan")
+
+    with CaptureQueriesContext(connection) as queries:
+        result = sweeper.sweep()
+
+    assert (result.agents, result.tags) == (1, 1)
+    assert len([query for query in queries if query["sql"].startswith("DELETE")]) == 2
+    assert list(Agent.objects.values_list("name", flat=True)) == ["Used"]
+    assert list(Tag.objects.values_list("name", flat=True)) == ["Used"]
+    # Recorded for incremental backups
+    assert sorted(Tombstone.objects.values_list("model", flat=True)) == ["core.agent", "core.tag"]
+
+
+def test_unreferenced_cover_files_are_deleted(media_factory, media_root):
+    kept = _cover_file(media_root, "kept.jpg")
+    media_factory(cover="covers/kept.jpg")
+    stale = _cover_file(media_root, "stale.jpg", size=300)
+    recent = _cover_file(media_root, "recent.jpg", age=0)
+
+    result = sweeper.sweep()
+
+    assert (result.cover_files, result.bytes_reclaimed) == (1, 300)
+    assert kept.exists()
+    assert recent.exists()
+    assert not stale.exists()
+
+
+def test_dry_run_removes_nothing(db, media_root):
+    Tag.objects.create(name="Orphan")
+    stale = _cover_file(media_root, "stale.jpg")
+
+    result = sweeper.sweep(dry_run=True)
+
+    assert (result.tags, result.cover_files) == (1, 1)
+    assert Tag.objects.exists()
+    assert stale.exists()
+
+
+def test_command_reports_the_space_reclaimed(db, media_root):
+    _cover_file(media_root, "stale.jpg", size=2048)
+    out = StringIO()
+
+    call_command("sweep_orphans", stdout=out)
+
+    assert "✓ Removed 0 agents, 0 tags and 1 cover files (2.0\xa0KB reclaimed)" in out.getvalue()
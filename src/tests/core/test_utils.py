@@ -4,13 +4,47 @@ Tests for core.utils module.
 These tests verify the utility functions used by the application.
 """
 
+import gzip
 import json
 import tarfile
+from io import BytesIO, StringIO
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
-from core.models import Agent, Media
-from core.utils import create_backup, delete_orphan_agents_by_ids, get_datakult_version
+import pytest
+from django.core.management import call_command
+
+from core import utils
+from core.models import Agent, Media, Tag
+from core.utils import (
+    ZSTD,
+    create_backup,
+    delete_orphan_agents_by_ids,
+    get_datakult_version,
+    get_or_create_by_names,
+)
+
+
+def test_get_or_create_by_names_creates_missing_names_in_bulk(db, django_assert_num_queries):
+    """Existing names are reused and missing ones created, in three queries whatever the count."""
+    existing = Tag.objects.create(name="Drama")
+
+    with django_assert_num_queries(3):
+        tags = get_or_create_by_names(Tag, ["Drama", *(f"Genre {i}" for i in range(15))])
+
+    assert tags["Drama"] == existing
+    assert len(tags) == 16
+    assert Tag.objects.count() == 16
+
+
+def test_get_or_create_by_names_only_looks_up_existing_names(db, django_assert_num_queries):
+    """No insert is sent when every name exists, and nothing at all for no names."""
+    agent = Agent.objects.create(name="Frank Herbert")
+
+    with django_assert_num_queries(1):
+        assert get_or_create_by_names(Agent, {"Frank Herbert"}) == {"Frank Herbert": agent}
+    with django_assert_num_queries(0):
+        assert get_or_create_by_names(Agent, []) == {}
 
 
 def test_deletes_orphan_agent(db):
@@ -131,6 +165,21 @@ def test_creates_complete_backup(db):
             assert media_entries[0]["fields"]["title"] == "Test Media"
 
 
+def test_database_dump_is_streamed_through_a_spool(db, monkeypatch, tmp_path):
+    """The dump spills to a temporary file past the spool size, and is written without indentation."""
+    monkeypatch.setattr(utils, "DUMP_SPOOL_MAX_SIZE", 1024)
+    Media.objects.bulk_create([Media(title=f"Media {i}", media_type="BOOK") for i in range(50)])
+
+    backup_path = create_backup(output_dir=tmp_path)
+
+    with tarfile.open(backup_path, "r:gz") as tar:
+        member = tar.getmember("database.json")
+        dump = tar.extractfile(member).read()
+    assert member.size == len(dump) > 1024
+    assert b"\n  " not in dump
+    assert len([entry for entry in json.loads(dump) if entry["model"] == "core.media"]) == 50
+
+
 def test_custom_filename_with_extension_handling(db):
     """Custom filenames work correctly with automatic .tar.gz extension."""
     with TemporaryDirectory() as tmpdir:
@@ -151,3 +200,51 @@ def test_creates_output_directory(db):
 
         assert output_dir.exists()
         assert backup_path.exists()
+
+
+def test_parallel_gzip_writer_output_is_one_gzip_stream():
+    """Blocks compressed on several threads decompress as a single stream, in order."""
+    data = b"".join(f"line {i}\n".encode() for i in range(10_000))
+    output = BytesIO()
+
+    with utils._ParallelGzipWriter(output, workers=3, block_size=4096) as writer:  # noqa: SLF001
+        writer.write(data[:5000])
+        writer.set_level(0)
+        writer.write(data[5000:])
+
+    assert gzip.decompress(output.getvalue()) == data
+
+
+def test_compressed_covers_are_stored_as_they_are(db, settings, tmp_path):
+    """Cover images are not compressed again, other media files are."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    (settings.MEDIA_ROOT / "covers").mkdir(parents=True)
+    content = b"\0" * 200_000
+    (settings.MEDIA_ROOT / "covers" / "cover.jpg").write_bytes(content)
+    jpeg_backup = create_backup(output_dir=tmp_path / "jpeg")
+    (settings.MEDIA_ROOT / "covers" / "cover.jpg").rename(settings.MEDIA_ROOT / "covers" / "notes.txt")
+
+    text_backup = create_backup(output_dir=tmp_path / "text")
+
+    assert jpeg_backup.stat().st_size > len(content)
+    assert text_backup.stat().st_size < len(content) / 10
+    with tarfile.open(jpeg_backup, "r:gz") as tar:
+        assert tar.extractfile("media/covers/cover.jpg").read() == content
+
+
+def test_zstd_backup_is_restored(db, tmp_path):
+    """A zstd backup has its own extension and its compression is detected on import."""
+    pytest.importorskip("compression.zstd")
+    Media.objects.create(title="Test Media", media_type="BOOK")
+
+    backup_path = create_backup(output_dir=tmp_path, codec=ZSTD)
+    Media.objects.all().delete()
+    call_command("import_backup", str(backup_path), stdout=StringIO())
+
+    assert backup_path.name.endswith(".tar.zst")
+    assert Media.objects.get().title == "Test Media"
+
+
+def test_unknown_compression_is_rejected(db, tmp_path):
+    with pytest.raises(ValueError, match="Unknown compression"):
+        create_backup(output_dir=tmp_path, codec="brotli")
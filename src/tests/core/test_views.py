@@ -4,6 +4,9 @@ Tests for core.views module.
 These tests verify the behavior of views using pytest-django.
 """
 
+import io
+import json
+import tarfile
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
@@ -11,7 +14,7 @@ from django.contrib.messages import get_messages
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 
-from core.models import Agent, Media, SavedView
+from core.models import Agent, Media, SavedView, Tag
 from core.utils import create_backup
 
 
@@ -93,6 +96,27 @@ def test_media_add_with_new_contributor(logged_in_client, db):
     assert media.contributors.filter(name="New Author").exists()
 
 
+def test_media_add_resolves_new_names_in_bulk(logged_in_client, db, django_assert_max_num_queries):
+    """New contributors and tags cost a fixed number of queries, not a few per name."""
+    Tag.objects.create(name="Genre 0")
+    data = {
+        "title": "Imported Film",
+        "media_type": "FILM",
+        "status": "PLANNED",
+        "new_contributors": [f"Crew {i}" for i in range(10)],
+        "new_tags": [f"Genre {i}" for i in range(15)] + ["  ", "Genre 1 "],
+    }
+
+    with django_assert_max_num_queries(25):
+        response = logged_in_client.post(reverse("media_add"), data)
+
+    assert response.status_code == 302
+    media = Media.objects.get(title="Imported Film")
+    assert media.contributors.count() == 10
+    assert media.tags.count() == 15
+    assert Tag.objects.count() == 15
+
+
 def test_media_edit_get_displays_existing(logged_in_client, media):
     """GET on edit view shows the existing media."""
     response = logged_in_client.get(reverse("media_edit", kwargs={"pk": media.pk}))
@@ -540,6 +564,34 @@ def test_backup_export_handles_errors_gracefully(logged_in_client, monkeypatch):
     assert response.url == reverse("backup_manage")
 
 
+def test_backup_export_stream_generates_the_archive_on_the_fly(logged_in_client, settings, tmp_path):
+    """The streamed export sends a complete archive without writing a backup file."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    (settings.MEDIA_ROOT / "covers").mkdir(parents=True)
+    (settings.MEDIA_ROOT / "covers" / "cover.jpg").write_bytes(b"jpeg")
+    Media.objects.create(title="Test Media", media_type="BOOK")
+
+    response = logged_in_client.get(reverse("backup_export_stream"))
+
+    assert response.streaming
+    assert response["Content-Type"] == "application/gzip"
+    assert 'attachment; filename="datakult_backup_' in response["Content-Disposition"]
+    archive = io.BytesIO(b"".join(response.streaming_content))
+    with tarfile.open(fileobj=archive, mode="r:gz") as tar:
+        assert tar.getnames() == [
+            "metadata.json",
+            "manifest.json",
+            "database.json",
+            "media",
+            "media/covers",
+            "media/covers/cover.jpg",
+        ]
+        assert tar.extractfile("media/covers/cover.jpg").read() == b"jpeg"
+        dump = json.load(tar.extractfile("database.json"))
+    assert [entry["fields"]["title"] for entry in dump if entry["model"] == "core.media"] == ["Test Media"]
+    assert not list(tmp_path.glob("**/*.tar.gz"))
+
+
 def test_backup_import_get_redirects(logged_in_client):
     """GET requests to backup import redirect to backup manage."""
     response = logged_in_client.get(reverse("backup_import"))
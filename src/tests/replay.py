@@ -0,0 +1,206 @@
+"""
+Replay transport for the metadata providers.
+
+Serves recorded responses of TMDB, IGDB/Twitch, OpenLibrary, Google Books and
+MusicBrainz (plus their cover hosts) instead of calling the network, so
+provider-facing code can be exercised and timed offline. Recordings live in
+`tests/fixtures/replay/<provider>.json`: a list of entries matched in order
+on the HTTP method and the URL without its query string (shell-style
+wildcards allowed). An entry answers with `json`, a generated `image`
+([width, height]) or nothing, with an optional `status` (200 by default).
+
+Network conditions are simulated per request: a fixed latency plus jitter,
+and a share of 503 and 429 responses. Faults are spread evenly rather than
+drawn at random, each kind coming back every 1/rate requests from a seeded
+starting point, so even a short run gets its share. Retries configured on a session's
+mounted adapter (Google Books) still apply, as they would against the real
+service. Requests to hosts without recordings fail with a ConnectionError,
+so nothing leaks to the network.
+
+Usage:
+    with replay_providers(Conditions(latency=0.2, throttle_rate=0.1)) as transport:
+        client.search_multi("dune")
+    transport.calls  # [(method, url, status), ...]
+"""
+
+import contextlib
+import fnmatch
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from functools import cache
+from http import HTTPStatus
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+import requests
+from PIL import Image
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "replay"
+PROVIDERS = ("tmdb", "igdb", "openlibrary", "googlebooks", "musicbrainz")
+
+# Seconds a throttled client is told to wait
+RETRY_AFTER = 1
+
+
+@dataclass(frozen=True)
+class Conditions:
+    """Simulated network conditions, applied to every replayed request."""
+
+    # Seconds added to every request, plus up to `jitter` more
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Share of requests answered with 503 Service Unavailable
+    error_rate: float = 0.0
+    # Share of requests answered with 429 Too Many Requests
+    throttle_rate: float = 0.0
+    # Seeds the jitter and where the faults fall
+    seed: int = 0
+
+
+@cache
+def _image(width: int, height: int) -> bytes:
+    """A JPEG cover of the given size. Gradients keep it above the providers' placeholder size checks."""
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    output = BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def load_recordings(providers: tuple[str, ...] = PROVIDERS) -> list[dict]:
+    """Load the recordings of the given providers, in matching order."""
+    recordings = []
+    for provider in providers:
+        data = json.loads((FIXTURES_DIR / f"{provider}.json").read_text())
+        recordings.extend({**entry, "provider": provider} for entry in data["recordings"])
+    return recordings
+
+
+class ReplayTransport:
+    """Answers provider requests from recordings under simulated network conditions."""
+
+    def __init__(self, recordings: list[dict], conditions: Conditions | None = None):
+        self.recordings = recordings
+        self.conditions = conditions or Conditions()
+        self.hosts = {urlsplit(entry["url"]).hostname for entry in recordings}
+        self.calls: list[tuple[str, str, int]] = []
+        self._random = random.Random(self.conditions.seed)  # noqa: S311
+        # Accumulated share of each fault: one is injected each time it reaches 1
+        self._fault_credit = {
+            HTTPStatus.TOO_MANY_REQUESTS: self._random.random(),
+            HTTPStatus.SERVICE_UNAVAILABLE: self._random.random(),
+        }
+        self._lock = threading.Lock()
+
+    def _next_fault(self) -> HTTPStatus | None:
+        """The fault injected into the next request, if any. Call with the lock held."""
+        rates = {
+            HTTPStatus.TOO_MANY_REQUESTS: self.conditions.throttle_rate,
+            HTTPStatus.SERVICE_UNAVAILABLE: self.conditions.error_rate,
+        }
+        fault = None
+        for status, rate in rates.items():
+            self._fault_credit[status] += rate
+            # A fault that coincides with another one comes with the next request
+            if fault is None and self._fault_credit[status] >= 1:
+                self._fault_credit[status] -= 1
+                fault = status
+        return fault
+
+    def _match(self, method: str, url: str) -> dict | None:
+        base_url = url.split("?", 1)[0]
+        for entry in self.recordings:
+            if entry["method"] == method and fnmatch.fnmatchcase(base_url, entry["url"]):
+                return entry
+        return None
+
+    def respond(self, request: requests.PreparedRequest) -> tuple[int, dict, bytes]:
+        """Return the (status, headers, body) for a request, after the simulated latency."""
+        conditions = self.conditions
+        with self._lock:
+            delay = conditions.latency + self._random.uniform(0, conditions.jitter)
+            fault = self._next_fault()
+        time.sleep(delay)
+
+        entry = self._match(request.method, request.url)
+        if entry is None:
+            status, headers, body = HTTPStatus.NOT_FOUND, {}, b""
+        elif fault == HTTPStatus.TOO_MANY_REQUESTS:
+            status, headers, body = fault, {"Retry-After": str(RETRY_AFTER)}, b""
+        elif fault == HTTPStatus.SERVICE_UNAVAILABLE:
+            status, headers, body = fault, {}, b""
+        else:
+            status, headers, body = entry.get("status", HTTPStatus.OK), {}, b""
+            if "image" in entry:
+                headers, body = {"Content-Type": "image/jpeg"}, _image(*entry["image"])
+            elif "json" in entry:
+                headers, body = {"Content-Type": "application/json"}, json.dumps(entry["json"]).encode()
+
+        if request.method == "HEAD":
+            body = b""
+        with self._lock:
+            self.calls.append((request.method, request.url, int(status)))
+        return int(status), headers, body
+
+
+class ReplayAdapter(BaseAdapter):
+    """Requests adapter answering from a ReplayTransport, honouring the session's retry policy."""
+
+    def __init__(self, transport: ReplayTransport, max_retries):
+        super().__init__()
+        self.transport = transport
+        self.max_retries = max_retries
+
+    def _send_once(self, request: requests.PreparedRequest) -> requests.Response:
+        status, headers, body = self.transport.respond(request)
+        raw = HTTPResponse(body=BytesIO(body), headers=headers, status=status, preload_content=False)
+        return HTTPAdapter().build_response(request, raw)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):  # noqa: PLR0913, PLR0917
+        response = self._send_once(request)
+        retries = self.max_retries
+        while retries.is_retry(request.method, response.status_code, "Retry-After" in response.headers):
+            try:
+                retries = retries.increment(method=request.method, url=request.url)
+            except MaxRetryError:
+                break
+            time.sleep(retries.get_backoff_time())
+            response = self._send_once(request)
+        return response
+
+    def close(self):
+        pass
+
+
+@contextlib.contextmanager
+def replay_providers(
+    conditions: Conditions | None = None, providers: tuple[str, ...] = PROVIDERS
+) -> Iterator[ReplayTransport]:
+    """
+    Route all `requests` traffic to recorded provider responses.
+
+    Covers both sessions created by the clients and the module-level
+    `requests.get()`/`requests.post()` calls, which use a session internally.
+    """
+    transport = ReplayTransport(load_recordings(providers), conditions)
+    get_adapter = requests.Session.get_adapter
+
+    def replay_adapter(session, url):
+        if urlsplit(url).hostname not in transport.hosts:
+            msg = f"No recorded responses for {url}"
+            raise requests.ConnectionError(msg)
+        return ReplayAdapter(transport, get_adapter(session, url).max_retries)
+
+    with patch.object(requests.Session, "get_adapter", replay_adapter):
+        yield transport